@@ -6,151 +6,71 @@ from ttkbootstrap.dialogs import Messagebox
 from tkinter import messagebox, filedialog
 from datetime import datetime, timedelta
 from tkinter import ttk
-import winsound
 import csv
 from PIL import Image, ImageTk
-import os
 import calendar
-import re
+import threading
 from collections import defaultdict
-
-# Database Setup
-conn = sqlite3.connect('students_attendance.db')
-cursor = conn.cursor()
-
-# Helper function to check if column exists
-def column_exists(table, column):
-    cursor.execute(f"PRAGMA table_info({table})")
-    return any(row[1] == column for row in cursor.fetchall())
-
-# Create or alter the Students table
-cursor.execute(''' 
-    CREATE TABLE IF NOT EXISTS Students (
-        roll_no TEXT PRIMARY KEY,
-        name TEXT NOT NULL,
-        phone TEXT,
-        dob TEXT,
-        course_start_date TEXT,
-        course_end_date TEXT
-    )''')
-
-# Add new columns if they don't exist
-new_columns = [
-    ("email", "TEXT"),
-    ("fees_paid", "REAL DEFAULT 0"),
-    ("total_fees", "REAL DEFAULT 0")
-]
-
-for col_name, col_type in new_columns:
-    if not column_exists("Students", col_name):
-        cursor.execute(f"ALTER TABLE Students ADD COLUMN {col_name} {col_type}")
-
-conn.commit()
-
-cursor.execute(''' 
-    CREATE TABLE IF NOT EXISTS attendance (
-        roll_no TEXT,
-        name TEXT,
-        date TEXT,
-        status TEXT,
-        FOREIGN KEY(roll_no) REFERENCES students(roll_no)
-    )''')
-conn.commit()
+from types import SimpleNamespace
+
+import attendance_core as core
+from attendance_core import validate_email, validate_phone, validate_fees
+
+# Database Setup - one connection per thread, in WAL mode with busy handling.
+# Start with ATTENDANCE_PROFILE=1 to time every query (summary in the status bar)
+profiler = core.profiler_from_environment()
+db = core.ConnectionManager(core.DEFAULT_DB_PATH, profiler=profiler)
+conn = db.connection()
+
+# Writes run on a background thread so commits never block the UI
+writer = core.WriteQueue(db).start()
+reader = core.QueryWorker(db).start()
+
+# Email is queued in the database and sent from a background thread; see
+# email_settings.json (README: Email Configuration)
+try:
+    email_config = core.load_email_config()
+except (OSError, ValueError) as e:
+    print(f"Email disabled, could not read settings: {e}")
+    email_config = dict(core.DEFAULT_EMAIL_CONFIG)
+mail_sender = core.OutboxSender(db, email_config)
+if email_config["enabled"]:
+    mail_sender.start()
+
+# Scan feedback plays in the background; see ATTENDANCE_SOUND (README) to
+# choose or silence the backend
+sound = core.SoundPlayer()
 
 # Functions
-def play_sound(frequency=750, duration=300):
-    winsound.Beep(frequency, duration)
-
-def send_email_notification(to_email, subject, message):
-    # Email functionality is disabled by default
-    # To enable, configure these settings:
-    ENABLE_EMAIL = False
-    EMAIL_CONFIG = {
-        "sender_email": "your-email@gmail.com",
-        "password": "your-app-password",
-        "smtp_server": "smtp.gmail.com",
-        "smtp_port": 587
-    }
-    
-    if not ENABLE_EMAIL:
-        return False
-        
-    try:
-        import smtplib
-        from email.mime.text import MIMEText
-        from email.mime.multipart import MIMEMultipart
-        
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_CONFIG["sender_email"]
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        
-        msg.attach(MIMEText(message, 'plain'))
-        
-        server = smtplib.SMTP(EMAIL_CONFIG["smtp_server"], EMAIL_CONFIG["smtp_port"])
-        server.starttls()
-        server.login(EMAIL_CONFIG["sender_email"], EMAIL_CONFIG["password"])
-        server.send_message(msg)
-        server.quit()
-        return True
-    except Exception as e:
-        print(f"Failed to send email: {e}")
-        return False
+def play_sound(tone=core.SUCCESS):
+    sound.play(tone)
 
-def calculate_fees_status(roll_no):
-    cursor.execute("""
-        SELECT total_fees, fees_paid, course_end_date
-        FROM students
-        WHERE roll_no = ?
-    """, (roll_no,))
-    result = cursor.fetchone()
-    
-    if result:
-        total_fees, fees_paid, end_date = result
-        remaining = float(total_fees) - float(fees_paid)
-        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-        days_left = (end_date - datetime.now().date()).days
-        
-        return {
-            "total": total_fees,
-            "paid": fees_paid,
-            "remaining": remaining,
-            "days_left": days_left,
-            "status": "Completed" if remaining <= 0 else "Pending"
-        }
-    return None
-
-def show_fees_details():
-    # Get the current selection from the view_frame treeview
-    treeview = None
-    for child in view_frame.winfo_children():
-        if isinstance(child, ttk.Treeview):
-            treeview = child
-            break
-            
-    if not treeview or not treeview.selection():
-        messagebox.showwarning("Select Student", "Please select a student first!")
-        return
-        
-    selected_item = treeview.selection()[0]
-    roll_no = treeview.item(selected_item)["values"][0]
-    student_name = treeview.item(selected_item)["values"][1]
+def queue_email(to_email, subject, message, dedupe_key=None):
+    """Queue an email for the background sender. Returns False if email is off."""
+    if not email_config["enabled"] or not to_email:
+        return False
+    writer.submit(core.queue_email, to_email, subject, message, dedupe_key,
+                  on_done=lambda queued, error: mail_sender.wake())
+    return True
+
+def show_fees_details(roll_no=None):
+    # Default to the student selected in the student list
+    if roll_no is None:
+        selected = student_list.selected() if student_list else None
+        if not selected:
+            messagebox.showwarning("Select Student", "Please select a student first!")
+            return
+        roll_no = selected[0]
     
     # Get complete student details including email
-    cursor.execute("""
-        SELECT email, total_fees, fees_paid, course_end_date 
-        FROM students 
-        WHERE roll_no = ?
-    """, (roll_no,))
-    
-    student_data = cursor.fetchone()
+    student_data = core.get_student_fees(conn, roll_no)
     if not student_data:
         messagebox.showerror("Error", "Student not found in database!")
         return
         
-    email, total_fees, fees_paid, course_end_date = student_data
+    student_name, email, total_fees, fees_paid, course_end_date = student_data
     remaining = float(total_fees) - float(fees_paid)
-    days_left = (datetime.strptime(course_end_date, "%Y-%m-%d").date() - datetime.now().date()).days
+    days_left = (core.parse_iso_date(course_end_date) - datetime.now().date()).days
     status = "Completed" if remaining <= 0 else "Pending"
     
     # Create the fees window with better styling
@@ -298,36 +218,19 @@ def show_fees_details():
                 if amount > remaining:
                     raise ValueError(f"Amount cannot exceed remaining balance of ₹{remaining:,.2f}")
                 
-                payment_date = datetime.strptime(date_entry.entry.get(), "%d/%m/%Y").strftime("%Y-%m-%d")
+                payment_date = core.parse_form_date(date_entry.entry.get())
                 payment_method = method_var.get()
-                
-                # Update fees paid in students table
-                new_paid = float(fees_paid) + amount
-                cursor.execute("""
-                    UPDATE students
-                    SET fees_paid = ?
-                    WHERE roll_no = ?
-                """, (new_paid, roll_no))
-                
-                # Record payment in payments table (create if not exists)
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS payments (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        roll_no TEXT,
-                        amount REAL,
-                        payment_date TEXT,
-                        method TEXT,
-                        recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY(roll_no) REFERENCES students(roll_no)
-                    )
-                ''')
-                
-                cursor.execute('''
-                    INSERT INTO payments (roll_no, amount, payment_date, method)
-                    VALUES (?, ?, ?, ?)
-                ''', (roll_no, amount, payment_date, payment_method))
-                
-                conn.commit()
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            
+            def payment_recorded(result, error):
+                if error is not None:
+                    messagebox.showerror("Error", f"Failed to record payment: {error}")
+                    if record_btn.winfo_exists():
+                        record_btn.config(state='normal')
+                    return
+                live_stats.fees_changed(*result)
                 
                 # Send payment receipt
                 receipt_message = f"""
@@ -343,28 +246,33 @@ def show_fees_details():
                 Thank you for your payment!
                 """
                 
-                if send_email_notification(email, "Payment Receipt", receipt_message):
+                if queue_email(email, "Payment Receipt", receipt_message):
                     messagebox.showinfo("Success", 
                         f"Payment of ₹{amount:,.2f} recorded successfully!\n"
-                        f"Receipt has been sent to {email}.")
+                        f"A receipt will be emailed to {email}.")
                 else:
                     messagebox.showinfo("Success", 
-                        f"Payment of ₹{amount:,.2f} recorded successfully!\n"
-                        "(Email notification failed to send)")
+                        f"Payment of ₹{amount:,.2f} recorded successfully!")
                 
-                fees_window.destroy()
+                if fees_window.winfo_exists():
+                    fees_window.destroy()
                 view_students()  # Refresh the student list
-                
-            except ValueError as e:
-                messagebox.showerror("Error", str(e))
+            
+            # Disabled until the write completes so a payment can't be submitted twice
+            record_btn.config(state='disabled')
+            # The balance is re-checked inside the write transaction, so a
+            # payment taken at another desk since this window opened is caught
+            writer.submit(core.record_payment, roll_no, amount, payment_date, payment_method,
+                          on_done=payment_recorded)
         
         btn_frame = tb.Frame(payment_frame)
         btn_frame.pack(pady=(20, 5))
         
-        tb.Button(btn_frame, text="Record Payment", 
-                 command=process_payment,
-                 bootstyle="success",
-                 width=15).pack(side='left', padx=5)
+        record_btn = tb.Button(btn_frame, text="Record Payment", 
+                              command=process_payment,
+                              bootstyle="success",
+                              width=15)
+        record_btn.pack(side='left', padx=5)
         
         tb.Button(btn_frame, text="Print Receipt",
                  command=lambda: print_receipt(roll_no, student_name, email, 
@@ -375,15 +283,7 @@ def show_fees_details():
                  width=15).pack(side='left', padx=5)
     
     # Add payment history section
-    cursor.execute('''
-        SELECT payment_date, amount, method 
-        FROM payments 
-        WHERE roll_no = ? 
-        ORDER BY payment_date DESC 
-        LIMIT 5
-    ''', (roll_no,))
-    
-    payments = cursor.fetchall()
+    payments = core.payment_history(conn, roll_no, limit=5)
     
     if payments:
         history_frame = tb.LabelFrame(main_frame, text="Recent Payments", padding=15)
@@ -404,7 +304,7 @@ def show_fees_details():
             tree.insert("", "end", values=(
                 date,
                 f"₹{float(amount):,.2f}",
-                method
+                "Brought forward" if core.is_opening_balance(method) else method
             ))
         
         tree.pack(fill='x')
@@ -454,24 +354,17 @@ def print_receipt(roll_no, name, email, amount, date, method):
         
         # Option to email receipt
         if messagebox.askyesno("Email Receipt", "Would you like to email this receipt?"):
-            if send_email_notification(email, "Payment Receipt - Art Class", receipt):
-                messagebox.showinfo("Success", "Receipt has been sent to your email!")
+            if queue_email(email, "Payment Receipt - Art Class", receipt):
+                messagebox.showinfo("Success", f"The receipt will be emailed to {email}.")
             else:
-                messagebox.showwarning("Email Failed", "Failed to send email. Please check your email settings.")
+                messagebox.showwarning("Email Disabled", "Email is not set up. Please check your email settings.")
                 
     except ValueError as e:
         messagebox.showerror("Error", str(e))
 
 def show_payment_history(roll_no, student_name):
     """Show complete payment history for a student"""
-    cursor.execute('''
-        SELECT payment_date, amount, method 
-        FROM payments 
-        WHERE roll_no = ? 
-        ORDER BY payment_date DESC
-    ''', (roll_no,))
-    
-    payments = cursor.fetchall()
+    payments = core.payment_history(conn, roll_no)
     
     if not payments:
         messagebox.showinfo("No Payments", "No payment history found for this student.")
@@ -495,12 +388,8 @@ def show_payment_history(roll_no, student_name):
     summary_frame = tb.Frame(main_frame)
     summary_frame.pack(fill='x', pady=(0, 20))
     
-    # Calculate totals
-    total_paid = sum(p[1] for p in payments)
-    
-    # Get total fees from students table
-    cursor.execute('SELECT total_fees FROM students WHERE roll_no = ?', (roll_no,))
-    total_fees = cursor.fetchone()[0]
+    # fees_paid is the running total of the payments ledger
+    total_fees, total_paid = core.get_student_fees(conn, roll_no)[2:4]
     
     # Summary labels
     tb.Label(summary_frame, 
@@ -512,7 +401,7 @@ def show_payment_history(roll_no, student_name):
              font=("Helvetica", 12, "bold"),
              bootstyle="success").pack(side='left', padx=10)
     
-    remaining = float(total_fees) - total_paid
+    remaining = float(total_fees) - float(total_paid)
     remaining_style = "success" if remaining <= 0 else "danger" if remaining > 0 and any(p[0] < datetime.now().date().isoformat() for p in payments) else "warning"
     
     tb.Label(summary_frame, 
@@ -531,9 +420,18 @@ def show_payment_history(roll_no, student_name):
         tree.column(col, width=col_widths.get(col, 100), anchor='center')
     
     # Add data
+    today = datetime.now().date()
     for payment in payments:
-        payment_date = datetime.strptime(payment[0], "%Y-%m-%d").date()
-        days_since = (datetime.now().date() - payment_date).days
+        if core.is_opening_balance(payment[2]):
+            # Fees paid before payments were logged, not a payment on this date
+            tree.insert("", "end", values=(
+                payment[0],
+                f"₹{float(payment[1]):,.2f}",
+                "Opening balance",
+                "Brought forward"
+            ))
+            continue
+        days_since = (today - core.parse_iso_date(payment[0])).days
         
         tree.insert("", "end", values=(
             payment[0],
@@ -561,15 +459,7 @@ def show_payment_history(roll_no, student_name):
         )
         
         if filename:
-            try:
-                with open(filename, 'w', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(["Date", "Amount", "Payment Method"])
-                    for payment in payments:
-                        writer.writerow([payment[0], payment[1], payment[2]])
-                messagebox.showinfo("Success", f"Payment history exported to {filename}")
-            except Exception as e:
-                messagebox.showerror("Export Error", f"Failed to export: {str(e)}")
+            run_export("Exporting Payments", core.export_payments, filename, roll_no)
     
     btn_frame = tb.Frame(main_frame)
     btn_frame.pack(fill='x', pady=(10, 0))
@@ -605,7 +495,8 @@ def print_statement(roll_no, student_name, payments, total_fees):
     total_paid = 0
     for payment in payments:
         date, amount, method = payment
-        statement += f"{date:<15} {'Payment (' + method + ')':<25} {float(amount):>10,.2f}\n"
+        description = "Balance brought forward" if core.is_opening_balance(method) else f"Payment ({method})"
+        statement += f"{date:<15} {description:<25} {float(amount):>10,.2f}\n"
         total_paid += float(amount)
     
     statement += f"{'='*50}\n"
@@ -633,94 +524,182 @@ def print_statement(roll_no, student_name, payments, total_fees):
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save file: {str(e)}")
 
+def run_export(title, func, filename, *args, **kwargs):
+    """Run a core.export_* function in the background with a progress window"""
+    task = core.ExportTask(func, filename, *args, db=db, **kwargs).start()
+    
+    progress_window = tb.Toplevel(root)
+    progress_window.title(title)
+    progress_window.geometry("420x160")
+    progress_window.protocol("WM_DELETE_WINDOW", task.cancel)
+    
+    frame = tb.Frame(progress_window, padding=20)
+    frame.pack(fill='both', expand=True)
+    progress_label = tb.Label(frame, text="Starting...", font=("Helvetica", 11))
+    progress_label.pack(anchor='w')
+    progress_bar = tb.Progressbar(frame, maximum=100, bootstyle="info-striped")
+    progress_bar.pack(fill='x', pady=10)
+    tb.Button(frame, text="Cancel", command=task.cancel,
+              bootstyle="danger-outline").pack()
+    
+    def poll_export():
+        if task.total:
+            progress_bar['value'] = task.written / task.total * 100
+            progress_label.config(text=f"{task.written:,} of {task.total:,} rows")
+        else:
+            progress_label.config(text=f"{task.written:,} rows")
+        if not task.done:
+            progress_window.after(100, poll_export)
+            return
+        
+        progress_window.destroy()
+        if task.cancelled:
+            status_label.config(text="Export cancelled")
+        elif task.error is not None:
+            messagebox.showerror("Export Error", f"Failed to export: {task.error}")
+        else:
+            messagebox.showinfo("Success", f"Exported {task.written:,} rows to {filename}")
+            status_label.config(text=f"Exported {task.written:,} rows")
+    
+    poll_export()
+
 def export_to_csv(data, filename):
-    try:
-        with open(filename, 'w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerows(data)
-        return True
-    except Exception as e:
-        messagebox.showerror("Export Error", f"Failed to export data: {e}")
-        return False
+    """Export an in-memory table; the first row holds the headers"""
+    run_export("Exporting Report",
+               lambda conn, filename, **options: core.write_csv(
+                   filename, data[0], data[1:], total=len(data) - 1, **options),
+               filename)
 
 def generate_monthly_report():
-    month = datetime.now().month
-    year = datetime.now().year
+    today = datetime.now().date()
     
     report_window = tb.Toplevel(root)
-    report_window.title(f"Monthly Attendance Report - {calendar.month_name[month]} {year}")
+    report_window.title("Attendance Report")
     report_window.geometry("1000x700")
     
-    frame = ScrolledFrame(report_window)
+    frame = tb.Frame(report_window)
     frame.pack(fill='both', expand=True, padx=10, pady=10)
     
+    # Range picker: any two dates, or one of the common ranges
+    range_frame = tb.Frame(frame)
+    range_frame.pack(fill='x', pady=(0, 10))
+    
+    tb.Label(range_frame, text="From:").pack(side='left')
+    from_entry = tb.DateEntry(range_frame, bootstyle="primary", dateformat="%d/%m/%Y",
+                              startdate=today.replace(day=1))
+    from_entry.pack(side='left', padx=5)
+    tb.Label(range_frame, text="To:").pack(side='left', padx=(10, 0))
+    to_entry = tb.DateEntry(range_frame, bootstyle="primary", dateformat="%d/%m/%Y",
+                            startdate=today)
+    to_entry.pack(side='left', padx=5)
+    
+    def set_range(first, last):
+        for entry, value in ((from_entry, first), (to_entry, last)):
+            entry.entry.delete(0, tb.END)
+            entry.entry.insert(0, value.strftime("%d/%m/%Y"))
+        run_report()
+    
+    def months_back(count):
+        # First day of the month ``count`` months before this one
+        year, month = divmod(today.year * 12 + today.month - 1 - count, 12)
+        return today.replace(year=year, month=month + 1, day=1)
+    
+    presets = [
+        ("This Month", lambda: set_range(months_back(0), today)),
+        ("Last Month", lambda: set_range(months_back(1), months_back(0) - timedelta(days=1))),
+        ("Last 3 Months", lambda: set_range(months_back(2), today)),
+        ("This Year", lambda: set_range(today.replace(month=1, day=1), today)),
+    ]
+    for text, command in presets:
+        tb.Button(range_frame, text=text, command=command,
+                  bootstyle="secondary-outline").pack(side='left', padx=2)
+    
     # Create statistics view
-    stats_frame = tb.LabelFrame(frame, text="Monthly Statistics", padding=15)
-    stats_frame.pack(fill='x', pady=(0, 10))
-    
-    # Calculate statistics
-    cursor.execute("""
-        SELECT roll_no, COUNT(*) as present_days 
-        FROM attendance 
-        WHERE strftime('%Y-%m', date) = ? 
-        GROUP BY roll_no
-    """, (f"{year}-{month:02d}",))
-    
-    attendance_data = cursor.fetchall()
-    total_days = calendar.monthrange(year, month)[1]
-    
-    # Display statistics in a grid
-    headers = ["Roll No", "Student Name", "Present Days", "Attendance %"]
-    tree = ttk.Treeview(stats_frame, columns=headers, show='headings')
-    
-    for header in headers:
-        tree.heading(header, text=header)
-        tree.column(header, width=150)
-    
-    for roll_no, present_days in attendance_data:
-        cursor.execute("SELECT name FROM students WHERE roll_no = ?", (roll_no,))
-        name = cursor.fetchone()[0]
-        attendance_percent = (present_days / total_days) * 100
-        
-        tree.insert("", "end", values=(
-            roll_no,
-            name,
-            present_days,
-            f"{attendance_percent:.1f}%"
-        ))
+    stats_frame = tb.LabelFrame(frame, text="Attendance Statistics", padding=15)
+    stats_frame.pack(fill='both', expand=True, pady=(0, 10))
     
+    tree = ttk.Treeview(stats_frame, show='headings')
+    tree_scroll = ttk.Scrollbar(stats_frame, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=tree_scroll.set)
+    tree_scroll.pack(side='right', fill='y')
     tree.pack(fill='both', expand=True)
     
+    summary_label = tb.Label(frame, text="", font=("Helvetica", 10))
+    summary_label.pack(anchor='w')
+    
+    report = {"headers": [], "rows": [], "range": None}
+    
+    def show_report(result, error):
+        if not report_window.winfo_exists():
+            return
+        if error:
+            messagebox.showerror("Error", f"Failed to build report: {error}", parent=report_window)
+            return
+        months, rows = result
+        month_headers = [calendar.month_abbr[int(m[5:])] + " " + m[:4] for m in months]
+        # A per-month breakdown only helps when the range spans several months
+        if len(months) == 1:
+            month_headers = []
+        headers = ["Roll No", "Student Name"] + month_headers + ["Present Days", "Attendance %"]
+        
+        tree.delete(*tree.get_children())
+        tree.configure(columns=headers)
+        for header in headers:
+            tree.heading(header, text=header)
+            tree.column(header, width=150 if header in ("Roll No", "Student Name") else 90)
+        
+        table = []
+        for roll_no, name, counts, present_days, attendance_percent in rows:
+            values = [roll_no, name] + (list(counts) if month_headers else []) + [
+                present_days, f"{attendance_percent:.1f}%"]
+            table.append(values)
+            tree.insert("", "end", values=[str(value) for value in values])
+        
+        report["headers"], report["rows"] = headers, table
+        summary_label.config(text=f"{len(rows)} students")
+    
+    def run_report():
+        try:
+            start = core.parse_form_date(from_entry.entry.get())
+            end = core.parse_form_date(to_entry.entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "Invalid date format! Use DD/MM/YYYY",
+                                 parent=report_window)
+            return
+        if start > end:
+            messagebox.showerror("Error", "The start date must be before the end date",
+                                 parent=report_window)
+            return
+        report["range"] = (start, end)
+        report_window.title(f"Attendance Report - {start} to {end}")
+        summary_label.config(text="Loading...")
+        reader.submit(core.attendance_report, start, end,
+                      key="attendance-report", on_done=show_report)
+    
+    tb.Button(range_frame, text="Show", command=run_report,
+              bootstyle="primary").pack(side='left', padx=(10, 0))
+    
     # Export button
     def export_report():
+        if not report["range"]:
+            return
+        start, end = report["range"]
         filename = filedialog.asksaveasfilename(
             defaultextension=".csv",
             filetypes=[("CSV files", "*.csv")],
-            initialfile=f"attendance_report_{year}_{month}.csv"
+            initialfile=f"attendance_report_{start}_{end}.csv"
         )
         if filename:
-            data = [headers]  # Add headers first
-            for item in tree.get_children():
-                data.append(tree.item(item)['values'])
-            if export_to_csv(data, filename):
-                messagebox.showinfo("Success", "Report exported successfully!")
+            export_to_csv([report["headers"]] + report["rows"], filename)
     
     tb.Button(frame, text="Export to CSV", 
               command=export_report,
               bootstyle="info-outline").pack(pady=10)
+    
+    run_report()
 
 def show_student_profile(roll_no):
-    cursor.execute("""
-        SELECT s.*, 
-               COUNT(a.date) as total_present,
-               (SELECT COUNT(DISTINCT date) FROM attendance) as total_days
-        FROM students s
-        LEFT JOIN attendance a ON s.roll_no = a.roll_no
-        WHERE s.roll_no = ?
-        GROUP BY s.roll_no
-    """, (roll_no,))
-    
-    student = cursor.fetchone()
+    student = core.student_profile(conn, roll_no)
     if not student:
         messagebox.showerror("Error", "Student not found!")
         return
@@ -746,9 +725,9 @@ def show_student_profile(roll_no):
         ("Roll Number:", student[0]),
         ("Name:", student[1]),
         ("Phone:", student[2]),
-        ("Date of Birth:", datetime.strptime(student[3], "%Y-%m-%d").strftime("%d %B %Y")),
+        ("Date of Birth:", core.parse_iso_date(student[3]).strftime("%d %B %Y")),
         ("Course Duration:", f"{student[4]} to {student[5]}"),
-        ("Attendance Rate:", f"{(student[6]/student[7]*100 if student[7] else 0):.1f}%")
+        ("Attendance Rate:", f"{(student[-2]/student[-1]*100 if student[-1] else 0):.1f}%")
     ]
     
     for label, value in details:
@@ -765,28 +744,11 @@ def show_student_profile(roll_no):
     tree.heading("Date", text="Date")
     tree.heading("Status", text="Status")
     
-    cursor.execute("""
-        SELECT date, status 
-        FROM attendance 
-        WHERE roll_no = ? 
-        ORDER BY date DESC 
-        LIMIT 10
-    """, (roll_no,))
-    
-    for date, status in cursor.fetchall():
+    for date, status in core.student_attendance_history(conn, roll_no, limit=10):
         tree.insert("", 0, values=(date, status))
     
     tree.pack(fill='both', expand=True)
 
-def search_students(search_term):
-    cursor.execute("""
-        SELECT * FROM students 
-        WHERE roll_no LIKE ? OR name LIKE ? OR phone LIKE ?
-    """, (f"%{search_term}%", f"%{search_term}%", f"%{search_term}%"))
-    
-    rows = cursor.fetchall()
-    return rows
-
 def create_custom_style():
     style = ttk.Style()
     
@@ -849,55 +811,44 @@ def create_custom_style():
                    font=("Helvetica", 11))
 
 def mark_attendance():
-    roll_no = entry_roll.get().strip()
-    date = datetime.now().strftime("%Y-%m-%d")
+    roll_no = students_ui.roll_entry.get().strip()
 
     if not roll_no:
         messagebox.showwarning("Input Error", "Please enter Roll Number.")
         return
 
-    cursor.execute('SELECT * FROM attendance WHERE roll_no = ? AND date = ?', (roll_no, date))
-    if cursor.fetchone():
-        messagebox.showinfo("Already Marked", "Attendance already marked for today!")
-        return
-
-    cursor.execute('SELECT course_end_date, name FROM students WHERE roll_no = ?', (roll_no,))
-    result = cursor.fetchone()
-
-    if result:
-        course_end_date = datetime.strptime(result[0], "%Y-%m-%d")
-        today = datetime.now()
+    # Clear straight away so the next roll number can be typed while this one is saved
+    students_ui.roll_entry.delete(0, tb.END)
+    students_ui.roll_entry.focus_set()
+    writer.submit(core.mark_attendance, roll_no, on_done=quick_attendance_marked)
 
-        if today.date() > course_end_date.date():
-            messagebox.showerror("Course Ended", "Your course has ended!")
-            play_sound(frequency=1000, duration=500)
-        else:
-            try:
-                cursor.execute('INSERT INTO attendance (roll_no, name, date, status) VALUES (?, ?, ?, ?)',
-                               (roll_no, result[1], date, "Present"))
-                conn.commit()
-                messagebox.showinfo("Success", f"Attendance marked for Roll No {roll_no}")
-                play_sound()
-                entry_roll.delete(0, tb.END)
-                entry_roll.focus_set()
-                view_today_attendance()  # Refresh attendance view
-            except Exception as e:
-                messagebox.showerror("Database Error", f"Failed to mark attendance: {e}")
+def quick_attendance_marked(result, error):
+    if error is not None:
+        messagebox.showerror("Database Error", f"Failed to mark attendance: {error}")
+    elif result.status == core.ALREADY_MARKED:
+        messagebox.showinfo("Already Marked", "Attendance already marked for today!")
+    elif result.status == core.COURSE_ENDED:
+        play_sound(core.ERROR)
+        messagebox.showerror("Course Ended", "Your course has ended!")
+    elif result.status == core.MARKED:
+        live_stats.attendance_marked(core.today_iso())
+        play_sound()
+        messagebox.showinfo("Success", f"Attendance marked for Roll No {result.roll_no}")
+        view_today_attendance()  # Refresh attendance view
     else:
         messagebox.showwarning("Error", "Student not found!")
-        entry_roll.delete(0, tb.END)
-        entry_roll.focus_set()
 
 def add_student():
-    roll_no = entry_roll_add.get().strip()
-    name = entry_name.get().strip()
-    phone = entry_phone.get().strip()
-    email = entry_email.get().strip()
-    dob = entry_dob.get().strip()
-    course_start_date = entry_start.get().strip()
-    course_end_date = entry_end.get().strip()
-    total_fees = entry_fees.get().strip() or "0"
-    fees_paid = entry_fees_paid.get().strip() or "0"
+    fields = students_ui.fields
+    roll_no = fields["roll_no"].get().strip()
+    name = fields["name"].get().strip()
+    phone = fields["phone"].get().strip()
+    email = fields["email"].get().strip()
+    dob = fields["dob"].get().strip()
+    course_start_date = fields["start"].get().strip()
+    course_end_date = fields["end"].get().strip()
+    total_fees = fields["fees"].get().strip() or "0"
+    fees_paid = fields["fees_paid"].get().strip() or "0"
 
     # Validate required fields
     if not all([roll_no, name, phone, email, dob, course_start_date, course_end_date]):
@@ -920,20 +871,21 @@ def add_student():
         return
 
     try:
-        dob = datetime.strptime(dob, "%d/%m/%Y").strftime("%Y-%m-%d")
-        course_start_date = datetime.strptime(course_start_date, "%d/%m/%Y").strftime("%Y-%m-%d")
-        course_end_date = datetime.strptime(course_end_date, "%d/%m/%Y").strftime("%Y-%m-%d")
+        dob = core.parse_form_date(dob)
+        course_start_date = core.parse_form_date(course_start_date)
+        course_end_date = core.parse_form_date(course_end_date)
     except ValueError:
         messagebox.showerror("Date Error", "Dates must be in DD/MM/YYYY format.")
         return
 
-    try:
-        cursor.execute('''
-            INSERT INTO students 
-            (roll_no, name, phone, email, dob, course_start_date, course_end_date, total_fees, fees_paid)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (roll_no, name, phone, email, dob, course_start_date, course_end_date, total_fees, fees_paid))
-        conn.commit()
+    def student_added(result, error):
+        if isinstance(error, sqlite3.IntegrityError):
+            messagebox.showerror("Error", "Roll Number already exists!")
+            return
+        if error is not None:
+            messagebox.showerror("Error", f"Failed to add student: {error}")
+            return
+        live_stats.student_added(course_end_date, total_fees, fees_paid)
         
         # Send welcome email
         email_message = f"""
@@ -952,26 +904,107 @@ def add_student():
         Thank you for joining us!
         """
         
-        if send_email_notification(email, "Welcome to Art Class", email_message):
-            messagebox.showinfo("Success", "Student added successfully and welcome email sent!")
+        if queue_email(email, "Welcome to Art Class", email_message, dedupe_key=f"welcome:{roll_no}"):
+            messagebox.showinfo("Success", "Student added successfully and welcome email queued!")
         else:
-            messagebox.showinfo("Success", "Student added successfully (email notification failed)")
+            messagebox.showinfo("Success", "Student added successfully!")
             
         clear_entries()
-        entry_roll_add.focus_set()
+        students_ui.fields["roll_no"].focus_set()
         view_students()  # Refresh student list
-    except sqlite3.IntegrityError:
-        messagebox.showerror("Error", "Roll Number already exists!")
-
-def update_student_view(rows):
-    for widget in view_frame.winfo_children():
-        widget.destroy()
-
-    columns = ("Roll No", "Name", "Phone", "DOB", "Course Start Date", "Course End Date", "Status")
-    tree = ttk.Treeview(view_frame, columns=columns, show='headings', style="Treeview")
     
-    # Configure columns
-    column_widths = {
+    writer.submit(core.add_student, roll_no, name, phone, email, dob,
+                  course_start_date, course_end_date, total_fees, fees_paid,
+                  on_done=student_added)
+
+def student_status(course_end_day, today):
+    """Return the (status text, tag) shown for a course end day number"""
+    if course_end_day is None:
+        return "Active", "active"
+    days_left = course_end_day - today
+    
+    if days_left < 0:
+        return "Expired", "expired"
+    elif days_left <= core.EXPIRY_WARNING_DAYS:
+        return f"{days_left}d left", "warning"
+    return "Active", "active"
+
+# Status filter choices for the student list
+STUDENT_FILTERS = {
+    "All Students": None,
+    "Expired": "expired",
+    f"Expiring (≤{core.EXPIRY_WARNING_DAYS} days)": "warning",
+    "Active": "active",
+}
+
+class StudentQuery:
+    """Student list source that sorts, filters and pages in SQL"""
+    ranked = False
+    
+    def __init__(self, status=None):
+        self.status = status
+    
+    def count(self):
+        return core.count_students(conn, status=self.status)
+    
+    def page(self, limit, sort, descending, offset=0, after=None, before=None, from_end=False):
+        return core.student_page(conn, offset, limit, sort=sort, descending=descending,
+                                 status=self.status, after=after, before=before,
+                                 from_end=from_end)
+
+class StudentRows:
+    """Student list source over an in-memory list of rows, e.g. search results
+    
+    ``ranked`` rows are already in order of relevance, which is kept until
+    a column heading is clicked.
+    """
+    
+    def __init__(self, rows, status=None, ranked=False):
+        today = core.today_day()
+        self.rows = [row for row in rows
+                     if status is None or student_status(row[6], today)[1] == status]
+        self.ranked = ranked
+        self._ordered = {}
+    
+    def count(self):
+        return len(self.rows)
+    
+    def page(self, limit, sort, descending, offset=0, **seek):
+        # Rows are few enough here that the offset is all we need
+        if sort is None:
+            return self.rows[offset:offset + limit]
+        key = (sort, descending)
+        if key not in self._ordered:
+            index = core.STUDENT_SORT_COLUMNS.index(sort)
+            self._ordered[key] = sorted(
+                self.rows, key=lambda row: (self._sort_value(sort, row[index]), row[0]),
+                reverse=descending)
+        return self._ordered[key][offset:offset + limit]
+    
+    @staticmethod
+    def _sort_value(sort, value):
+        # Same ordering as core.STUDENT_SORTS
+        value = str(value or "")
+        if sort == "roll_no":
+            digits = len(value) - len(value.lstrip("0123456789"))
+            return int(value[:digits]) if digits else 0
+        if sort == "name":
+            return value.lower()
+        return value
+
+class VirtualStudentList(tb.Frame):
+    """Student table that only holds the rows currently on screen.
+    
+    Rows are fetched a window at a time from a source as the user scrolls,
+    so the widget costs the same with 50 students or 50,000. Sorting and
+    filtering happen in the source; scrolling a few rows at a time asks it
+    for the rows just past the edge of the window by sort key, and only
+    jumps (dragging the scrollbar) fall back to an offset. The Treeview
+    items are reused between windows; the scrollbar is driven from the
+    source's row count rather than from the Treeview itself.
+    """
+    COLUMNS = ("Roll No", "Name", "Phone", "DOB", "Course Start Date", "Course End Date", "Status")
+    COLUMN_WIDTHS = {
         "Roll No": 100,
         "Name": 200,
         "Phone": 120,
@@ -980,71 +1013,225 @@ def update_student_view(rows):
         "Course End Date": 120,
         "Status": 100
     }
-    
-    for col in columns:
-        tree.heading(col, text=col, command=lambda c=col: sort_treeview(tree, c, False))
-        tree.column(col, width=column_widths[col])
-
-    # Add scrollbars
-    y_scrollbar = ttk.Scrollbar(view_frame, orient="vertical", command=tree.yview)
-    x_scrollbar = ttk.Scrollbar(view_frame, orient="horizontal", command=tree.xview)
-    tree.configure(yscrollcommand=y_scrollbar.set, xscrollcommand=x_scrollbar.set)
-    
-    # Grid layout
-    tree.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
-    y_scrollbar.grid(row=0, column=1, sticky="ns")
-    x_scrollbar.grid(row=1, column=0, sticky="ew")
-    
-    view_frame.grid_columnconfigure(0, weight=1)
-    view_frame.grid_rowconfigure(0, weight=1)
-    
-    # Populate data with status
-    today = datetime.now().date()
-    for row in rows:
-        course_end = datetime.strptime(row[5], "%Y-%m-%d").date()
-        days_left = (course_end - today).days
+    SORT_KEYS = {
+        "Roll No": "roll_no",
+        "Name": "name",
+        "Phone": "phone",
+        "DOB": "dob",
+        "Course Start Date": "course_start_date",
+        "Course End Date": "course_end_date",
+        "Status": "course_end_date"
+    }
+    ROW_HEIGHT = 30  # Matches the Treeview rowheight in create_custom_style
+    HEADER_HEIGHT = 32
+    
+    def __init__(self, parent, on_open=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.on_open = on_open
+        self.total = 0
+        self.offset = 0
+        self.visible_rows = 20
+        self.sort = "roll_no"
+        self.descending = False
+        self._source = StudentRows([])
+        self._window = []  # Rows currently shown, in order
+        self._rows = {}  # item id -> row currently shown in it
+        self._selected_roll = None
         
-        if days_left < 0:
-            status = "Expired"
-            tags = ("expired",)
-        elif days_left <= 7:
-            status = f"{days_left}d left"
-            tags = ("warning",)
-        else:
-            status = "Active"
-            tags = ("active",)
+        self.tree = ttk.Treeview(self, columns=self.COLUMNS, show='headings',
+                                 style="Treeview", selectmode='browse')
+        for col in self.COLUMNS:
+            self.tree.heading(col, text=col, command=lambda c=col: self.sort_by(c))
+            self.tree.column(col, width=self.COLUMN_WIDTHS[col])
         
-        values = list(row) + [status]
-        tree.insert("", tb.END, values=values, tags=tags)
-    
-    # Configure tags
-    tree.tag_configure("expired", foreground="#ff4444")
-    tree.tag_configure("warning", foreground="#ffbb33")
-    tree.tag_configure("active", foreground="#00C851")
-    
-    # Bind double-click event
-    tree.bind("<Double-1>", lambda e: show_student_profile(
-        tree.item(tree.selection()[0])["values"][0] if tree.selection() else None
-    ))
-    
-    view_frame.pack(expand=True, fill='both', pady=10, padx=10)
-
-def sort_treeview(tree, col, reverse):
-    """Sort treeview by column."""
-    l = [(tree.set(k, col), k) for k in tree.get_children("")]
-    l.sort(reverse=reverse)
+        self.tree.tag_configure("expired", foreground="#ff4444")
+        self.tree.tag_configure("warning", foreground="#ffbb33")
+        self.tree.tag_configure("active", foreground="#00C851")
+        
+        # Add scrollbars
+        self.y_scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        x_scrollbar = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=x_scrollbar.set)
+        
+        # Grid layout
+        self.tree.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+        self.y_scrollbar.grid(row=0, column=1, sticky="ns")
+        x_scrollbar.grid(row=1, column=0, sticky="ew")
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3) or "break")
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3) or "break")
+        self.tree.bind("<Up>", lambda e: self._on_arrow(-1))
+        self.tree.bind("<Down>", lambda e: self._on_arrow(1))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.visible_rows) or "break")
+        self.tree.bind("<Next>", lambda e: self.scroll(self.visible_rows) or "break")
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<Double-1>", self._on_double_click)
+    
+    def show_source(self, source):
+        """Show rows from a ``StudentQuery`` or ``StudentRows``"""
+        self._source = source
+        if source.ranked:
+            self.sort, self.descending = None, False
+        elif self.sort is None:
+            self.sort = "roll_no"
+        self.offset = 0
+        self.refresh()
+    
+    def refresh(self):
+        self.total = self._source.count()
+        self._render()
+    
+    def sort_by(self, col):
+        sort = self.SORT_KEYS[col]
+        # Clicking the same column again reverses the order
+        self.descending = not self.descending if sort == self.sort else False
+        self.sort = sort
+        self.offset = 0
+        self._render()
+    
+    def scroll(self, rows):
+        self.scroll_to(self.offset + rows)
+    
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), self.total - self.visible_rows))
+        delta = offset - self.offset
+        window = self._window
+        if delta == 0:
+            return
+        if len(window) == self.visible_rows and 0 < delta < len(window):
+            # Keep the rows still on screen and seek past the last one
+            last = window[-1]
+            rows = window[delta:] + self._page(
+                delta, offset=self.offset + len(window), after=(last[-1], last[0]))
+        elif len(window) == self.visible_rows and 0 < -delta < len(window):
+            first = window[0]
+            rows = self._page(-delta, offset=offset, before=(first[-1], first[0])) + window[:delta]
+        else:
+            self.offset = offset
+            self._render()
+            return
+        self.offset = offset
+        self._draw(rows)
+    
+    def selected(self):
+        """Return the selected row, or None"""
+        selection = self.tree.selection()
+        return self._rows.get(selection[0]) if selection else None
+    
+    def _page(self, limit, **position):
+        return self._source.page(limit, self.sort, self.descending, **position)
+    
+    def _render(self):
+        """Reload the whole window at the current offset"""
+        self.offset = max(0, min(self.offset, self.total - self.visible_rows))
+        if self.offset and self.offset + self.visible_rows >= self.total:
+            # The last page is as cheap to find as the first
+            rows = self._page(self.visible_rows, offset=self.offset, from_end=True)
+        else:
+            rows = self._page(self.visible_rows, offset=self.offset)
+        self._draw(rows)
     
-    # Rearrange items in sorted positions
-    for index, (val, k) in enumerate(l):
-        tree.move(k, "", index)
+    def _draw(self, rows):
+        self._window = rows
+        
+        # Reuse the existing items rather than deleting and re-creating them
+        items = list(self.tree.get_children())
+        while len(items) < len(rows):
+            items.append(self.tree.insert("", tb.END))
+        for item in items[len(rows):]:
+            self.tree.delete(item)
+        
+        today = core.today_day()
+        self._rows = {}
+        reselect = None
+        for item, row in zip(items, rows):
+            status, tag = student_status(row[6], today)
+            self.tree.item(item, values=list(row[:6]) + [status], tags=(tag,))
+            self._rows[item] = row
+            if row[0] == self._selected_roll:
+                reselect = item
+        
+        if reselect:
+            self.tree.selection_set(reselect)
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+        
+        if self.total:
+            self.y_scrollbar.set(self.offset / self.total,
+                                 (self.offset + len(rows)) / self.total)
+        else:
+            self.y_scrollbar.set(0, 1)
     
-    # Reverse sort next time
-    tree.heading(col, command=lambda: sort_treeview(tree, col, not reverse))
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * self.total)
+        elif unit == "pages":
+            self.scroll(int(amount) * self.visible_rows)
+        else:
+            self.scroll(int(amount))
+    
+    def _on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return "break"
+    
+    def _on_arrow(self, step):
+        items = self.tree.get_children()
+        selection = self.tree.selection()
+        if not items or not selection:
+            return None
+        edge = items[0] if step < 0 else items[-1]
+        if selection[0] != edge:
+            return None  # Let the Treeview move the selection normally
+        self.scroll(step)
+        self.tree.selection_set(items[0] if step < 0 else items[-1])
+        self.tree.focus(self.tree.selection()[0])
+        return "break"
+    
+    def _on_select(self, event):
+        row = self.selected()
+        if row:
+            self._selected_roll = row[0]
+    
+    def _on_resize(self, event):
+        rows = max(1, (event.height - self.HEADER_HEIGHT) // self.ROW_HEIGHT)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self._render()
+    
+    def _on_double_click(self, event):
+        row = self.selected()
+        if row and self.on_open:
+            self.on_open(row[0])
+
+student_list = None
+
+def get_student_list():
+    """Create the student list the first time it is shown"""
+    global student_list
+    if student_list is None:
+        student_list = VirtualStudentList(students_ui.view_frame, on_open=show_student_profile)
+        student_list.pack(fill='both', expand=True)
+    students_ui.view_frame.pack(expand=True, fill='both', pady=10, padx=10)
+    return student_list
+
+def selected_status_filter():
+    return STUDENT_FILTERS[students_ui.status_filter_var.get()]
+
+def update_student_view(rows, ranked=False):
+    if students_ui is None:
+        return
+    get_student_list().show_source(
+        StudentRows(rows, status=selected_status_filter(), ranked=ranked))
 
 def view_students():
-    cursor.execute("SELECT * FROM students")
-    rows = cursor.fetchall()
-    update_student_view(rows)
+    # Building the students tab shows the list; until then there is nothing to refresh
+    if students_ui is None:
+        return
+    get_student_list().show_source(StudentQuery(status=selected_status_filter()))
 
 def view_today_attendance():
     today = datetime.now().strftime("%Y-%m-%d")
@@ -1063,14 +1250,10 @@ def view_today_attendance():
 
     tree.pack(fill='both', expand=True, padx=5, pady=5)
 
-    cursor.execute("SELECT roll_no, name, date, status FROM attendance WHERE date = ?", (today,))
-    rows = cursor.fetchall()
-    for row in rows:
+    for row in core.attendance_for_date(conn, today):
         tree.insert("", tb.END, values=row)
 
 def view_expiring_courses():
-    today = datetime.now().date()
-
     expiring_window = tb.Toplevel(root)
     expiring_window.title("Expiring Courses")
     expiring_window.geometry("800x600")
@@ -1083,29 +1266,18 @@ def view_expiring_courses():
         tree.heading(col, text=col)
         tree.column(col, width=150)
 
-    cursor.execute("SELECT roll_no, name, course_end_date FROM students")
-    rows = cursor.fetchall()
-    for row in rows:
-        course_end_date = datetime.strptime(row[2], "%Y-%m-%d").date()
-        days_left = (course_end_date - today).days
-        if 0 <= days_left <= 7:  # Show courses expiring within a week
-            status_color = "red" if days_left <= 3 else "orange"
-            tree.insert("", tb.END, values=(row[0], row[1], row[2], f"{days_left} days"), tags=(status_color,))
-            tree.tag_configure("red", foreground="#ff4444")
-            tree.tag_configure("orange", foreground="#ffbb33")
+    # Courses ending within core.EXPIRY_WARNING_DAYS, soonest first
+    for roll_no, name, end_date, days_left in core.expiring_courses(conn):
+        status_color = "red" if days_left <= core.EXPIRY_URGENT_DAYS else "orange"
+        tree.insert("", tb.END, values=(roll_no, name, end_date, f"{days_left} days"), tags=(status_color,))
+    tree.tag_configure("red", foreground="#ff4444")
+    tree.tag_configure("orange", foreground="#ffbb33")
 
     tree.pack(fill='both', expand=True, padx=5, pady=5)
 
 def clear_entries():
-    entry_roll_add.delete(0, tb.END)
-    entry_name.delete(0, tb.END)
-    entry_phone.delete(0, tb.END)
-    entry_email.delete(0, tb.END)
-    entry_fees.delete(0, tb.END)
-    entry_fees_paid.delete(0, tb.END)
-    entry_dob.delete(0, tb.END)
-    entry_start.delete(0, tb.END)
-    entry_end.delete(0, tb.END)
+    for entry in students_ui.fields.values():
+        entry.delete(0, tb.END)
 
 # GUI Setup
 root = tb.Window(themename="darkly")
@@ -1124,6 +1296,73 @@ status_label.pack(side='left', padx=10, pady=5)
 time_label = tb.Label(status_bar, text="", font=("Helvetica", 9))
 time_label.pack(side='right', padx=10, pady=5)
 
+def show_query_profile():
+    """Show the statements that have taken the most time, by caller"""
+    window = tb.Toplevel(root)
+    window.title("Query Profile")
+    window.geometry("1100x600")
+    
+    summary_label = tb.Label(window, text="", font=("Helvetica", 10))
+    summary_label.pack(anchor='w', padx=10, pady=(10, 0))
+    histogram_label = tb.Label(window, text="", font=("Courier", 9))
+    histogram_label.pack(anchor='w', padx=10, pady=(0, 10))
+    
+    columns = ("Calls", "Total ms", "Max ms", "Rows", "Caller", "Statement")
+    tree = ttk.Treeview(window, columns=columns, show='headings', height=20)
+    for col, width in zip(columns, (60, 90, 90, 80, 260, 520)):
+        tree.heading(col, text=col)
+        tree.column(col, width=width, anchor='w' if col in ("Caller", "Statement") else 'e')
+    tree.pack(fill='both', expand=True, padx=10)
+    
+    def refresh():
+        summary_label.config(text=f"{profiler.summary()} · slow queries are logged to "
+                                  f"{profiler.log_path} (≥ {profiler.slow_ms:g} ms)")
+        histogram_label.config(text="  ".join(
+            f"≤{bound}ms: {count}" if bound else f">{core.profiling.HISTOGRAM_BOUNDS_MS[-1]}ms: {count}"
+            for bound, count in profiler.histogram()))
+        tree.delete(*tree.get_children())
+        for stats in profiler.top(50):
+            tree.insert("", "end", values=(stats.count, f"{stats.total_ms:,.1f}",
+                                           f"{stats.max_ms:,.1f}", stats.rows, stats.tag,
+                                           stats.sql[:200]))
+    
+    def reset():
+        profiler.reset()
+        refresh()
+    
+    btn_frame = tb.Frame(window)
+    btn_frame.pack(pady=10)
+    tb.Button(btn_frame, text="Refresh", command=refresh, bootstyle="info").pack(side='left', padx=5)
+    tb.Button(btn_frame, text="Reset", command=reset, bootstyle="secondary").pack(side='left', padx=5)
+    refresh()
+
+if profiler is not None:
+    profile_label = tb.Label(status_bar, text="", font=("Helvetica", 9), cursor="hand2")
+    profile_label.pack(side='left', padx=10, pady=5)
+    profile_label.bind("<Button-1>", lambda e: show_query_profile())
+    
+    def update_profile_status():
+        profile_label.config(text=f"⏱ {profiler.summary()}")
+        root.after(2000, update_profile_status)
+    
+    update_profile_status()
+
+mail_label = tb.Label(status_bar, text="", font=("Helvetica", 9))
+mail_label.pack(side='right', padx=10, pady=5)
+
+def update_mail_status():
+    # The sender refreshes its counts after every pass over the outbox
+    counts = mail_sender.counts
+    text = (f"✉ {counts['sent']} sent · {counts['pending'] + counts['sending']} queued"
+            f" · {counts['failed']} failed")
+    if mail_sender.last_error:
+        text += f" · last error: {mail_sender.last_error[:60]}"
+    mail_label.config(text=text)
+    root.after(5000, update_mail_status)
+
+if email_config["enabled"]:
+    update_mail_status()
+
 def update_time():
     current_time = datetime.now().strftime("%d %B %Y, %I:%M:%S %p")
     time_label.config(text=current_time)
@@ -1131,6 +1370,14 @@ def update_time():
 
 update_time()
 
+def poll_write_queue():
+    # Deliver finished background writes and reads to their callbacks on the Tk thread
+    writer.process_completions()
+    reader.process_completions()
+    root.after(50, poll_write_queue)
+
+poll_write_queue()
+
 # Create notebook for tabbed interface
 notebook = tb.Notebook(root, bootstyle="primary")
 notebook.pack(fill='both', expand=True, padx=10, pady=10)
@@ -1155,6 +1402,36 @@ notebook.add(reports_tab, text="📈 Reports")
 fees_tab = tb.Frame(notebook)
 notebook.add(fees_tab, text="💰 Fees")
 
+# Only the dashboard is built at start-up; every other tab builds its
+# widgets and loads its data the first time it is shown. A built tab's
+# widgets that other code needs are kept on its namespace, which is None
+# until then.
+tab_builders = {}
+built_tabs = set()
+students_ui = None
+attendance_ui = None
+fees_ui = None
+
+def lazy_tab(tab):
+    """Register the decorated function to build ``tab`` when it is first shown"""
+    def register(build):
+        tab_builders[str(tab)] = build
+        return build
+    return register
+
+def ensure_tab(tab):
+    name = str(tab)
+    if name not in built_tabs and name in tab_builders:
+        built_tabs.add(name)
+        tab_builders[name]()
+
+def show_tab(tab):
+    # Build first, so callers can use the tab's widgets straight away
+    ensure_tab(tab)
+    notebook.select(tab)
+
+notebook.bind("<<NotebookTabChanged>>", lambda e: ensure_tab(notebook.select()))
+
 # ==================== DASHBOARD TAB ====================
 dashboard_container = tb.Frame(dashboard_tab)
 dashboard_container.pack(fill='both', expand=True, padx=20, pady=20)
@@ -1179,33 +1456,34 @@ def create_stat_card(parent, title, value, icon, color):
     
     tb.Label(inner, text=icon, font=("Helvetica", 36), 
              bootstyle=f"{color}").pack()
-    tb.Label(inner, text=str(value), font=("Helvetica", 32, "bold"),
-             bootstyle=f"{color}").pack()
+    value_label = tb.Label(inner, text=str(value), font=("Helvetica", 32, "bold"),
+                           bootstyle=f"{color}")
+    value_label.pack()
     tb.Label(inner, text=title, font=("Helvetica", 12),
              bootstyle=f"{color}").pack()
     
-    return card
-
-# Get statistics
-cursor.execute("SELECT COUNT(*) FROM students")
-total_students = cursor.fetchone()[0]
+    return value_label
 
-cursor.execute("SELECT COUNT(DISTINCT roll_no) FROM attendance WHERE date = ?", 
-               (datetime.now().strftime("%Y-%m-%d"),))
-today_attendance = cursor.fetchone()[0]
+# Live statistics, updated as writes complete rather than re-queried.
+# They start empty and are filled in the background once the window is up.
+live_stats = core.LiveStats()
 
-cursor.execute("SELECT COUNT(*) FROM students WHERE course_end_date >= ?",
-               (datetime.now().strftime("%Y-%m-%d"),))
-active_courses = cursor.fetchone()[0]
+students_card = create_stat_card(stats_frame, "Total Students", 0, "👥", "info")
+attendance_card = create_stat_card(stats_frame, "Today's Attendance", 0, "✓", "success")
+courses_card = create_stat_card(stats_frame, "Active Courses", 0, "📚", "primary")
+pending_card = create_stat_card(stats_frame, "Pending Fees (₹)", 0, "💰", "warning")
 
-cursor.execute("SELECT SUM(total_fees - fees_paid) FROM students")
-pending_fees = cursor.fetchone()[0] or 0
+def update_dashboard_cards(stats):
+    if not stats.loaded:
+        for card in (students_card, attendance_card, courses_card, pending_card):
+            card.config(text="…")
+        return
+    students_card.config(text=str(stats.total_students))
+    attendance_card.config(text=str(stats.today_attendance))
+    courses_card.config(text=str(stats.active_courses))
+    pending_card.config(text=f"{stats.outstanding:,.0f}")
 
-create_stat_card(stats_frame, "Total Students", total_students, "👥", "info")
-create_stat_card(stats_frame, "Today's Attendance", today_attendance, "✓", "success")
-create_stat_card(stats_frame, "Active Courses", active_courses, "📚", "primary")
-create_stat_card(stats_frame, f"Pending Fees (₹{pending_fees:,.0f})", 
-                f"{pending_fees:,.0f}", "💰", "warning")
+live_stats.subscribe(update_dashboard_cards)
 
 # Recent Activity Section
 activity_frame = tb.LabelFrame(dashboard_container, text="📋 Recent Activity", 
@@ -1222,59 +1500,59 @@ activity_tree.column("Time", width=150)
 activity_tree.column("Activity", width=200)
 activity_tree.column("Details", width=400)
 
-# Get recent attendance
-cursor.execute("""
-    SELECT date, name, roll_no 
-    FROM attendance 
-    ORDER BY date DESC, rowid DESC 
-    LIMIT 10
-""")
-for date, name, roll_no in cursor.fetchall():
-    activity_tree.insert("", "end", values=(
-        date, 
-        "Attendance Marked", 
-        f"{name} (Roll: {roll_no})"
-    ))
-
 activity_tree.pack(fill='both', expand=True)
 
+def show_recent_activity(rows, error):
+    if error is not None:
+        status_label.config(text=f"Could not load recent activity: {error}")
+        return
+    activity_tree.delete(*activity_tree.get_children())
+    for date, name, roll_no in rows:
+        activity_tree.insert("", "end", values=(
+            date, 
+            "Attendance Marked", 
+            f"{name} (Roll: {roll_no})"
+        ))
+
 # Quick Actions in Dashboard
 quick_dash_frame = tb.Frame(dashboard_container)
 quick_dash_frame.pack(fill='x', pady=(10, 0))
 
 tb.Button(quick_dash_frame, text="🚀 Mark Attendance",
-         command=lambda: notebook.select(2),
+         command=lambda: show_tab(attendance_tab),
          bootstyle="success", width=20).pack(side='left', padx=5)
 
 tb.Button(quick_dash_frame, text="➕ Add Student",
-         command=lambda: notebook.select(1),
+         command=lambda: show_tab(students_tab),
          bootstyle="info", width=20).pack(side='left', padx=5)
 
 tb.Button(quick_dash_frame, text="📊 View Reports",
-         command=lambda: notebook.select(3),
+         command=lambda: show_tab(reports_tab),
          bootstyle="primary", width=20).pack(side='left', padx=5)
 
-# ==================== STUDENTS TAB ====================
-main_container = tb.Frame(students_tab)
-main_container.pack(fill='both', expand=True, padx=20, pady=20)
+dashboard_loaded = False
 
+def load_dashboard(event=None):
+    """Fetch the dashboard's numbers once the window is on screen"""
+    global dashboard_loaded
+    if dashboard_loaded or (event is not None and event.widget is not root):
+        return
+    dashboard_loaded = True
+    resync_stats()
+    reader.submit(core.recent_attendance, limit=10, key="recent-activity",
+                  on_done=show_recent_activity)
+    # Warm the roster and the scan tones off the UI thread so the first scan doesn't pay for them
+    writer.submit(load_roster, on_done=lambda result, error: update_roster_stats())
+    threading.Thread(target=sound.warm_up, name="attendance-sound", daemon=True).start()
+
+# <Map> reaches the root for each of its widgets too; only the window's own counts
+root.bind("<Map>", load_dashboard)
+
+# ==================== STUDENTS TAB ====================
 # Add keyboard shortcuts
 root.bind("<Control-a>", lambda e: view_today_attendance())
 root.bind("<Control-r>", lambda e: generate_monthly_report())
-root.bind("<Control-f>", lambda e: search_entry.focus_set())
-
-# Header section with search
-header_frame = tb.Frame(main_container)
-header_frame.pack(fill='x', pady=(0, 20))
-
-# Title with decorative elements
-title_frame = tb.Frame(header_frame)
-title_frame.pack(fill='x')
-
-title_label = tb.Label(title_frame, text="👥 Student Management", 
-                      font=("Helvetica", 20, "bold"),
-                      bootstyle="inverse-info")
-title_label.pack(pady=10)
+root.bind("<Control-f>", lambda e: (show_tab(students_tab), students_ui.search_entry.focus_set()))
 
 # Custom Entry with placeholder
 class PlaceholderEntry(tb.Entry):
@@ -1306,53 +1584,118 @@ class PlaceholderEntry(tb.Entry):
             return ""
         return text
 
-# Search bar
-search_frame = tb.Frame(header_frame)
-search_frame.pack(fill='x', pady=(10, 0))
+SEARCH_DEBOUNCE_MS = 150
+search_after_id = None
 
-search_entry = PlaceholderEntry(
-    search_frame,
-    placeholder="Search by Roll No, Name or Phone...",
-    font=("Helvetica", 11),
-    bootstyle="secondary",
-    width=40
-)
-search_entry.pack(side='left', padx=(0, 10))
+def schedule_search(event=None):
+    """Search as the user types, once they pause"""
+    global search_after_id
+    if search_after_id is not None:
+        root.after_cancel(search_after_id)
+    search_after_id = root.after(SEARCH_DEBOUNCE_MS, perform_search)
 
 def perform_search():
-    search_term = search_entry.get().strip()
-    if search_term:
-        results = search_students(search_term)
-        update_student_view(results)
-    else:
+    global search_after_id
+    if search_after_id is not None:
+        root.after_cancel(search_after_id)
+        search_after_id = None
+    
+    search_term = students_ui.search_entry.get().strip()
+    if not search_term:
+        reader.cancel("student-search")
         view_students()
+        return
+    
+    def search_done(results, error):
+        if error:
+            status_label.config(text=f"Search failed: {error}")
+        else:
+            update_student_view(results, ranked=True)
+    
+    # A newer keystroke supersedes (and interrupts) this search
+    reader.submit(core.search_students, search_term,
+                  key="student-search", on_done=search_done)
+
+def update_student_count(stats):
+    if stats.loaded:
+        students_ui.count_label.config(text=f"Total Students: {stats.total_students}")
+
+# Entry validators, shared by the add-student form and the payment dialog
+phone_validate = root.register(validate_phone)
+fees_validate = root.register(validate_fees)
+
+def apply_status_filter(event=None):
+    # Re-run the current search, if any, under the new filter
+    perform_search()
 
-search_button = tb.Button(search_frame, 
-                         text="Search",
-                         command=perform_search,
-                         bootstyle="secondary-outline")
-search_button.pack(side='left')
-
-# Quick Actions Bar
-actions_frame = tb.Frame(header_frame)
-actions_frame.pack(fill='x', pady=(10, 0))
-
-# Student count display
-cursor.execute("SELECT COUNT(*) FROM students")
-student_count = cursor.fetchone()[0]
-count_label = tb.Label(actions_frame, 
-                       text=f"Total Students: {student_count}",
-                       font=("Helvetica", 12, "bold"),
-                       bootstyle="inverse-success")
-count_label.pack(side='left', padx=10)
-
-tb.Button(actions_frame, text="🔄 Refresh",
-         command=view_students,
-         bootstyle="secondary-outline").pack(side='left', padx=5)
-
-tb.Button(actions_frame, text="📤 Export to CSV",
-         command=lambda: export_students_csv(),
-         bootstyle="info-outline").pack(side='left', padx=5)
+def refresh_students():
+    # Reload the roster cache too, off the UI thread, to pick up changes made from other kiosks
+    reader.submit(load_roster, key="roster", on_done=lambda result, error: update_roster_stats())
+    view_students()
+
+def import_students_csv():
+    """Add a whole roster from a CSV file and report the rows that failed"""
+    filename = filedialog.askopenfilename(
+        filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+    )
+    if not filename:
+        return
+    status_label.config(text="Importing students...")
+    writer.submit(core.import_students_csv, filename,
+                  on_done=lambda report, error: students_imported(filename, report, error))
+
+def students_imported(filename, report, error):
+    if error is not None:
+        status_label.config(text="Import failed")
+        messagebox.showerror("Import Error", f"Failed to import {filename}: {error}")
+        return
+    
+    # Refresh everything once for the whole import
+    view_students()
+    resync_stats()
+    update_roster_stats()
+    status_label.config(text=f"Imported {report.imported} students")
+    
+    result_window = tb.Toplevel(root)
+    result_window.title("Student Import")
+    result_window.geometry("700x500")
+    
+    frame = tb.Frame(result_window, padding=20)
+    frame.pack(fill='both', expand=True)
+    
+    tb.Label(frame,
+             text=f"Imported {report.imported} of {report.rows} rows"
+                  f" ({len(report.issues)} skipped)",
+             font=("Helvetica", 12, "bold"),
+             bootstyle="success" if not report.issues else "warning").pack(anchor='w', pady=(0, 10))
+    
+    if not report.issues:
+        return
+    
+    columns = ("Line", "Roll No", "Problem")
+    tree = ttk.Treeview(frame, columns=columns, show='headings', height=15)
+    for col, width in zip(columns, (70, 120, 420)):
+        tree.heading(col, text=col)
+        tree.column(col, width=width)
+    tree_scroll = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=tree_scroll.set)
+    for issue in report.issues:
+        tree.insert("", "end", values=(issue.line, str(issue.roll_no), issue.message))
+    
+    def save_error_report():
+        report_file = filedialog.asksaveasfilename(
+            parent=result_window,
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")],
+            initialfile="import_errors.csv"
+        )
+        if report_file:
+            export_to_csv([list(columns)] + [list(issue) for issue in report.issues], report_file)
+    
+    tb.Button(frame, text="Save Error Report", command=save_error_report,
+              bootstyle="info-outline").pack(side='bottom', pady=(10, 0))
+    tree_scroll.pack(side='right', fill='y')
+    tree.pack(fill='both', expand=True)
 
 def export_students_csv():
     filename = filedialog.asksaveasfilename(
@@ -1361,327 +1704,719 @@ def export_students_csv():
         initialfile=f"students_{datetime.now().strftime('%Y%m%d')}.csv"
     )
     if filename:
-        cursor.execute("SELECT * FROM students")
-        students = cursor.fetchall()
-        try:
-            with open(filename, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(["Roll No", "Name", "Phone", "DOB", "Start Date", "End Date", "Email", "Fees Paid", "Total Fees"])
-                writer.writerows(students)
-            messagebox.showinfo("Success", f"Students exported to {filename}")
-            status_label.config(text=f"Exported {len(students)} students")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to export: {str(e)}")
-
-# Create left and right panels
-left_panel = tb.Frame(main_container)
-left_panel.pack(side='left', fill='both', expand=True, padx=(0, 10))
-
-right_panel = tb.Frame(main_container)
-right_panel.pack(side='right', fill='both', expand=True, padx=(10, 0))
-
-# Mark Attendance Section (Left Panel)
-frame_attendance = tb.LabelFrame(left_panel, text="Quick Attendance", 
-                               padding=15, bootstyle="primary")
-frame_attendance.pack(fill='x', pady=(0, 10))
-
-tb.Label(frame_attendance, text="Enter Roll Number:", 
-         font=("Helvetica", 12)).pack(pady=(0, 5))
-entry_roll = tb.Entry(frame_attendance, font=("Helvetica", 14))
-entry_roll.pack(fill='x', pady=(0, 10))
-entry_roll.bind("<Return>", lambda e: mark_attendance())
-
-btn_mark = tb.Button(frame_attendance, text="Mark Attendance", 
-                    command=mark_attendance, bootstyle="success-outline",
-                    width=20)
-btn_mark.pack(pady=5)
-
-# Add Student Section (Left Panel)
-frame_add = tb.LabelFrame(left_panel, text="Add New Student", 
-                         padding=15, bootstyle="primary")
-frame_add.pack(fill='x', pady=10)
-
-# Create two columns for better layout
-left_column = tb.Frame(frame_add)
-left_column.pack(side='left', fill='both', expand=True, padx=(0, 10))
-
-right_column = tb.Frame(frame_add)
-right_column.pack(side='left', fill='both', expand=True, padx=(10, 0))
-
-# Validation functions
-def validate_phone(P):
-    return len(P) <= 10 and (P.isdigit() or P == "")
-
-def validate_email(email):
-    import re
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
-
-def validate_fees(P):
-    try:
-        if P == "": return True
-        float(P)
-        return True
-    except ValueError:
-        return False
-
-phone_validate = root.register(validate_phone)
-fees_validate = root.register(validate_fees)
-
-# Left column fields
-fields_left = [
-    ("Roll Number:", "entry_roll_add", tb.Entry, {"font": ("Helvetica", 12)}),
-    ("Name:", "entry_name", tb.Entry, {"font": ("Helvetica", 12)}),
-    ("Phone Number:", "entry_phone", tb.Entry, {
-        "font": ("Helvetica", 12),
-        "validate": "key",
-        "validatecommand": (phone_validate, "%P")
-    }),
-    ("Email:", "entry_email", tb.Entry, {"font": ("Helvetica", 12)}),
-    ("Course Fees:", "entry_fees", tb.Entry, {
-        "font": ("Helvetica", 12),
-        "validate": "key",
-        "validatecommand": (fees_validate, "%P")
-    }),
-    ("Fees Paid:", "entry_fees_paid", tb.Entry, {
-        "font": ("Helvetica", 12),
-        "validate": "key",
-        "validatecommand": (fees_validate, "%P")
-    })
-]
-
-# Right column fields with Entry
-fields_right = [
-    ("Date of Birth (DD/MM/YYYY):", "entry_dob", tb.Entry, {
-        "font": ("Helvetica", 12)
-    }),
-    ("Course Start Date (DD/MM/YYYY):", "entry_start", tb.Entry, {
-        "font": ("Helvetica", 12)
-    }),
-    ("Course End Date (DD/MM/YYYY):", "entry_end", tb.Entry, {
-        "font": ("Helvetica", 12)
-    })
-]
-
-entries = {}
-
-# Create left column fields
-for label_text, var_name, widget_class, widget_args in fields_left:
-    field_frame = tb.Frame(left_column)
-    field_frame.pack(fill='x', pady=5)
-    
-    tb.Label(field_frame, text=label_text, 
-             font=("Helvetica", 10, "bold")).pack(anchor='w')
-    entries[var_name] = widget_class(field_frame, **widget_args)
-    entries[var_name].pack(fill='x', pady=(2, 5))
-
-# Create right column fields
-for label_text, var_name, widget_class, widget_args in fields_right:
-    field_frame = tb.Frame(right_column)
-    field_frame.pack(fill='x', pady=5)
-    
-    tb.Label(field_frame, text=label_text, 
-             font=("Helvetica", 10, "bold")).pack(anchor='w')
-    entries[var_name] = widget_class(field_frame, **widget_args)
-    entries[var_name].pack(fill='x', pady=(2, 5))
-
-entry_roll_add = entries["entry_roll_add"]
-entry_name = entries["entry_name"]
-entry_phone = entries["entry_phone"]
-entry_email = entries["entry_email"]
-entry_fees = entries["entry_fees"]
-entry_fees_paid = entries["entry_fees_paid"]
-entry_dob = entries["entry_dob"]
-entry_start = entries["entry_start"]
-entry_end = entries["entry_end"]
-
-btn_add = tb.Button(frame_add, text="Add Student", 
-                   command=add_student, bootstyle="info-outline",
-                   width=20)
-btn_add.pack(pady=10)
-
-# View Frame for Students (Right Panel)
-view_frame = tb.LabelFrame(right_panel, text="Student Records", 
-                          padding=15, bootstyle="primary")
-
-# Report Buttons
-btn_frame = tb.Frame(right_panel)
-btn_frame.pack(pady=10)
-
-btn_view_students = tb.Button(btn_frame, text="View Students", 
-                            command=view_students, bootstyle="info",
-                            width=20)
-btn_view_students.pack(side='left', padx=5)
-
-btn_view_attendance = tb.Button(btn_frame, text="Today's Attendance", 
-                              command=view_today_attendance, bootstyle="warning",
-                              width=20)
-btn_view_attendance.pack(side='left', padx=5)
-
-btn_view_expiring = tb.Button(btn_frame, text="Expiring Courses", 
-                             command=view_expiring_courses, bootstyle="danger",
-                             width=20)
-btn_view_expiring.pack(side='left', padx=5)
-
-# Add Fees Management Button
-btn_fees = tb.Button(btn_frame, text="Fees Management", 
-                    command=lambda: show_fees_details() if view_frame.winfo_children() else None,
-                    bootstyle="secondary",
-                    width=20)
-btn_fees.pack(side='left', padx=5)
+        run_export("Exporting Students", core.export_students, filename)
 
 def check_pending_fees():
-    """Check and notify students with pending fees"""
-    cursor.execute("""
-        SELECT roll_no, name, email, total_fees, fees_paid, course_end_date
-        FROM students
-        WHERE total_fees > fees_paid
-    """)
-    
-    for student in cursor.fetchall():
-        roll_no, name, email, total, paid, end_date = student
-        remaining = float(total) - float(paid)
-        end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-        days_left = (end_date - datetime.now().date()).days
+    """Queue reminders for students with pending fees, at most one a day each"""
+    if not email_config["enabled"]:
+        return
+    # Queued on the writer thread so a long list never holds up the UI
+    writer.submit(queue_fee_reminders, core.today_iso(),
+                  on_done=lambda queued, error: mail_sender.wake())
+
+def queue_fee_reminders(conn, today):
+    queued = 0
+    for roll_no, name, email, remaining, days_left in core.pending_fee_reminders(conn):
+        if not email:
+            continue
+        message = f"""
+        Dear {name},
         
-        if days_left <= 7 and remaining > 0:
-            message = f"""
-            Dear {name},
-            
-            This is a reminder that you have pending fees of ₹{remaining}.
-            Your course will end in {days_left} days.
-            
-            Please clear your dues as soon as possible.
-            
-            Thank you!
-            """
-            
-            send_email_notification(email, "Fees Payment Reminder", message)
+        This is a reminder that you have pending fees of ₹{remaining}.
+        Your course will end in {days_left} days.
+        
+        Please clear your dues as soon as possible.
+        
+        Thank you!
+        """
+        
+        # Keyed per recipient and day, so a restart or another kiosk doesn't resend it
+        queued += core.queue_email(conn, email, "Fees Payment Reminder", message,
+                                   dedupe_key=f"fees-reminder:{email}:{today}")
+    return queued
 
 # Schedule periodic fees check (every 24 hours)
 def schedule_fees_check():
     check_pending_fees()
     root.after(24*60*60*1000, schedule_fees_check)  # 24 hours in milliseconds
 
-schedule_fees_check()
+# The first check waits until start-up is well out of the way
+FEES_CHECK_DELAY_MS = 60 * 1000
+root.after(FEES_CHECK_DELAY_MS, schedule_fees_check)
 
-# ==================== ATTENDANCE TAB ====================
-attendance_container = tb.Frame(attendance_tab)
-attendance_container.pack(fill='both', expand=True, padx=20, pady=20)
-
-# Attendance Header
-att_header = tb.Label(attendance_container, 
-                      text="✓ Attendance Management",
-                      font=("Helvetica", 20, "bold"),
-                      bootstyle="inverse-success")
-att_header.pack(pady=(0, 20))
-
-# Quick Mark Attendance
-quick_att_frame = tb.LabelFrame(attendance_container, text="Quick Mark Attendance", 
-                               padding=20, bootstyle="success")
-quick_att_frame.pack(fill='x', pady=(0, 20))
-
-att_input_frame = tb.Frame(quick_att_frame)
-att_input_frame.pack(fill='x')
-
-tb.Label(att_input_frame, text="Roll Number:", 
-         font=("Helvetica", 12, "bold")).pack(side='left', padx=(0, 10))
-att_entry = tb.Entry(att_input_frame, font=("Helvetica", 14), width=20)
-att_entry.pack(side='left', padx=(0, 10))
-att_entry.bind("<Return>", lambda e: mark_attendance_from_tab())
+@lazy_tab(students_tab)
+def build_students_tab():
+    global students_ui
+    ui = SimpleNamespace()
+    main_container = tb.Frame(students_tab)
+    main_container.pack(fill='both', expand=True, padx=20, pady=20)
+    
+    # Header section with search
+    header_frame = tb.Frame(main_container)
+    header_frame.pack(fill='x', pady=(0, 20))
+    
+    # Title with decorative elements
+    title_frame = tb.Frame(header_frame)
+    title_frame.pack(fill='x')
+    
+    title_label = tb.Label(title_frame, text="👥 Student Management", 
+                          font=("Helvetica", 20, "bold"),
+                          bootstyle="inverse-info")
+    title_label.pack(pady=10)
+    
+    # Search bar
+    search_frame = tb.Frame(header_frame)
+    search_frame.pack(fill='x', pady=(10, 0))
+    
+    ui.search_entry = PlaceholderEntry(
+        search_frame,
+        placeholder="Search by Roll No, Name or Phone...",
+        font=("Helvetica", 11),
+        bootstyle="secondary",
+        width=40
+    )
+    ui.search_entry.pack(side='left', padx=(0, 10))
+    
+    search_button = tb.Button(search_frame, 
+                             text="Search",
+                             command=perform_search,
+                             bootstyle="secondary-outline")
+    search_button.pack(side='left')
+    
+    ui.search_entry.bind("<KeyRelease>", schedule_search)
+    ui.search_entry.bind("<Return>", lambda e: perform_search())
+    
+    # Quick Actions Bar
+    actions_frame = tb.Frame(header_frame)
+    actions_frame.pack(fill='x', pady=(10, 0))
+    
+    # Student count display, kept current by the live statistics
+    ui.count_label = tb.Label(actions_frame, 
+                              text="Total Students: …",
+                              font=("Helvetica", 12, "bold"),
+                              bootstyle="inverse-success")
+    ui.count_label.pack(side='left', padx=10)
+    
+    ui.status_filter_var = tb.StringVar(value="All Students")
+    status_filter_box = tb.Combobox(actions_frame,
+                                    textvariable=ui.status_filter_var,
+                                    values=list(STUDENT_FILTERS),
+                                    state="readonly",
+                                    width=20,
+                                    bootstyle="secondary")
+    status_filter_box.pack(side='left', padx=5)
+    status_filter_box.bind("<<ComboboxSelected>>", apply_status_filter)
+    
+    tb.Button(actions_frame, text="🔄 Refresh",
+             command=refresh_students,
+             bootstyle="secondary-outline").pack(side='left', padx=5)
+    
+    tb.Button(actions_frame, text="📤 Export to CSV",
+             command=lambda: export_students_csv(),
+             bootstyle="info-outline").pack(side='left', padx=5)
+    
+    tb.Button(actions_frame, text="📥 Import CSV",
+             command=lambda: import_students_csv(),
+             bootstyle="info-outline").pack(side='left', padx=5)
+    
+    # Create left and right panels
+    left_panel = tb.Frame(main_container)
+    left_panel.pack(side='left', fill='both', expand=True, padx=(0, 10))
+    
+    right_panel = tb.Frame(main_container)
+    right_panel.pack(side='right', fill='both', expand=True, padx=(10, 0))
+    
+    # Mark Attendance Section (Left Panel)
+    frame_attendance = tb.LabelFrame(left_panel, text="Quick Attendance", 
+                                   padding=15, bootstyle="primary")
+    frame_attendance.pack(fill='x', pady=(0, 10))
+    
+    tb.Label(frame_attendance, text="Enter Roll Number:", 
+             font=("Helvetica", 12)).pack(pady=(0, 5))
+    ui.roll_entry = tb.Entry(frame_attendance, font=("Helvetica", 14))
+    ui.roll_entry.pack(fill='x', pady=(0, 10))
+    ui.roll_entry.bind("<Return>", lambda e: mark_attendance())
+    
+    btn_mark = tb.Button(frame_attendance, text="Mark Attendance", 
+                        command=mark_attendance, bootstyle="success-outline",
+                        width=20)
+    btn_mark.pack(pady=5)
+    
+    # Add Student Section (Left Panel)
+    frame_add = tb.LabelFrame(left_panel, text="Add New Student", 
+                             padding=15, bootstyle="primary")
+    frame_add.pack(fill='x', pady=10)
+    
+    # Create two columns for better layout
+    left_column = tb.Frame(frame_add)
+    left_column.pack(side='left', fill='both', expand=True, padx=(0, 10))
+    
+    right_column = tb.Frame(frame_add)
+    right_column.pack(side='left', fill='both', expand=True, padx=(10, 0))
+    
+    # Left column fields
+    fields_left = [
+        ("Roll Number:", "roll_no", tb.Entry, {"font": ("Helvetica", 12)}),
+        ("Name:", "name", tb.Entry, {"font": ("Helvetica", 12)}),
+        ("Phone Number:", "phone", tb.Entry, {
+            "font": ("Helvetica", 12),
+            "validate": "key",
+            "validatecommand": (phone_validate, "%P")
+        }),
+        ("Email:", "email", tb.Entry, {"font": ("Helvetica", 12)}),
+        ("Course Fees:", "fees", tb.Entry, {
+            "font": ("Helvetica", 12),
+            "validate": "key",
+            "validatecommand": (fees_validate, "%P")
+        }),
+        ("Fees Paid:", "fees_paid", tb.Entry, {
+            "font": ("Helvetica", 12),
+            "validate": "key",
+            "validatecommand": (fees_validate, "%P")
+        })
+    ]
+    
+    # Right column fields with Entry
+    fields_right = [
+        ("Date of Birth (DD/MM/YYYY):", "dob", tb.Entry, {
+            "font": ("Helvetica", 12)
+        }),
+        ("Course Start Date (DD/MM/YYYY):", "start", tb.Entry, {
+            "font": ("Helvetica", 12)
+        }),
+        ("Course End Date (DD/MM/YYYY):", "end", tb.Entry, {
+            "font": ("Helvetica", 12)
+        })
+    ]
+    
+    ui.fields = entries = {}  # Add-student form entries by field name
+    
+    # Create left column fields
+    for label_text, var_name, widget_class, widget_args in fields_left:
+        field_frame = tb.Frame(left_column)
+        field_frame.pack(fill='x', pady=5)
+    
+        tb.Label(field_frame, text=label_text, 
+                 font=("Helvetica", 10, "bold")).pack(anchor='w')
+        entries[var_name] = widget_class(field_frame, **widget_args)
+        entries[var_name].pack(fill='x', pady=(2, 5))
+    
+    # Create right column fields
+    for label_text, var_name, widget_class, widget_args in fields_right:
+        field_frame = tb.Frame(right_column)
+        field_frame.pack(fill='x', pady=5)
+    
+        tb.Label(field_frame, text=label_text, 
+                 font=("Helvetica", 10, "bold")).pack(anchor='w')
+        entries[var_name] = widget_class(field_frame, **widget_args)
+        entries[var_name].pack(fill='x', pady=(2, 5))
+    
+    btn_add = tb.Button(frame_add, text="Add Student", 
+                       command=add_student, bootstyle="info-outline",
+                       width=20)
+    btn_add.pack(pady=10)
+    
+    # View Frame for Students (Right Panel)
+    ui.view_frame = tb.LabelFrame(right_panel, text="Student Records", 
+                                  padding=15, bootstyle="primary")
+    
+    # Report Buttons
+    btn_frame = tb.Frame(right_panel)
+    btn_frame.pack(pady=10)
+    
+    btn_view_students = tb.Button(btn_frame, text="View Students", 
+                                command=view_students, bootstyle="info",
+                                width=20)
+    btn_view_students.pack(side='left', padx=5)
+    
+    btn_view_attendance = tb.Button(btn_frame, text="Today's Attendance", 
+                                  command=view_today_attendance, bootstyle="warning",
+                                  width=20)
+    btn_view_attendance.pack(side='left', padx=5)
+    
+    btn_view_expiring = tb.Button(btn_frame, text="Expiring Courses", 
+                                 command=view_expiring_courses, bootstyle="danger",
+                                 width=20)
+    btn_view_expiring.pack(side='left', padx=5)
+    
+    # Add Fees Management Button
+    btn_fees = tb.Button(btn_frame, text="Fees Management", 
+                        command=show_fees_details,
+                        bootstyle="secondary",
+                        width=20)
+    btn_fees.pack(side='left', padx=5)
+    
+    students_ui = ui
+    live_stats.subscribe(update_student_count)
+    view_students()
 
+# ==================== ATTENDANCE TAB ====================
 def mark_attendance_from_tab():
-    roll_no = att_entry.get().strip()
-    date = datetime.now().strftime("%Y-%m-%d")
+    roll_no = attendance_ui.entry.get().strip()
 
     if not roll_no:
-        messagebox.showwarning("Input Error", "Please enter Roll Number.")
+        if not attendance_ui.rapid_scan_var.get():
+            messagebox.showwarning("Input Error", "Please enter Roll Number.")
         return
 
-    cursor.execute('SELECT * FROM attendance WHERE roll_no = ? AND date = ?', (roll_no, date))
-    if cursor.fetchone():
-        messagebox.showinfo("Already Marked", "Attendance already marked for today!")
-        return
-
-    cursor.execute('SELECT course_end_date, name FROM students WHERE roll_no = ?', (roll_no,))
-    result = cursor.fetchone()
-
-    if result:
-        course_end_date = datetime.strptime(result[0], "%Y-%m-%d")
-        today = datetime.now()
+    # Clear straight away so the next scan can be entered while this one is saved
+    attendance_ui.entry.delete(0, tb.END)
+    attendance_ui.entry.focus_set()
+    if attendance_ui.scanner_mode_var.get():
+        enqueue_scan(roll_no)  # Keep typed numbers in order with the scans
+    else:
+        submit_scan(roll_no)
 
-        if today.date() > course_end_date.date():
-            messagebox.showerror("Course Ended", "Course has ended!")
-            play_sound(frequency=1000, duration=500)
-        else:
-            try:
-                cursor.execute('INSERT INTO attendance (roll_no, name, date, status) VALUES (?, ?, ?, ?)',
-                               (roll_no, result[1], date, "Present"))
-                conn.commit()
-                messagebox.showinfo("Success", f"Attendance marked for {result[1]}")
-                play_sound()
-                att_entry.delete(0, tb.END)
-                att_entry.focus_set()
-                refresh_today_attendance()
-                status_label.config(text=f"Attendance marked for {result[1]}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to mark attendance: {e}")
+def submit_scan(roll_no, on_marked=None):
+    def marked(result, error):
+        try:
+            tab_attendance_marked(roll_no, result, error)
+        finally:
+            if on_marked is not None:
+                on_marked()
+    writer.submit(core.mark_attendance, roll_no, on_done=marked)
+
+def tab_attendance_marked(roll_no, result, error):
+    if error is None and result.status == core.MARKED:
+        live_stats.attendance_marked(core.today_iso())
+        refresh_today_attendance()
+        status_label.config(text=f"Attendance marked for {result.name}")
+    
+    if attendance_ui.rapid_scan_var.get():
+        show_scan_result(roll_no, result, error)
+    elif error is not None:
+        messagebox.showerror("Error", f"Failed to mark attendance: {error}")
+    elif result.status == core.ALREADY_MARKED:
+        messagebox.showinfo("Already Marked", "Attendance already marked for today!")
+    elif result.status == core.COURSE_ENDED:
+        play_sound(core.ERROR)
+        messagebox.showerror("Course Ended", "Course has ended!")
+    elif result.status == core.MARKED:
+        play_sound()
+        messagebox.showinfo("Success", f"Attendance marked for {result.name}")
     else:
         messagebox.showwarning("Error", "Student not found!")
-        att_entry.delete(0, tb.END)
-
-tb.Button(att_input_frame, text="Mark Present",
-         command=mark_attendance_from_tab,
-         bootstyle="success", width=15).pack(side='left', padx=5)
-
-# Today's Attendance Display
-today_att_frame = tb.LabelFrame(attendance_container, text=f"Today's Attendance ({datetime.now().strftime('%d %B %Y')})", 
-                               padding=20, bootstyle="info")
-today_att_frame.pack(fill='both', expand=True)
-
-today_att_tree = ttk.Treeview(today_att_frame, 
-                             columns=("Roll No", "Name", "Time", "Status"), 
-                             show='headings', height=15)
-today_att_tree.heading("Roll No", text="Roll No")
-today_att_tree.heading("Name", text="Name")
-today_att_tree.heading("Time", text="Time")
-today_att_tree.heading("Status", text="Status")
-today_att_tree.column("Roll No", width=100)
-today_att_tree.column("Name", width=250)
-today_att_tree.column("Time", width=150)
-today_att_tree.column("Status", width=100)
-
-def refresh_today_attendance():
-    for item in today_att_tree.get_children():
-        today_att_tree.delete(item)
+    update_roster_stats()
+
+# Rapid-scan mode: results flash in a banner and go to a feed instead of
+# dialogs, so the roll number entry keeps focus between scans
+SCAN_FLASH_MS = 1500
+SCAN_FEED_LIMIT = 200
+SCAN_RESULT_STYLES = {
+    core.MARKED: "success",
+    core.ALREADY_MARKED: "warning",
+    core.COURSE_ENDED: "danger",
+    core.NOT_FOUND: "danger",
+}
+scan_flash_after_id = None
+scan_counts = defaultdict(int)
+
+def toggle_rapid_scan():
+    if attendance_ui.rapid_scan_var.get():
+        attendance_ui.scan_banner.pack(fill='x', pady=(10, 0), before=attendance_ui.roster_stats_label)
+        attendance_ui.scan_feed_frame.pack(fill='x', pady=(0, 20), before=attendance_ui.today_frame)
+        clear_scan_banner()
+    else:
+        attendance_ui.scan_banner.pack_forget()
+        attendance_ui.scan_feed_frame.pack_forget()
+    attendance_ui.entry.focus_set()
+
+def clear_scan_banner():
+    global scan_flash_after_id
+    scan_flash_after_id = None
+    attendance_ui.scan_banner.config(text="Ready to scan", bootstyle="secondary")
+
+def show_scan_result(roll_no, result, error):
+    """Flash a scan's outcome and add it to the top of the feed"""
+    global scan_flash_after_id
+    if error is not None:
+        label, style, name = "Error", "danger", str(error)
+    else:
+        label = MARK_STATUS_LABELS[result.status]
+        style = SCAN_RESULT_STYLES[result.status]
+        name = result.name or ""
+    play_sound(core.SUCCESS if style == "success" else core.ERROR)
+    
+    attendance_ui.scan_banner.config(text=f"{label}  {name or roll_no}", bootstyle=f"inverse-{style}")
+    if scan_flash_after_id is not None:
+        root.after_cancel(scan_flash_after_id)
+    scan_flash_after_id = root.after(SCAN_FLASH_MS, clear_scan_banner)
+    
+    attendance_ui.scan_feed.insert("", 0, values=(datetime.now().strftime("%H:%M:%S"), roll_no, name, label),
+                                   tags=(style,))
+    old_rows = attendance_ui.scan_feed.get_children()[SCAN_FEED_LIMIT:]
+    if old_rows:
+        attendance_ui.scan_feed.delete(*old_rows)
+    scan_counts[label] += 1
+    attendance_ui.scan_feed_frame.config(text="Scan Results  " + " | ".join(
+        f"{outcome}: {count}" for outcome, count in scan_counts.items()))
+
+# Scanner input: keyboard-wedge readers are told apart from typing by the
+# speed of their keystrokes, wherever the focus is (except other text
+# fields), and their reads are marked one at a time, in order
+scan_detector = core.BurstDetector()
+scan_queue = core.ScanQueue(core.scan_repeat_seconds())
+scan_in_flight = False
+scan_idle_after_id = None
+TEXT_INPUT_CLASSES = {"Entry", "TEntry", "Text", "TCombobox", "TSpinbox"}
+
+def toggle_scanner_mode():
+    if attendance_ui.scanner_mode_var.get():
+        # Scans never open dialogs, so no read is lost behind one
+        attendance_ui.rapid_scan_var.set(True)
+        attendance_ui.rapid_scan_toggle.config(state='disabled')
+        toggle_rapid_scan()
+        attendance_ui.scan_queue_label.pack(anchor='w', pady=(10, 0), before=attendance_ui.roster_stats_label)
+        update_scan_queue_label()
+    else:
+        attendance_ui.rapid_scan_toggle.config(state='normal')
+        attendance_ui.scan_queue_label.pack_forget()
+        attendance_ui.entry.focus_set()
+
+def on_scanner_key(event):
+    """Feed every keystroke in the app to the burst detector"""
+    global scan_idle_after_id
+    if attendance_ui is None or not attendance_ui.scanner_mode_var.get():
+        return
+    widget = event.widget
+    if widget is not attendance_ui.entry and is_text_input(widget):
+        return  # Someone typing in another field
+    if event.keysym in ("Return", "KP_Enter"):
+        finish_scan_burst(widget, event.time)
+    elif event.char and event.char.isprintable():
+        scan_detector.key(event.char, event.time)
+        # Readers set up without an Enter suffix end their burst with a pause
+        if scan_idle_after_id is not None:
+            root.after_cancel(scan_idle_after_id)
+        scan_idle_after_id = root.after(core.SCAN_IDLE_MS, lambda: finish_scan_burst(widget))
+
+def is_text_input(widget):
+    # event.widget is a plain path string for widgets Tk created itself
+    return hasattr(widget, "winfo_class") and widget.winfo_class() in TEXT_INPUT_CLASSES
+
+def on_att_entry_return(event):
+    if attendance_ui.scanner_mode_var.get():
+        finish_scan_burst(attendance_ui.entry, event.time)
+        return "break"
+    mark_attendance_from_tab()
+
+def finish_scan_burst(widget, time_ms=None):
+    global scan_idle_after_id
+    if scan_idle_after_id is not None:
+        root.after_cancel(scan_idle_after_id)
+        scan_idle_after_id = None
+    code = scan_detector.end(time_ms)
+    if code is not None:
+        if widget is attendance_ui.entry:
+            attendance_ui.entry.delete(0, tb.END)
+        enqueue_scan(code)
+    elif widget is attendance_ui.entry and time_ms is not None:
+        mark_attendance_from_tab()  # Typed by hand
+
+def enqueue_scan(roll_no):
+    if not scan_queue.put(roll_no):
+        status_label.config(text=f"Ignored repeat read of {roll_no}")
+    pump_scans()
+    update_scan_queue_label()
+
+def pump_scans():
+    global scan_in_flight
+    if scan_in_flight:
+        return
+    roll_no = scan_queue.get()
+    if roll_no is not None:
+        scan_in_flight = True
+        submit_scan(roll_no, on_marked=scan_done)
+
+def scan_done():
+    global scan_in_flight
+    scan_in_flight = False
+    pump_scans()
+    update_scan_queue_label()
+
+def update_scan_queue_label():
+    attendance_ui.scan_queue_label.config(text=(
+        f"Scanner: {len(scan_queue) + scan_in_flight} waiting | {scan_queue.accepted} read | "
+        f"{scan_queue.repeats} repeats ignored (within {scan_queue.repeat_seconds:g} s)"))
+
+root.bind_all("<Key>", on_scanner_key, add="+")
+
+MARK_STATUS_LABELS = {
+    core.MARKED: "✓ Marked",
+    core.ALREADY_MARKED: "Already Marked",
+    core.COURSE_ENDED: "Course Ended",
+    core.NOT_FOUND: "Unknown Roll No",
+}
+
+def import_attendance_register():
+    """Mark a pasted list or register file of roll numbers in one go"""
+    register_window = tb.Toplevel(root)
+    register_window.title("Import Attendance Register")
+    register_window.geometry("700x650")
+    
+    main_frame = tb.Frame(register_window, padding=20)
+    main_frame.pack(fill='both', expand=True)
     
-    today = datetime.now().strftime("%Y-%m-%d")
-    cursor.execute("SELECT roll_no, name, date, status FROM attendance WHERE date = ?", (today,))
-    for row in cursor.fetchall():
-        today_att_tree.insert("", "end", values=(row[0], row[1], row[2], row[3]))
-
-refresh_today_attendance()
+    tb.Label(main_frame, 
+             text="Paste roll numbers (one per line, or separated by commas/spaces)",
+             font=("Helvetica", 11)).pack(anchor='w', pady=(0, 5))
+    
+    text_box = tb.Text(main_frame, height=10, font=("Helvetica", 11))
+    text_box.pack(fill='x', pady=(0, 10))
+    
+    options_frame = tb.Frame(main_frame)
+    options_frame.pack(fill='x', pady=(0, 10))
+    
+    tb.Label(options_frame, text="Date:", width=8, anchor='w').pack(side='left')
+    date_entry = tb.DateEntry(options_frame, bootstyle="primary",
+                              dateformat="%d/%m/%Y",
+                              startdate=datetime.now())
+    date_entry.pack(side='left', padx=5)
+    
+    def load_register_file():
+        filename = filedialog.askopenfilename(
+            filetypes=[("Register files", "*.csv *.txt"), ("All files", "*.*")]
+        )
+        if not filename:
+            return
+        try:
+            with open(filename, newline='', encoding='utf-8') as f:
+                # Roll numbers are taken from the first column
+                roll_nos = [row[0] for row in csv.reader(f) if row and row[0].strip()]
+        except (OSError, UnicodeDecodeError) as e:
+            messagebox.showerror("Error", f"Failed to read file: {str(e)}")
+            return
+        text_box.delete("1.0", tb.END)
+        text_box.insert("1.0", "\n".join(roll_nos))
+    
+    tb.Button(options_frame, text="Load File...",
+             command=load_register_file,
+             bootstyle="secondary-outline").pack(side='left', padx=5)
+    
+    summary_label = tb.Label(main_frame, text="", font=("Helvetica", 11, "bold"))
+    summary_label.pack(anchor='w', pady=(0, 10))
+    
+    columns = ("Roll No", "Name", "Result")
+    tree = ttk.Treeview(main_frame, columns=columns, show='headings', height=12)
+    for col in columns:
+        tree.heading(col, text=col)
+        tree.column(col, width=180)
+    tree.tag_configure("marked", foreground="#00C851")
+    tree.tag_configure("problem", foreground="#ff4444")
+    
+    def mark_register():
+        roll_nos = core.parse_roll_list(text_box.get("1.0", tb.END))
+        if not roll_nos:
+            messagebox.showwarning("Input Error", "Please enter at least one Roll Number.", parent=register_window)
+            return
+        try:
+            date = core.parse_form_date(date_entry.entry.get())
+        except ValueError:
+            messagebox.showerror("Date Error", "Dates must be in DD/MM/YYYY format.", parent=register_window)
+            return
+        
+        mark_btn.config(state='disabled')
+        summary_label.config(text="Marking...")
+        writer.submit(core.mark_attendance_batch, roll_nos, date,
+                      on_done=lambda results, error: register_marked(results, error, date))
+    
+    def register_marked(results, error, date):
+        if error is None:
+            live_stats.attendance_marked(
+                date, sum(1 for result in results if result.status == core.MARKED))
+        if not register_window.winfo_exists():
+            refresh_today_attendance()
+            return
+        mark_btn.config(state='normal')
+        if error is not None:
+            summary_label.config(text="")
+            messagebox.showerror("Database Error", f"Failed to mark attendance: {error}", parent=register_window)
+            return
+        
+        for item in tree.get_children():
+            tree.delete(item)
+        counts = defaultdict(int)
+        for result in results:
+            counts[result.status] += 1
+            tag = "marked" if result.status == core.MARKED else "problem"
+            tree.insert("", "end", values=(result.roll_no, result.name or "",
+                                           MARK_STATUS_LABELS[result.status]), tags=(tag,))
+        
+        summary_label.config(text=" | ".join(
+            f"{MARK_STATUS_LABELS[status]}: {counts[status]}" for status in MARK_STATUS_LABELS
+        ))
+        refresh_today_attendance()
+        status_label.config(text=f"Register imported: {counts[core.MARKED]} marked")
+        update_roster_stats()
+    
+    mark_btn = tb.Button(options_frame, text="Mark All",
+                         command=mark_register,
+                         bootstyle="success")
+    mark_btn.pack(side='right', padx=5)
+    
+    tree.pack(fill='both', expand=True)
 
-scrollbar = ttk.Scrollbar(today_att_frame, orient="vertical", command=today_att_tree.yview)
-today_att_tree.configure(yscrollcommand=scrollbar.set)
-today_att_tree.pack(side='left', fill='both', expand=True)
-scrollbar.pack(side='right', fill='y')
+def update_roster_stats():
+    if attendance_ui is None:
+        return
+    stats = core.roster_for(conn).stats()
+    attendance_ui.roster_stats_label.config(text=(
+        f"Roster cache: {stats['size']} students | "
+        f"{stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%}) | "
+        f"rebuilt in {stats['rebuild_ms']:.1f} ms"
+    ))
 
-# ==================== REPORTS TAB ====================
-reports_container = tb.Frame(reports_tab)
-reports_container.pack(fill='both', expand=True, padx=20, pady=20)
+def load_roster(conn):
+    core.roster_for(conn).rebuild(conn)
 
-# Reports Header
-rep_header = tb.Label(reports_container, 
-                     text="📈 Reports & Analytics",
-                     font=("Helvetica", 20, "bold"),
-                     bootstyle="inverse-primary")
-rep_header.pack(pady=(0, 20))
+# The tree only ever appends rows newer than the last rowid it has shown
+today_att_date = None
+today_att_watermark = 0
 
-# Report Cards
-report_cards_frame = tb.Frame(reports_container)
-report_cards_frame.pack(fill='x', pady=(0, 20))
+def refresh_today_attendance():
+    global today_att_date, today_att_watermark
+    if attendance_ui is None:
+        return
+    today = core.today_iso()
+    
+    if today != today_att_date:
+        # First load, or the date rolled over at midnight: start a fresh day
+        for item in attendance_ui.today_tree.get_children():
+            attendance_ui.today_tree.delete(item)
+        today_att_date = today
+        today_att_watermark = 0
+        attendance_ui.today_frame.config(text=f"Today's Attendance ({datetime.now().strftime('%d %B %Y')})")
+    
+    for rowid, roll_no, name, date, status in core.attendance_since(conn, today, today_att_watermark):
+        attendance_ui.today_tree.insert("", "end", values=(roll_no, name, date, status))
+        today_att_watermark = rowid
+
+def schedule_today_refresh():
+    # Picks up marks made from other kiosks and the midnight rollover
+    refresh_today_attendance()
+    root.after(30 * 1000, schedule_today_refresh)
+
+schedule_today_refresh()
+
+STATS_RESYNC_MS = 5 * 60 * 1000
+
+def resync_stats():
+    """Recompute the live statistics in the background"""
+    def resynced(snapshot, error):
+        if error is None:
+            live_stats.reset(snapshot)
+    reader.submit(core.stats_snapshot, key="stats", on_done=resynced)
+
+def schedule_stats_resync():
+    # Picks up other kiosks' writes; the day rollover is checked more often
+    resync_stats()
+    root.after(STATS_RESYNC_MS, schedule_stats_resync)
+
+def check_stats_day():
+    if live_stats.date != core.today_iso():
+        resync_stats()
+    root.after(60 * 1000, check_stats_day)
+
+root.after(STATS_RESYNC_MS, schedule_stats_resync)
+check_stats_day()
+
+@lazy_tab(attendance_tab)
+def build_attendance_tab():
+    global attendance_ui
+    ui = SimpleNamespace()
+    attendance_container = tb.Frame(attendance_tab)
+    attendance_container.pack(fill='both', expand=True, padx=20, pady=20)
+    
+    # Attendance Header
+    att_header = tb.Label(attendance_container, 
+                          text="✓ Attendance Management",
+                          font=("Helvetica", 20, "bold"),
+                          bootstyle="inverse-success")
+    att_header.pack(pady=(0, 20))
+    
+    # Quick Mark Attendance
+    quick_att_frame = tb.LabelFrame(attendance_container, text="Quick Mark Attendance", 
+                                   padding=20, bootstyle="success")
+    quick_att_frame.pack(fill='x', pady=(0, 20))
+    
+    att_input_frame = tb.Frame(quick_att_frame)
+    att_input_frame.pack(fill='x')
+    
+    tb.Label(att_input_frame, text="Roll Number:", 
+             font=("Helvetica", 12, "bold")).pack(side='left', padx=(0, 10))
+    ui.entry = tb.Entry(att_input_frame, font=("Helvetica", 14), width=20)
+    ui.entry.pack(side='left', padx=(0, 10))
+    ui.entry.bind("<Return>", on_att_entry_return)
+    
+    tb.Button(att_input_frame, text="Mark Present",
+             command=mark_attendance_from_tab,
+             bootstyle="success", width=15).pack(side='left', padx=5)
+    
+    tb.Button(att_input_frame, text="📋 Import Register",
+             command=import_attendance_register,
+             bootstyle="info-outline", width=18).pack(side='left', padx=5)
+    
+    ui.rapid_scan_var = tb.BooleanVar(value=False)
+    ui.rapid_scan_toggle = tb.Checkbutton(att_input_frame, text="⚡ Rapid Scan",
+                                          variable=ui.rapid_scan_var, command=toggle_rapid_scan,
+                                          bootstyle="success-round-toggle")
+    ui.rapid_scan_toggle.pack(side='left', padx=15)
+    
+    ui.scanner_mode_var = tb.BooleanVar(value=False)
+    tb.Checkbutton(att_input_frame, text="🔖 Scanner Input", variable=ui.scanner_mode_var,
+                   command=toggle_scanner_mode,
+                   bootstyle="info-round-toggle").pack(side='left', padx=5)
+    ui.scan_queue_label = tb.Label(quick_att_frame, text="", font=("Helvetica", 9),
+                                   bootstyle="info")
+    
+    # Rapid-scan banner and feed, shown while the mode is on
+    ui.scan_banner = tb.Label(quick_att_frame, text="", font=("Helvetica", 18, "bold"),
+                              anchor='center', padding=10)
+    
+    ui.scan_feed_frame = tb.LabelFrame(attendance_container, text="Scan Results",
+                                       padding=10, bootstyle="success")
+    ui.scan_feed = ttk.Treeview(ui.scan_feed_frame, columns=("Time", "Roll No", "Name", "Result"),
+                                show='headings', height=6)
+    for col, width in zip(("Time", "Roll No", "Name", "Result"), (100, 100, 250, 150)):
+        ui.scan_feed.heading(col, text=col)
+        ui.scan_feed.column(col, width=width)
+    ui.scan_feed.tag_configure("success", foreground="#00C851")
+    ui.scan_feed.tag_configure("warning", foreground="#ffbb33")
+    ui.scan_feed.tag_configure("danger", foreground="#ff4444")
+    ui.scan_feed.pack(fill='x')
+    
+    # Roster cache statistics
+    ui.roster_stats_label = tb.Label(quick_att_frame, text="", font=("Helvetica", 9),
+                                     bootstyle="secondary")
+    ui.roster_stats_label.pack(anchor='w', pady=(10, 0))
+    
+    # Today's Attendance Display
+    ui.today_frame = tb.LabelFrame(attendance_container, text=f"Today's Attendance ({datetime.now().strftime('%d %B %Y')})", 
+                                   padding=20, bootstyle="info")
+    ui.today_frame.pack(fill='both', expand=True)
+    
+    ui.today_tree = ttk.Treeview(ui.today_frame, 
+                                 columns=("Roll No", "Name", "Time", "Status"), 
+                                 show='headings', height=15)
+    ui.today_tree.heading("Roll No", text="Roll No")
+    ui.today_tree.heading("Name", text="Name")
+    ui.today_tree.heading("Time", text="Time")
+    ui.today_tree.heading("Status", text="Status")
+    ui.today_tree.column("Roll No", width=100)
+    ui.today_tree.column("Name", width=250)
+    ui.today_tree.column("Time", width=150)
+    ui.today_tree.column("Status", width=100)
+    
+    scrollbar = ttk.Scrollbar(ui.today_frame, orient="vertical", command=ui.today_tree.yview)
+    ui.today_tree.configure(yscrollcommand=scrollbar.set)
+    ui.today_tree.pack(side='left', fill='both', expand=True)
+    scrollbar.pack(side='right', fill='y')
+    
+    attendance_ui = ui
+    update_roster_stats()
+    refresh_today_attendance()
 
+# ==================== REPORTS TAB ====================
 def create_report_card(parent, title, description, command, color):
     card = tb.LabelFrame(parent, text=title, padding=20, bootstyle=color)
     card.pack(side='left', fill='both', expand=True, padx=10)
@@ -1694,17 +2429,62 @@ def create_report_card(parent, title, description, command, color):
              command=command,
              bootstyle=f"{color}").pack()
 
-create_report_card(report_cards_frame, "📅 Monthly Report",
-                  "View attendance statistics for the current month",
-                  generate_monthly_report, "success")
-
-create_report_card(report_cards_frame, "⚠️ Expiring Courses",
-                  "Students whose courses are ending soon",
-                  view_expiring_courses, "warning")
-
-create_report_card(report_cards_frame, "💰 Financial Report",
-                  "View fees collection and pending payments",
-                  lambda: generate_financial_report(), "info")
+def export_attendance_history():
+    """Ask for a date range and file, then stream the attendance out"""
+    export_window = tb.Toplevel(root)
+    export_window.title("Export Attendance History")
+    export_window.geometry("460x220")
+    
+    frame = tb.Frame(export_window, padding=20)
+    frame.pack(fill='both', expand=True)
+    
+    all_dates_var = tb.BooleanVar(value=True)
+    range_frame = tb.Frame(frame)
+    
+    def toggle_range():
+        state = 'disabled' if all_dates_var.get() else 'normal'
+        for entry in (from_entry, to_entry):
+            entry.entry.config(state=state)
+            entry.button.config(state=state)
+    
+    tb.Checkbutton(frame, text="All dates", variable=all_dates_var,
+                   command=toggle_range, bootstyle="round-toggle").pack(anchor='w', pady=(0, 10))
+    range_frame.pack(fill='x', pady=(0, 15))
+    
+    today = datetime.now().date()
+    tb.Label(range_frame, text="From:").pack(side='left')
+    from_entry = tb.DateEntry(range_frame, bootstyle="primary", dateformat="%d/%m/%Y",
+                              startdate=today.replace(month=1, day=1))
+    from_entry.pack(side='left', padx=5)
+    tb.Label(range_frame, text="To:").pack(side='left', padx=(10, 0))
+    to_entry = tb.DateEntry(range_frame, bootstyle="primary", dateformat="%d/%m/%Y",
+                            startdate=today)
+    to_entry.pack(side='left', padx=5)
+    toggle_range()
+    
+    def start_export():
+        start = end = None
+        if not all_dates_var.get():
+            try:
+                start = core.parse_form_date(from_entry.entry.get())
+                end = core.parse_form_date(to_entry.entry.get())
+            except ValueError:
+                messagebox.showerror("Date Error", "Dates must be in DD/MM/YYYY format.",
+                                     parent=export_window)
+                return
+        
+        filename = filedialog.asksaveasfilename(
+            parent=export_window,
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("Compressed CSV", "*.csv.gz")],
+            initialfile=f"attendance_{start or 'all'}_{end or today.isoformat()}.csv"
+        )
+        if filename:
+            export_window.destroy()
+            run_export("Exporting Attendance", core.export_attendance, filename, start, end)
+    
+    tb.Button(frame, text="Export...", command=start_export,
+              bootstyle="primary").pack()
 
 def generate_financial_report():
     report_window = tb.Toplevel(root)
@@ -1722,8 +2502,7 @@ def generate_financial_report():
     summary_frame = tb.Frame(main_frame)
     summary_frame.pack(fill='x', pady=(0, 20))
     
-    cursor.execute("SELECT SUM(total_fees), SUM(fees_paid), SUM(total_fees - fees_paid) FROM students")
-    total, paid, pending = cursor.fetchone()
+    total, paid, pending = core.financial_summary(conn)
     
     stats = [
         ("Total Fees", f"₹{float(total or 0):,.2f}", "info"),
@@ -1751,8 +2530,7 @@ def generate_financial_report():
         tree.heading(col, text=col)
         tree.column(col, width=120)
     
-    cursor.execute("SELECT roll_no, name, total_fees, fees_paid FROM students")
-    for roll, name, total, paid in cursor.fetchall():
+    for roll, name, total, paid in core.student_fees_rows(conn):
         pending = float(total) - float(paid)
         status = "✓ Paid" if pending <= 0 else "⚠ Pending"
         tree.insert("", "end", values=(
@@ -1765,99 +2543,134 @@ def generate_financial_report():
     
     tree.pack(fill='both', expand=True)
 
-# ==================== FEES TAB ====================
-fees_container = tb.Frame(fees_tab)
-fees_container.pack(fill='both', expand=True, padx=20, pady=20)
-
-# Fees Header
-fees_header = tb.Label(fees_container, 
-                      text="💰 Fees Management",
-                      font=("Helvetica", 20, "bold"),
-                      bootstyle="inverse-warning")
-fees_header.pack(pady=(0, 20))
-
-# Fees summary cards
-fees_summary_frame = tb.Frame(fees_container)
-fees_summary_frame.pack(fill='x', pady=(0, 20))
-
-cursor.execute("SELECT SUM(total_fees), SUM(fees_paid), COUNT(*) FROM students WHERE total_fees > fees_paid")
-total_pending_fees, total_paid, pending_count = cursor.fetchone()
-pending_amount = (float(total_pending_fees or 0) - float(total_paid or 0))
+@lazy_tab(reports_tab)
+def build_reports_tab():
+    reports_container = tb.Frame(reports_tab)
+    reports_container.pack(fill='both', expand=True, padx=20, pady=20)
+    
+    # Reports Header
+    rep_header = tb.Label(reports_container, 
+                         text="📈 Reports & Analytics",
+                         font=("Helvetica", 20, "bold"),
+                         bootstyle="inverse-primary")
+    rep_header.pack(pady=(0, 20))
+    
+    # Report Cards
+    report_cards_frame = tb.Frame(reports_container)
+    report_cards_frame.pack(fill='x', pady=(0, 20))
+    
+    create_report_card(report_cards_frame, "📅 Monthly Report",
+                      "View attendance statistics for any month or date range",
+                      generate_monthly_report, "success")
+    
+    create_report_card(report_cards_frame, "⚠️ Expiring Courses",
+                      "Students whose courses are ending soon",
+                      view_expiring_courses, "warning")
+    
+    create_report_card(report_cards_frame, "💰 Financial Report",
+                      "View fees collection and pending payments",
+                      lambda: generate_financial_report(), "info")
+    
+    create_report_card(report_cards_frame, "🗂️ Attendance History",
+                      "Export every attendance record, or a date range, as CSV",
+                      lambda: export_attendance_history(), "secondary")
 
+# ==================== FEES TAB ====================
 fees_stats = [
-    ("Students with Pending Fees", str(pending_count or 0), "warning"),
-    ("Total Pending Amount", f"₹{pending_amount:,.2f}", "danger"),
-    ("Collection Rate", f"{(float(total_paid or 0) / float(total_pending_fees or 1) * 100):.1f}%", "success")
+    ("Students with Pending Fees", lambda stats: str(stats.students_owing), "warning"),
+    ("Total Pending Amount", lambda stats: f"₹{stats.outstanding:,.2f}", "danger"),
+    ("Collection Rate", lambda stats: f"{stats.collection_rate:.1f}%", "success")
 ]
+fees_card_labels = []
 
-for label, value, color in fees_stats:
-    card = tb.Frame(fees_summary_frame, bootstyle=color)
-    card.pack(side='left', fill='both', expand=True, padx=10)
-    inner = tb.Frame(card, bootstyle=color)
-    inner.pack(fill='both', expand=True, padx=15, pady=15)
-    tb.Label(inner, text=value, font=("Helvetica", 24, "bold"),
-            bootstyle=color).pack()
-    tb.Label(inner, text=label, font=("Helvetica", 11),
-            bootstyle=color).pack()
-
-# Pending fees list
-pending_frame = tb.LabelFrame(fees_container, text="Students with Pending Fees", 
-                             padding=20, bootstyle="warning")
-pending_frame.pack(fill='both', expand=True)
-
-pending_tree = ttk.Treeview(pending_frame,
-                           columns=("Roll No", "Name", "Total Fees", "Paid", "Pending", "Action"),
-                           show='headings', height=15)
-
-for col in ("Roll No", "Name", "Total Fees", "Paid", "Pending", "Action"):
-    pending_tree.heading(col, text=col)
-    pending_tree.column(col, width=130)
-
-cursor.execute("""
-    SELECT roll_no, name, total_fees, fees_paid 
-    FROM students 
-    WHERE total_fees > fees_paid
-    ORDER BY (total_fees - fees_paid) DESC
-""")
-
-for roll, name, total, paid in cursor.fetchall():
-    pending = float(total) - float(paid)
-    pending_tree.insert("", "end", values=(
-        roll, name,
-        f"₹{float(total):,.2f}",
-        f"₹{float(paid):,.2f}",
-        f"₹{pending:,.2f}",
-        "Click to Pay"
-    ))
+def update_fees_cards(stats):
+    for value_label, value in fees_card_labels:
+        value_label.config(text=value(stats) if stats.loaded else "…")
 
-pending_tree.pack(fill='both', expand=True)
+def show_pending_fees(rows, error):
+    if error is not None:
+        status_label.config(text=f"Could not load pending fees: {error}")
+        return
+    fees_ui.pending_frame.config(text=f"Students with Pending Fees ({len(rows)})")
+    for roll, name, total, paid in rows:
+        pending = float(total) - float(paid)
+        fees_ui.pending_tree.insert("", "end", values=(
+            roll, name,
+            f"₹{float(total):,.2f}",
+            f"₹{float(paid):,.2f}",
+            f"₹{pending:,.2f}",
+            "Click to Pay"
+        ))
 
 def on_fees_double_click(event):
-    selection = pending_tree.selection()
+    selection = fees_ui.pending_tree.selection()
     if selection:
-        item = pending_tree.item(selection[0])
+        item = fees_ui.pending_tree.item(selection[0])
         roll_no = item['values'][0]
         # Simulate selecting the student and opening fees details
         show_fees_details_direct(roll_no)
 
 def show_fees_details_direct(roll_no):
-    cursor.execute("""
-        SELECT name, email, total_fees, fees_paid, course_end_date 
-        FROM students 
-        WHERE roll_no = ?
-    """, (roll_no,))
-    
-    student_data = cursor.fetchone()
-    if not student_data:
-        messagebox.showerror("Error", "Student not found!")
-        return
-    
-    student_name, email, total_fees, fees_paid, course_end_date = student_data
-    show_fees_details()
-
-pending_tree.bind("<Double-1>", on_fees_double_click)
-
-# Initialize the view
-view_students()
-
-root.mainloop() 
\ No newline at end of file
+    # Treeview hands numeric-looking values back as ints
+    show_fees_details(str(roll_no))
+
+@lazy_tab(fees_tab)
+def build_fees_tab():
+    global fees_ui
+    ui = SimpleNamespace()
+    fees_container = tb.Frame(fees_tab)
+    fees_container.pack(fill='both', expand=True, padx=20, pady=20)
+    
+    # Fees Header
+    fees_header = tb.Label(fees_container, 
+                          text="💰 Fees Management",
+                          font=("Helvetica", 20, "bold"),
+                          bootstyle="inverse-warning")
+    fees_header.pack(pady=(0, 20))
+    
+    # Fees summary cards
+    fees_summary_frame = tb.Frame(fees_container)
+    fees_summary_frame.pack(fill='x', pady=(0, 20))
+    
+    for label, value, color in fees_stats:
+        card = tb.Frame(fees_summary_frame, bootstyle=color)
+        card.pack(side='left', fill='both', expand=True, padx=10)
+        inner = tb.Frame(card, bootstyle=color)
+        inner.pack(fill='both', expand=True, padx=15, pady=15)
+        value_label = tb.Label(inner, text="", font=("Helvetica", 24, "bold"),
+                               bootstyle=color)
+        value_label.pack()
+        tb.Label(inner, text=label, font=("Helvetica", 11),
+                bootstyle=color).pack()
+        fees_card_labels.append((value_label, value))
+    live_stats.subscribe(update_fees_cards)
+    
+    # Pending fees list
+    ui.pending_frame = tb.LabelFrame(fees_container, text="Students with Pending Fees", 
+                                     padding=20, bootstyle="warning")
+    ui.pending_frame.pack(fill='both', expand=True)
+    
+    ui.pending_tree = ttk.Treeview(ui.pending_frame,
+                                   columns=("Roll No", "Name", "Total Fees", "Paid", "Pending", "Action"),
+                                   show='headings', height=15)
+    
+    for col in ("Roll No", "Name", "Total Fees", "Paid", "Pending", "Action"):
+        ui.pending_tree.heading(col, text=col)
+        ui.pending_tree.column(col, width=130)
+    
+    ui.pending_tree.pack(fill='both', expand=True)
+    ui.pending_tree.bind("<Double-1>", on_fees_double_click)
+    
+    fees_ui = ui
+    reader.submit(core.pending_fees_students, key="pending-fees", on_done=show_pending_fees)
+
+def on_close():
+    sound.close()
+    mail_sender.close(timeout=1)
+    reader.close(timeout=1)
+    writer.close(timeout=10)
+    db.close_all()
+    root.destroy()
+
+root.protocol("WM_DELETE_WINDOW", on_close)
+root.mainloop() 
@@ -0,0 +1,62 @@
+"""Headless data and service layer for the Art Class Attendance System.
+
+Everything in this package works on an explicit ``sqlite3`` connection and
+never touches Tk, so scripts, tests and benchmarks can import it without a
+display::
+
+    import attendance_core as core
+
+    conn = core.connect("students_attendance.db")
+    result = core.mark_attendance(conn, "42")
+"""
+from .db import (
+    DEFAULT_DB_PATH, Connection, ConnectionManager, connect, init_schema,
+    migrate, schema_version, column_exists, database_key, transaction, after_commit,
+    is_busy_error, run_with_retry, fts5_trigram_available, has_search_index,
+    rebuild_search_index, rebuild_attendance_summaries, rebuild_fee_balances,
+    rebuild_day_numbers,
+)
+from .dates import parse_form_date, parse_iso_date, day_number, today_iso, today_day
+from .students import (
+    validate_email, validate_phone, validate_fees,
+    STUDENT_LIST_COLUMNS, STUDENT_SORT_COLUMNS, STUDENT_SORTS, STUDENT_STATUSES,
+    EXPIRY_WARNING_DAYS, EXPIRY_URGENT_DAYS, status_filter,
+    add_student, get_student, get_student_fees, list_students, count_students,
+    student_page, search_students, fees_status,
+)
+from .attendance import (
+    MARKED, ALREADY_MARKED, COURSE_ENDED, NOT_FOUND, MarkResult,
+    mark_attendance, mark_attendance_batch, parse_roll_list,
+    attendance_for_date, attendance_since, recent_attendance,
+    student_attendance_history,
+)
+from .roster import RosterEntry, RosterCache, roster_for
+from .writer import WriteJob, WriteQueue
+from .reader import QueryWorker
+from .stats import LiveStats, stats_snapshot
+from .importer import (
+    IMPORT_FIELDS, ImportIssue, ImportReport, validate_student_row,
+    import_students, import_students_csv,
+)
+from .export import (
+    EXPORT_CHUNK_SIZE, ExportCancelled, ExportTask, write_csv, export_query,
+    export_students, export_attendance, export_payments,
+)
+from .payments import (
+    OPENING_BALANCE_METHOD, record_payment, payment_history, is_opening_balance,
+)
+from .config import EMAIL_SETTINGS_FILE, DEFAULT_EMAIL_CONFIG, load_email_config
+from .mail import OutboxSender, queue_email, outbox_counts, retry_failed
+from .sound import SUCCESS, ERROR, TONES, SoundPlayer, load_backend
+from .scanner import (
+    SCAN_IDLE_MS, SCAN_REPEAT_SECONDS, BurstDetector, ScanQueue, scan_repeat_seconds,
+)
+from .profiling import (
+    SLOW_QUERY_MS, SLOW_QUERY_LOG, QueryProfiler, StatementStats, profiler_from_environment,
+)
+from .reports import (
+    dashboard_counts, daily_attendance, month_range, months_between, attendance_report,
+    monthly_attendance, expiring_courses, FEES_REMINDER_DAYS, FEES_REMINDER_MIN_BALANCE,
+    financial_summary, student_fees_rows, pending_fees_summary,
+    pending_fees_students, pending_fee_reminders, student_profile,
+)
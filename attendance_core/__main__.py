@@ -0,0 +1,97 @@
+"""Maintenance commands, run as ``python -m attendance_core <command>``."""
+import argparse
+import sys
+
+from .db import (
+    DEFAULT_DB_PATH, connect, rebuild_attendance_summaries, rebuild_day_numbers,
+    rebuild_fee_balances, rebuild_search_index, run_with_retry, transaction,
+)
+from .config import EMAIL_SETTINGS_FILE, load_email_config
+from .mail import OutboxSender, outbox_counts, retry_failed
+
+
+def _rebuild_summaries(conn, args):
+    with transaction(conn):
+        rebuild_attendance_summaries(conn)
+    days = conn.execute("SELECT COUNT(*) FROM daily_attendance_summary").fetchone()[0]
+    print(f"Rebuilt attendance summaries for {days} days")
+
+
+def _rebuild_search(conn, args):
+    with transaction(conn):
+        rebuild_search_index(conn)
+    print("Rebuilt the student search index")
+
+
+def _rebuild_balances(conn, args):
+    with transaction(conn):
+        rebuild_fee_balances(conn)
+    print("Reset every student's fees paid to the sum of their payments")
+
+
+def _rebuild_days(conn, args):
+    with transaction(conn):
+        rebuild_day_numbers(conn)
+    print("Recomputed the course end day numbers")
+
+
+def _outbox(conn, args):
+    counts = outbox_counts(conn)
+    print(", ".join(f"{count} {status}" for status, count in counts.items()))
+    for recipient, subject, attempts, error in conn.execute('''
+        SELECT recipient, subject, attempts, last_error FROM email_outbox
+        WHERE status = 'failed' ORDER BY id DESC LIMIT 20
+    '''):
+        print(f"  failed after {attempts} attempt(s): {recipient} \"{subject}\": {error}")
+
+
+def _send_mail(conn, args):
+    # Sends even when email is disabled for the GUI, e.g. to try the
+    # settings against a local test server first
+    with transaction(conn):
+        retried = retry_failed(conn) if args.retry_failed else 0
+    sender = OutboxSender(conn.path, load_email_config(args.settings))
+    sent = sender.send_due(conn)
+    if retried:
+        print(f"Re-queued {retried} failed message(s)")
+    print(f"Sent {sent} message(s); {sender.counts['pending']} pending, "
+          f"{sender.counts['failed']} failed")
+    if sender.last_error:
+        print(f"Last error: {sender.last_error}")
+
+
+# name -> (handler, help)
+COMMANDS = {
+    "rebuild-summaries": (_rebuild_summaries, "recount the daily and monthly attendance summaries"),
+    "rebuild-search": (_rebuild_search, "re-index students for search (e.g. after VACUUM)"),
+    "rebuild-balances": (_rebuild_balances, "recompute fees paid from the payments ledger"),
+    "rebuild-days": (_rebuild_days, "recompute day numbers from the ISO date columns"),
+    "outbox": (_outbox, "count queued, sent and failed emails"),
+    "send-mail": (_send_mail, "send every email that is due now"),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m attendance_core",
+                                     description="Art Class Attendance System maintenance")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="database file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        commands.add_parser(name, help=help_text)
+    send_mail = commands.choices["send-mail"]
+    send_mail.add_argument("--settings", default=EMAIL_SETTINGS_FILE,
+                           help="email settings file (default: %(default)s)")
+    send_mail.add_argument("--retry-failed", action="store_true",
+                           help="first re-queue messages that gave up")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    try:
+        run_with_retry(COMMANDS[args.command][0], conn, args)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Marking and listing attendance."""
+import re
+from collections import namedtuple
+from datetime import date as date_type
+
+from .dates import parse_iso_date, today_iso
+from .db import transaction
+from .roster import roster_for
+
+# Outcomes of a mark request
+MARKED = "marked"
+ALREADY_MARKED = "already_marked"
+COURSE_ENDED = "course_ended"
+NOT_FOUND = "not_found"
+
+MarkResult = namedtuple("MarkResult", "status roll_no name")
+
+# Roll numbers per IN (...) query, well under SQLite's bound-parameter limit
+BATCH_CHUNK_SIZE = 500
+
+
+def mark_attendance(conn, roll_no, date=None):
+    """Mark ``roll_no`` present on ``date`` (ISO, default today).
+
+    Returns a ``MarkResult`` whose ``status`` is one of ``MARKED``,
+    ``ALREADY_MARKED``, ``COURSE_ENDED`` or ``NOT_FOUND``. The student is
+    resolved from the in-memory roster, and the duplicate check and the
+    insert are a single statement against the unique ``(roll_no, date)``
+    index, so two kiosks cannot both mark the same student for the same day.
+    """
+    if date:
+        day = parse_iso_date(date)
+    else:
+        day = date_type.today()
+        date = day.isoformat()
+
+    student = roster_for(conn).lookup(conn, roll_no)
+    if student is None:
+        return MarkResult(NOT_FOUND, roll_no, None)
+
+    name = student.name
+    if student.expired_on(day.toordinal()):
+        return MarkResult(COURSE_ENDED, roll_no, name)
+
+    with transaction(conn):
+        inserted = conn.execute(
+            'INSERT OR IGNORE INTO attendance (roll_no, name, date, status) VALUES (?, ?, ?, ?)',
+            (roll_no, name, date, "Present")).rowcount
+    return MarkResult(MARKED if inserted else ALREADY_MARKED, roll_no, name)
+
+
+def parse_roll_list(text):
+    """Split pasted register text into roll numbers.
+
+    Accepts one roll number per line or values separated by commas,
+    semicolons or whitespace.
+    """
+    return [token for token in re.split(r"[\s,;]+", text) if token]
+
+
+def mark_attendance_batch(conn, roll_nos, date=None):
+    """Mark many roll numbers present on ``date`` in one transaction.
+
+    Returns one ``MarkResult`` per distinct roll number, in input order.
+    Students come from the in-memory roster and existing marks are detected
+    with a handful of ``IN (...)`` queries, then every new row is written
+    with a single ``executemany`` and one commit.
+    """
+    date = date or today_iso()
+    day_ordinal = parse_iso_date(date).toordinal()
+    wanted = list(dict.fromkeys(r.strip() for r in roll_nos if r and r.strip()))
+    roster = roster_for(conn)
+
+    results = {}
+    rows = []
+    with transaction(conn):
+        for start in range(0, len(wanted), BATCH_CHUNK_SIZE):
+            chunk = wanted[start:start + BATCH_CHUNK_SIZE]
+            marks = ",".join("?" * len(chunk))
+            already = {
+                roll_no for (roll_no,) in conn.execute(
+                    f"SELECT roll_no FROM attendance WHERE date = ? AND roll_no IN ({marks})",
+                    [date] + chunk)
+            }
+
+            for roll_no in chunk:
+                student = roster.lookup(conn, roll_no)
+                if student is None:
+                    results[roll_no] = MarkResult(NOT_FOUND, roll_no, None)
+                    continue
+                name = student.name
+                if roll_no in already:
+                    results[roll_no] = MarkResult(ALREADY_MARKED, roll_no, name)
+                elif student.expired_on(day_ordinal):
+                    results[roll_no] = MarkResult(COURSE_ENDED, roll_no, name)
+                else:
+                    results[roll_no] = MarkResult(MARKED, roll_no, name)
+                    rows.append((roll_no, name, date, "Present"))
+
+        conn.executemany(
+            'INSERT OR IGNORE INTO attendance (roll_no, name, date, status) VALUES (?, ?, ?, ?)',
+            rows)
+    return [results[roll_no] for roll_no in wanted]
+
+
+def attendance_for_date(conn, date=None):
+    """Return ``(roll_no, name, date, status)`` rows for one day."""
+    return conn.execute("SELECT roll_no, name, date, status FROM attendance WHERE date = ?",
+                        (date or today_iso(),)).fetchall()
+
+
+def attendance_since(conn, date=None, after_rowid=0):
+    """Return ``(rowid, roll_no, name, date, status)`` rows for one day that
+    were added after ``after_rowid``, oldest first.
+
+    Callers keep the last rowid they have seen as a watermark so each
+    refresh only reads the new rows (an index range on ``(date, rowid)``).
+    """
+    return conn.execute("""
+        SELECT rowid, roll_no, name, date, status
+        FROM attendance
+        WHERE date = ? AND rowid > ?
+        ORDER BY rowid
+    """, (date or today_iso(), after_rowid)).fetchall()
+
+
+def recent_attendance(conn, limit=10):
+    """Return the latest ``(date, name, roll_no)`` attendance rows."""
+    return conn.execute("""
+        SELECT date, name, roll_no
+        FROM attendance
+        ORDER BY date DESC, rowid DESC
+        LIMIT ?
+    """, (limit,)).fetchall()
+
+
+def student_attendance_history(conn, roll_no, limit=10):
+    """Return the latest ``(date, status)`` rows for one student."""
+    return conn.execute("""
+        SELECT date, status
+        FROM attendance
+        WHERE roll_no = ?
+        ORDER BY date DESC
+        LIMIT ?
+    """, (roll_no, limit)).fetchall()
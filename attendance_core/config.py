@@ -0,0 +1,44 @@
+"""Settings that differ between installations.
+
+Email is configured in ``email_settings.json`` next to the application; any
+key left out keeps its default below. The SMTP password can instead come
+from the ``ATTENDANCE_SMTP_PASSWORD`` environment variable so it need not
+be stored in the file.
+"""
+import json
+import os
+
+EMAIL_SETTINGS_FILE = "email_settings.json"
+SMTP_PASSWORD_ENV = "ATTENDANCE_SMTP_PASSWORD"
+
+DEFAULT_EMAIL_CONFIG = {
+    "enabled": False,
+    "sender_email": "your-email@gmail.com",
+    "username": None,  # Defaults to sender_email
+    "password": "",
+    "smtp_server": "smtp.gmail.com",
+    "smtp_port": 587,
+    "use_tls": True,  # STARTTLS after connecting
+    "timeout": 30,
+    "messages_per_minute": 30,
+    "batch_size": 20,  # Messages sent per SMTP connection
+    "max_attempts": 5,
+    "retry_seconds": 60,  # First retry delay; doubles with each attempt
+}
+
+
+def load_email_config(path=EMAIL_SETTINGS_FILE):
+    """Return the email settings, with ``path`` (if it exists) over the defaults."""
+    config = dict(DEFAULT_EMAIL_CONFIG)
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            settings = json.load(f)
+        unknown = set(settings) - set(config)
+        if unknown:
+            raise ValueError(f"Unknown email setting(s) in {path}: {', '.join(sorted(unknown))}")
+        config.update(settings)
+    if os.environ.get(SMTP_PASSWORD_ENV):
+        config["password"] = os.environ[SMTP_PASSWORD_ENV]
+    if not config["username"]:
+        config["username"] = config["sender_email"]
+    return config
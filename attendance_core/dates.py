@@ -0,0 +1,42 @@
+"""Date helpers shared by the service layer and the GUI.
+
+Dates are stored as ISO ``YYYY-MM-DD`` text and entered in forms as
+``DD/MM/YYYY``. Where a listing needs date arithmetic the database also
+keeps day numbers (``date.toordinal()`` values), so the rest of the code
+rarely parses; when it does, ``parse_iso_date`` is memoized because the
+same few hundred dates come up again and again.
+"""
+from datetime import date, datetime
+from functools import lru_cache
+
+ISO_FORMAT = "%Y-%m-%d"
+FORM_FORMAT = "%d/%m/%Y"
+DATE_CACHE_SIZE = 4096
+
+
+def today_iso():
+    return datetime.now().strftime(ISO_FORMAT)
+
+
+def today_day():
+    """Today's day number, comparable with the ``*_day`` columns."""
+    return date.today().toordinal()
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_iso_date(value):
+    """Parse a stored ``YYYY-MM-DD`` string into a ``date``."""
+    return date.fromisoformat(value)
+
+
+def day_number(value):
+    """Day number of an ISO date string, or None for a missing date."""
+    return parse_iso_date(value).toordinal() if value else None
+
+
+def parse_form_date(value):
+    """Convert a ``DD/MM/YYYY`` form value to the stored ISO format.
+
+    Raises ``ValueError`` if the value is not a valid date.
+    """
+    return datetime.strptime(value, FORM_FORMAT).strftime(ISO_FORMAT)
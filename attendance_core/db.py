@@ -0,0 +1,597 @@
+"""SQLite connection management and schema setup.
+
+Several kiosks (and the GUI's worker threads) share one database file, so
+every connection runs in WAL mode with a busy timeout: readers such as
+reports no longer block attendance writers, and a writer that finds the
+database locked waits instead of failing. ``run_with_retry`` adds a few
+backed-off retries on top for the rare ``database is locked`` that still
+gets through. ``ConnectionManager`` hands each thread its own connection.
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_DB_PATH = "students_attendance.db"
+
+# WAL needs every process to be on the same machine as the database file.
+# For a database on a network share use "DELETE" (the classic rollback
+# journal) instead; busy handling and retries still apply.
+JOURNAL_MODE = "WAL"
+BUSY_TIMEOUT_MS = 5000
+BUSY_RETRIES = 5
+BUSY_BACKOFF_SECONDS = 0.05
+
+
+class Connection(sqlite3.Connection):
+    """``sqlite3.Connection`` that remembers which database file it opened.
+
+    ``path`` identifies the database for process-wide caches that are shared
+    by every connection to the same file. ``commit_callbacks`` are the
+    ``after_commit`` callbacks waiting on the open transaction.
+    """
+
+    def __init__(self, database, *args, **kwargs):
+        super().__init__(database, *args, **kwargs)
+        database = os.fsdecode(database)
+        if database in ("", ":memory:") or database.startswith("file:"):
+            self.path = f"{database or ':temp:'}#{id(self)}"
+        else:
+            self.path = os.path.abspath(database)
+        self.commit_callbacks = []
+
+    def commit(self):
+        super().commit()
+        callbacks, self.commit_callbacks = self.commit_callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def rollback(self):
+        self.commit_callbacks = []
+        super().rollback()
+
+
+def database_key(conn):
+    """Return a key identifying the database behind ``conn``."""
+    path = getattr(conn, "path", None)
+    if path is None:
+        for _, name, filename in conn.execute("PRAGMA database_list"):
+            if name == "main":
+                path = filename or f":memory:#{id(conn)}"
+    return path
+
+
+def column_exists(conn, table, column):
+    """Return True if ``table`` already has ``column``."""
+    rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    return any(row[1] == column for row in rows)
+
+
+def _unique_attendance_per_day(conn):
+    # Keep the earliest row of any (roll_no, date) pair marked twice
+    conn.execute("""
+        DELETE FROM attendance
+        WHERE rowid NOT IN (SELECT MIN(rowid) FROM attendance GROUP BY roll_no, date)
+    """)
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_roll_date ON attendance(roll_no, date)")
+
+
+def _index_attendance_date(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance(date)")
+
+
+def _index_student_sorts(conn):
+    # One index per sortable list column, matching the expressions in
+    # students.STUDENT_SORTS so ORDER BY and keyset seeks never sort in memory.
+    # roll_no is the tie-breaker that makes every key unique.
+    for name, expression in [
+        ("roll_no", "CAST(roll_no AS INTEGER), roll_no"),
+        ("name", "name COLLATE NOCASE, roll_no"),
+        ("phone", "phone, roll_no"),
+        ("dob", "dob, roll_no"),
+        ("course_start_date", "course_start_date, roll_no"),
+        ("course_end_date", "course_end_date, roll_no"),
+    ]:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_students_{name} ON students({expression})")
+
+
+def fts5_trigram_available(conn):
+    """True if this SQLite build has FTS5 with the trigram tokenizer."""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._trigram_probe USING fts5(x, tokenize='trigram')")
+    except sqlite3.OperationalError:
+        return False
+    conn.execute("DROP TABLE temp._trigram_probe")
+    return True
+
+
+def _students_search_index(conn):
+    # Trigram full-text index over the searchable student columns, kept in
+    # step with students by triggers. Without FTS5 search falls back to LIKE.
+    if not fts5_trigram_available(conn):
+        return
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+            roll_no, name, phone,
+            content='students', content_rowid='rowid', tokenize='trigram'
+        )''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON students BEGIN
+            INSERT INTO students_fts(rowid, roll_no, name, phone)
+            VALUES (new.rowid, new.roll_no, new.name, new.phone);
+        END''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON students BEGIN
+            INSERT INTO students_fts(students_fts, rowid, roll_no, name, phone)
+            VALUES ('delete', old.rowid, old.roll_no, old.name, old.phone);
+        END''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS students_fts_update
+        AFTER UPDATE OF roll_no, name, phone ON students BEGIN
+            INSERT INTO students_fts(students_fts, rowid, roll_no, name, phone)
+            VALUES ('delete', old.rowid, old.roll_no, old.name, old.phone);
+            INSERT INTO students_fts(rowid, roll_no, name, phone)
+            VALUES (new.rowid, new.roll_no, new.name, new.phone);
+        END''')
+    rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn):
+    """Re-index every student for search.
+
+    Needed after a VACUUM, which may renumber the rowids the index uses.
+    """
+    if has_search_index(conn):
+        conn.execute("INSERT INTO students_fts(students_fts) VALUES ('rebuild')")
+
+
+def _attendance_summaries(conn):
+    # Running counts of attendance per day and per student per month, so the
+    # dashboard, profiles and reports read a few summary rows instead of
+    # re-aggregating every attendance row ever written
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS daily_attendance_summary (
+            date TEXT PRIMARY KEY,
+            present INTEGER NOT NULL
+        ) WITHOUT ROWID''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS student_month_attendance (
+            roll_no TEXT,
+            month TEXT,
+            present INTEGER NOT NULL,
+            PRIMARY KEY (roll_no, month)
+        ) WITHOUT ROWID''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS attendance_summary_insert AFTER INSERT ON attendance BEGIN
+            INSERT INTO daily_attendance_summary (date, present) VALUES (new.date, 1)
+            ON CONFLICT (date) DO UPDATE SET present = present + 1;
+            INSERT INTO student_month_attendance (roll_no, month, present)
+            VALUES (new.roll_no, substr(new.date, 1, 7), 1)
+            ON CONFLICT (roll_no, month) DO UPDATE SET present = present + 1;
+        END''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS attendance_summary_delete AFTER DELETE ON attendance BEGIN
+            UPDATE daily_attendance_summary SET present = present - 1 WHERE date = old.date;
+            DELETE FROM daily_attendance_summary WHERE date = old.date AND present <= 0;
+            UPDATE student_month_attendance SET present = present - 1
+            WHERE roll_no = old.roll_no AND month = substr(old.date, 1, 7);
+            DELETE FROM student_month_attendance
+            WHERE roll_no = old.roll_no AND month = substr(old.date, 1, 7) AND present <= 0;
+        END''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS attendance_summary_update
+        AFTER UPDATE OF roll_no, date ON attendance BEGIN
+            UPDATE daily_attendance_summary SET present = present - 1 WHERE date = old.date;
+            DELETE FROM daily_attendance_summary WHERE date = old.date AND present <= 0;
+            UPDATE student_month_attendance SET present = present - 1
+            WHERE roll_no = old.roll_no AND month = substr(old.date, 1, 7);
+            DELETE FROM student_month_attendance
+            WHERE roll_no = old.roll_no AND month = substr(old.date, 1, 7) AND present <= 0;
+            INSERT INTO daily_attendance_summary (date, present) VALUES (new.date, 1)
+            ON CONFLICT (date) DO UPDATE SET present = present + 1;
+            INSERT INTO student_month_attendance (roll_no, month, present)
+            VALUES (new.roll_no, substr(new.date, 1, 7), 1)
+            ON CONFLICT (roll_no, month) DO UPDATE SET present = present + 1;
+        END''')
+    rebuild_attendance_summaries(conn)
+
+
+def rebuild_attendance_summaries(conn):
+    """Recount the attendance summary tables from the attendance table.
+
+    The triggers keep them current; run this after restoring or bulk
+    editing the attendance table by other means, or if the counts are ever
+    in doubt.
+    """
+    conn.execute("DELETE FROM daily_attendance_summary")
+    conn.execute('''
+        INSERT INTO daily_attendance_summary (date, present)
+        SELECT date, COUNT(*) FROM attendance GROUP BY date''')
+    conn.execute("DELETE FROM student_month_attendance")
+    conn.execute('''
+        INSERT INTO student_month_attendance (roll_no, month, present)
+        SELECT roll_no, substr(date, 1, 7), COUNT(*) FROM attendance
+        GROUP BY roll_no, substr(date, 1, 7)''')
+
+
+# Method of the ledger entries the payments migration makes up for fees
+# paid before payments were logged; they are not real payments
+OPENING_BALANCE_METHOD = "Opening Balance"
+
+
+def _payments_ledger(conn):
+    # The payments table becomes the ledger and students.fees_paid its
+    # running total, maintained by triggers. Any difference between the two
+    # (fees paid at registration, or payments made before they were logged)
+    # is first recorded as an opening-balance entry so no balance changes.
+    # Amounts are compared in whole paise so float noise adds no entries.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_payments_roll_date ON payments(roll_no, payment_date)")
+    conn.execute('''
+        INSERT INTO payments (roll_no, amount, payment_date, method)
+        SELECT s.roll_no,
+               ROUND(IFNULL(s.fees_paid, 0) - IFNULL(p.paid, 0), 2),
+               IFNULL(s.course_start_date, date('now', 'localtime')),
+               ?
+        FROM students s
+        LEFT JOIN (SELECT roll_no, SUM(amount) AS paid FROM payments GROUP BY roll_no) p
+               ON p.roll_no = s.roll_no
+        WHERE CAST(ROUND(IFNULL(s.fees_paid, 0) * 100) AS INTEGER)
+              != CAST(ROUND(IFNULL(p.paid, 0) * 100) AS INTEGER)
+    ''', (OPENING_BALANCE_METHOD,))
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS payments_balance_insert AFTER INSERT ON payments BEGIN
+            UPDATE students SET fees_paid = IFNULL(fees_paid, 0) + new.amount
+            WHERE roll_no = new.roll_no;
+        END''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS payments_balance_delete AFTER DELETE ON payments BEGIN
+            UPDATE students SET fees_paid = IFNULL(fees_paid, 0) - old.amount
+            WHERE roll_no = old.roll_no;
+        END''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS payments_balance_update
+        AFTER UPDATE OF roll_no, amount ON payments BEGIN
+            UPDATE students SET fees_paid = IFNULL(fees_paid, 0) - old.amount
+            WHERE roll_no = old.roll_no;
+            UPDATE students SET fees_paid = IFNULL(fees_paid, 0) + new.amount
+            WHERE roll_no = new.roll_no;
+        END''')
+
+
+def rebuild_fee_balances(conn):
+    """Reset every student's ``fees_paid`` to the sum of their payments."""
+    conn.execute('''
+        UPDATE students
+        SET fees_paid = (SELECT IFNULL(SUM(amount), 0) FROM payments
+                         WHERE payments.roll_no = students.roll_no)
+    ''')
+
+
+def _email_outbox(conn):
+    # Outgoing email is queued here and sent by a background sender. A
+    # message with a dedupe_key is queued at most once (e.g. one fees
+    # reminder per student per day); pending rows are found by due time.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recipient TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            dedupe_key TEXT UNIQUE,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            next_attempt_at TEXT NOT NULL DEFAULT (datetime('now')),
+            sent_at TEXT,
+            last_error TEXT
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox(status, next_attempt_at)")
+
+
+def _index_fee_balances(conn):
+    # Outstanding balance, for the pending fees list (largest first), and a
+    # partial index on course end date covering only students who owe, for
+    # fees reminders. Expiring courses use idx_students_course_end_date.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_students_balance ON students((total_fees - fees_paid))")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_students_owing_end_date
+        ON students(course_end_date, roll_no) WHERE total_fees > fees_paid
+    ''')
+
+
+# Day number (Python's date.toordinal()) of an ISO date column, in SQL
+DAY_NUMBER_SQL = "CAST(julianday({}) - 1721424.5 AS INTEGER)"
+
+
+def _date_day_numbers(conn):
+    # students.course_end_day mirrors course_end_date as a day number, so
+    # lists and the roster work out days left by subtraction instead of
+    # parsing a date per row. Triggers keep it in step with every writer.
+    if not column_exists(conn, "students", "course_end_day"):
+        conn.execute("ALTER TABLE students ADD COLUMN course_end_day INTEGER")
+    end_day = DAY_NUMBER_SQL.format("new.course_end_date")
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS students_end_day_insert AFTER INSERT ON students BEGIN
+            UPDATE students SET course_end_day = {end_day} WHERE rowid = new.rowid;
+        END''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS students_end_day_update
+        AFTER UPDATE OF course_end_date ON students BEGIN
+            UPDATE students SET course_end_day = {end_day} WHERE rowid = new.rowid;
+        END''')
+    rebuild_day_numbers(conn)
+
+
+def rebuild_day_numbers(conn):
+    """Recompute every ``*_day`` column from its ISO date."""
+    conn.execute(f"UPDATE students SET course_end_day = {DAY_NUMBER_SQL.format('course_end_date')}")
+
+
+def _index_nullable_student_sorts(conn):
+    # The nullable list columns now sort on IFNULL(column, ''), since a NULL
+    # key never satisfies a keyset seek. The plain phone and course end date
+    # indexes stay for prefix search and the status filters.
+    conn.execute("DROP INDEX IF EXISTS idx_students_dob")
+    conn.execute("DROP INDEX IF EXISTS idx_students_course_start_date")
+    for name in ("phone", "dob", "course_start_date", "course_end_date"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_students_{name}_key "
+                     f"ON students(IFNULL({name}, ''), roll_no)")
+
+
+def has_search_index(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'students_fts'"
+    ).fetchone() is not None
+
+
+# One-time migrations, applied in order. The database's PRAGMA user_version
+# records how many have already run, so append new steps at the end.
+MIGRATIONS = [
+    _unique_attendance_per_day,
+    _index_attendance_date,
+    _index_student_sorts,
+    _students_search_index,
+    _attendance_summaries,
+    _payments_ledger,
+    _email_outbox,
+    _index_fee_balances,
+    _date_day_numbers,
+    _index_nullable_student_sorts,
+]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Run any migrations this database has not seen yet."""
+    while schema_version(conn) < len(MIGRATIONS):
+        with transaction(conn):
+            # Re-read under the write lock in case another kiosk got here first
+            version = schema_version(conn)
+            if version < len(MIGRATIONS):
+                MIGRATIONS[version](conn)
+                conn.execute(f"PRAGMA user_version = {version + 1}")
+
+
+def init_schema(conn):
+    """Create the tables, adding columns introduced by later versions."""
+    with transaction(conn):
+        _create_base_tables(conn)
+    migrate(conn)
+
+
+def _create_base_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS Students (
+            roll_no TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            phone TEXT,
+            dob TEXT,
+            course_start_date TEXT,
+            course_end_date TEXT
+        )''')
+
+    # Add new columns if they don't exist
+    new_columns = [
+        ("email", "TEXT"),
+        ("fees_paid", "REAL DEFAULT 0"),
+        ("total_fees", "REAL DEFAULT 0")
+    ]
+
+    for col_name, col_type in new_columns:
+        if not column_exists(conn, "Students", col_name):
+            conn.execute(f"ALTER TABLE Students ADD COLUMN {col_name} {col_type}")
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS attendance (
+            roll_no TEXT,
+            name TEXT,
+            date TEXT,
+            status TEXT,
+            FOREIGN KEY(roll_no) REFERENCES students(roll_no)
+        )''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            roll_no TEXT,
+            amount REAL,
+            payment_date TEXT,
+            method TEXT,
+            recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(roll_no) REFERENCES students(roll_no)
+        )''')
+
+
+@contextmanager
+def transaction(conn):
+    """Run the block as one transaction and commit once at the end.
+
+    Inside an already open transaction the block becomes a savepoint, so
+    service functions can be composed into a larger unit of work and only
+    the outermost caller pays for the commit.
+    """
+    callbacks = getattr(conn, "commit_callbacks", [])
+    if conn.in_transaction:
+        registered = len(callbacks)
+        conn.execute("SAVEPOINT nested")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK TO nested")
+            conn.execute("RELEASE nested")
+            del callbacks[registered:]
+            raise
+        conn.execute("RELEASE nested")
+        return
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        # Also when the commit itself fails, so a retry starts afresh
+        if conn.in_transaction:
+            conn.rollback()
+        else:
+            del callbacks[:]
+        raise
+
+
+def after_commit(conn, callback):
+    """Call ``callback()`` once the open transaction on ``conn`` commits, or
+    straight away if none is open.
+
+    The callback is dropped if the transaction, or the savepoint that was
+    open when it was registered, is rolled back. Use it to update
+    process-wide caches only with changes that were actually saved.
+    """
+    callbacks = getattr(conn, "commit_callbacks", None)
+    if callbacks is None or not conn.in_transaction:
+        callback()
+    else:
+        callbacks.append(callback)
+
+
+def is_busy_error(error):
+    """True for the ``database is locked`` / ``busy`` family of errors."""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def run_with_retry(func, *args, retries=BUSY_RETRIES, backoff=BUSY_BACKOFF_SECONDS, **kwargs):
+    """Call ``func``, retrying with jittered exponential backoff while the
+    database is busy."""
+    for attempt in range(retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if attempt == retries or not is_busy_error(e):
+                raise
+            time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+
+def connect(path=DEFAULT_DB_PATH, setup=True, journal_mode=None, busy_timeout_ms=BUSY_TIMEOUT_MS,
+            profiler=None):
+    """Open ``path`` ready for concurrent use.
+
+    The connection gets a busy timeout and, for file databases, the
+    configured journal mode. With ``setup`` the schema is also brought up
+    to date. Pass a ``profiling.QueryProfiler`` to time every statement.
+    """
+    factory = profiler.connection_class if profiler is not None else Connection
+    conn = sqlite3.connect(path, timeout=busy_timeout_ms / 1000, factory=factory)
+    if profiler is not None:
+        conn.profiler = profiler
+    conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+    journal_mode = journal_mode or JOURNAL_MODE
+    if not conn.path.startswith((":memory:", ":temp:", "file:")):
+        run_with_retry(conn.execute, f"PRAGMA journal_mode = {journal_mode}")
+        if journal_mode.upper() == "WAL":
+            # Safe with WAL: a power cut can lose the last commits but never corrupts
+            conn.execute("PRAGMA synchronous = NORMAL")
+    if setup:
+        run_with_retry(init_schema, conn)
+    return conn
+
+
+class ConnectionManager:
+    """Gives every thread its own connection to one database.
+
+    SQLite connections must not be shared between threads, so the GUI
+    thread, the writer and any report or export workers each call
+    ``connection()`` and get a connection of their own. The schema is set
+    up once, by the first connection; threads connecting meanwhile wait
+    for it to finish.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, journal_mode=None, busy_timeout_ms=BUSY_TIMEOUT_MS,
+                 profiler=None):
+        self.path = path
+        self.journal_mode = journal_mode
+        self.busy_timeout_ms = busy_timeout_ms
+        self.profiler = profiler
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._setup_lock = threading.Lock()
+        self._connections = []
+        self._schema_ready = False
+
+    def connect(self):
+        """Open a new connection that the caller owns and must close."""
+        if not self._schema_ready:
+            # Other threads wait here until the schema is up to date; if
+            # setting it up fails, the next connection tries again
+            with self._setup_lock:
+                if not self._schema_ready:
+                    conn = self._open(setup=True)
+                    self._schema_ready = True
+                    return conn
+        return self._open(setup=False)
+
+    def _open(self, setup):
+        return connect(self.path, setup=setup, journal_mode=self.journal_mode,
+                       busy_timeout_ms=self.busy_timeout_ms, profiler=self.profiler)
+
+    def connection(self):
+        """Return the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self.connect()
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def run(self, func, *args, **kwargs):
+        """Call ``func(conn, *args, **kwargs)`` on this thread's connection,
+        retrying while the database is busy."""
+        return run_with_retry(func, self.connection(), *args, **kwargs)
+
+    def close_thread_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            with self._lock:
+                self._connections.remove(conn)
+            conn.close()
+
+    def close_all(self):
+        """Close every connection handed out. Call from the thread that owns
+        each one, or at shutdown once worker threads have stopped."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass  # Owned by another thread that is still running
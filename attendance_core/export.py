@@ -0,0 +1,193 @@
+"""Streaming CSV exports.
+
+Rows are pulled from the cursor ``EXPORT_CHUNK_SIZE`` at a time and written
+straight out, so exporting years of attendance uses the same memory as
+exporting a day. Files ending in ``.gz`` are gzip-compressed. Output goes
+to a temporary file next to the target and is renamed into place only once
+complete, so a cancelled or failed export never leaves a half-written file.
+
+``ExportTask`` runs an export on a background thread with its own
+connection, exposing progress and a ``cancel()`` for the GUI to poll.
+"""
+import csv
+import gzip
+import os
+import threading
+
+from .db import DEFAULT_DB_PATH, ConnectionManager, connect
+
+EXPORT_CHUNK_SIZE = 1000
+
+STUDENT_EXPORT_HEADERS = ["Roll No", "Name", "Phone", "DOB", "Start Date", "End Date",
+                          "Email", "Fees Paid", "Total Fees"]
+ATTENDANCE_EXPORT_HEADERS = ["Roll No", "Name", "Date", "Status"]
+PAYMENT_EXPORT_HEADERS = ["Roll No", "Date", "Amount", "Payment Method"]
+
+
+class ExportCancelled(Exception):
+    """Raised when an export is cancelled part-way through."""
+
+
+def _open_output(path, compress):
+    if compress:
+        # Level 6 is several times faster than the default 9 for CSV and
+        # only a few percent larger
+        return gzip.open(path, "wt", compresslevel=6, newline="", encoding="utf-8")
+    return open(path, "w", newline="", encoding="utf-8")
+
+
+def write_csv(filename, headers, rows, total=None, progress=None, cancel=None, compress=None):
+    """Write ``headers`` and an iterable of ``rows`` to ``filename``.
+
+    ``progress(written, total)`` is called after every chunk; setting the
+    ``cancel`` event stops the export with ``ExportCancelled``. ``compress``
+    defaults to whether ``filename`` ends in ``.gz``. Returns the number of
+    rows written.
+    """
+    if compress is None:
+        compress = filename.lower().endswith(".gz")
+    partial = f"{filename}.part"
+    written = 0
+    try:
+        with _open_output(partial, compress) as f:
+            out = csv.writer(f)
+            out.writerow(headers)
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= EXPORT_CHUNK_SIZE:
+                    written = _write_chunk(out, chunk, written, total, progress, cancel)
+                    chunk = []
+            written = _write_chunk(out, chunk, written, total, progress, cancel)
+        os.replace(partial, filename)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return written
+
+
+def _write_chunk(out, chunk, written, total, progress, cancel):
+    if cancel is not None and cancel.is_set():
+        raise ExportCancelled()
+    out.writerows(chunk)
+    written += len(chunk)
+    if progress is not None:
+        progress(written, total)
+    return written
+
+
+def iter_query(conn, sql, params=()):
+    """Yield the rows of a query, fetching ``EXPORT_CHUNK_SIZE`` at a time."""
+    cursor = conn.execute(sql, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def export_query(conn, filename, headers, sql, params=(), total=None, **options):
+    """Stream the results of a query into a CSV file. See ``write_csv``."""
+    rows = iter_query(conn, sql, params)
+    try:
+        return write_csv(filename, headers, rows, total=total, **options)
+    finally:
+        rows.close()  # Release the cursor now, even if the export stopped early
+
+
+def export_students(conn, filename, **options):
+    total = conn.execute("SELECT COUNT(*) FROM students").fetchone()[0]
+    return export_query(conn, filename, STUDENT_EXPORT_HEADERS, """
+        SELECT roll_no, name, phone, dob, course_start_date, course_end_date,
+               email, fees_paid, total_fees
+        FROM students
+        ORDER BY roll_no
+    """, total=total, **options)
+
+
+def export_attendance(conn, filename, start=None, end=None, **options):
+    """Export attendance between two ISO dates (either may be None), by date."""
+    start = start or "0000-00-00"
+    end = end or "9999-99-99"
+    # The summary table gives the row count without touching attendance
+    total = conn.execute(
+        "SELECT IFNULL(SUM(present), 0) FROM daily_attendance_summary WHERE date BETWEEN ? AND ?",
+        (start, end)).fetchone()[0]
+    return export_query(conn, filename, ATTENDANCE_EXPORT_HEADERS, """
+        SELECT roll_no, name, date, status
+        FROM attendance
+        WHERE date BETWEEN ? AND ?
+        ORDER BY date, roll_no
+    """, (start, end), total=total, **options)
+
+
+def export_payments(conn, filename, roll_no=None, **options):
+    """Export every payment, or one student's, oldest first."""
+    where, params = ("WHERE roll_no = ?", (roll_no,)) if roll_no is not None else ("", ())
+    total = conn.execute(f"SELECT COUNT(*) FROM payments {where}", params).fetchone()[0]
+    return export_query(conn, filename, PAYMENT_EXPORT_HEADERS, f"""
+        SELECT roll_no, payment_date, amount, method
+        FROM payments
+        {where}
+        ORDER BY payment_date, id
+    """, params, total=total, **options)
+
+
+class ExportTask:
+    """Runs ``func(conn, filename, *args, **kwargs)`` on its own thread.
+
+    ``func`` is one of the ``export_*`` functions. ``written``/``total``
+    track progress; once ``done`` is set, ``error`` holds any failure
+    (an ``ExportCancelled`` after ``cancel()``).
+    """
+
+    def __init__(self, func, filename, *args, db=DEFAULT_DB_PATH, **kwargs):
+        self.func = func
+        self.filename = filename
+        self.args = args
+        self.kwargs = kwargs
+        self.db = db
+        self.written = 0
+        self.total = None
+        self.error = None
+        self.done = False
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="attendance-export",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return isinstance(self.error, ExportCancelled)
+
+    def _progress(self, written, total):
+        self.written, self.total = written, total
+
+    def _run(self):
+        try:
+            if isinstance(self.db, ConnectionManager):
+                conn = self.db.connect()
+            else:
+                conn = connect(self.db)
+            try:
+                self.written = self.func(conn, self.filename, *self.args,
+                                         progress=self._progress, cancel=self._cancel,
+                                         **self.kwargs)
+            finally:
+                conn.close()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
@@ -0,0 +1,189 @@
+"""Bulk student import from a CSV roster.
+
+The file is read a row at a time and checked with the same rules as the Add
+Student form. Valid rows are inserted ``IMPORT_CHUNK_SIZE`` at a time with
+``executemany``, all inside one transaction, so importing a term's roster
+costs one commit. Every rejected row is reported with its line number.
+"""
+import csv
+from collections import namedtuple
+
+from .dates import parse_form_date, parse_iso_date, today_iso
+from .db import after_commit, transaction
+from .roster import roster_for
+from .students import REGISTRATION_PAYMENT_METHOD, validate_email, validate_phone
+
+IMPORT_CHUNK_SIZE = 500
+
+# Accepted header spellings for each field; matching ignores case, spaces
+# and underscores. Student exports use the first spelling of each.
+IMPORT_FIELDS = {
+    "roll_no": ("Roll No", "Roll Number", "Roll"),
+    "name": ("Name", "Student Name"),
+    "phone": ("Phone", "Phone Number", "Mobile"),
+    "email": ("Email", "Email Address"),
+    "dob": ("DOB", "Date of Birth"),
+    "course_start_date": ("Start Date", "Course Start Date"),
+    "course_end_date": ("End Date", "Course End Date"),
+    "total_fees": ("Total Fees", "Fees"),
+    "fees_paid": ("Fees Paid", "Paid"),
+}
+REQUIRED_FIELDS = ("roll_no", "name", "phone", "email", "dob",
+                   "course_start_date", "course_end_date")
+
+ImportIssue = namedtuple("ImportIssue", "line roll_no message")
+ImportReport = namedtuple("ImportReport", "rows imported issues")
+
+
+def _header_key(text):
+    return "".join(ch for ch in text.lower() if ch.isalnum())
+
+
+def _map_header(header):
+    """Return ``{field: column index}`` for a header row."""
+    aliases = {_header_key(alias): field
+               for field, names in IMPORT_FIELDS.items()
+               for alias in names + (field,)}
+    columns = {}
+    for index, title in enumerate(header):
+        field = aliases.get(_header_key(title))
+        if field and field not in columns:
+            columns[field] = index
+    missing = [IMPORT_FIELDS[field][0] for field in REQUIRED_FIELDS if field not in columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    return columns
+
+
+def _parse_date(text):
+    # The form's DD/MM/YYYY, or ISO as written by the student export
+    try:
+        return parse_form_date(text)
+    except ValueError:
+        return parse_iso_date(text).isoformat()
+
+
+def _parse_fee(text, label):
+    try:
+        value = float(text) if text else 0.0
+    except ValueError:
+        raise ValueError(f"{label} must be a number") from None
+    if value < 0:
+        raise ValueError(f"{label} cannot be negative")
+    return value
+
+
+def validate_student_row(values):
+    """Check one row's ``{field: text}`` values like the Add Student form.
+
+    Returns the cleaned student tuple in insert order, or raises
+    ``ValueError`` describing the first problem.
+    """
+    for field in REQUIRED_FIELDS:
+        if not values.get(field):
+            raise ValueError(f"{IMPORT_FIELDS[field][0]} is required")
+    if not validate_phone(values["phone"]):
+        raise ValueError("Phone must be up to 10 digits")
+    if not validate_email(values["email"]):
+        raise ValueError("Invalid email address")
+    dates = []
+    for field in ("dob", "course_start_date", "course_end_date"):
+        try:
+            dates.append(_parse_date(values[field]))
+        except ValueError:
+            raise ValueError(f"{IMPORT_FIELDS[field][0]} must be DD/MM/YYYY") from None
+    dob, start, end = dates
+    if end < start:
+        raise ValueError("End Date is before Start Date")
+    total_fees = _parse_fee(values.get("total_fees"), "Total Fees")
+    fees_paid = _parse_fee(values.get("fees_paid"), "Fees Paid")
+    if fees_paid > total_fees:
+        raise ValueError("Paid amount cannot exceed total fees")
+    return (values["roll_no"], values["name"], values["phone"], values["email"],
+            dob, start, end, total_fees, fees_paid)
+
+
+def import_students(conn, rows, dry_run=False):
+    """Import students from CSV ``rows`` (an iterable of lists, header first).
+
+    Rows that fail validation, repeat a roll number from earlier in the
+    file or clash with an existing student are skipped and reported; the
+    rest are inserted in one transaction. With ``dry_run`` nothing is
+    written. Returns an ``ImportReport``. Raises ``ValueError`` if the
+    header lacks a required column.
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("The file is empty")
+    columns = _map_header(header)
+
+    issues = []
+    seen = set()
+    read = imported = 0
+    pending = []  # (line, student) waiting to be checked against the database
+
+    def flush():
+        nonlocal imported
+        marks = ",".join("?" * len(pending))
+        existing = {roll_no for (roll_no,) in conn.execute(
+            f"SELECT roll_no FROM students WHERE roll_no IN ({marks})",
+            [student[0] for _, student in pending])}
+        students = []
+        for line, student in pending:
+            if student[0] in existing:
+                issues.append(ImportIssue(line, student[0], "Roll number already exists"))
+            else:
+                students.append(student)
+        pending.clear()
+        if not students or dry_run:
+            imported += len(students)
+            return
+        conn.executemany('''
+            INSERT INTO students
+            (roll_no, name, phone, email, dob, course_start_date, course_end_date, total_fees, fees_paid)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+        ''', [student[:8] for student in students])
+        # Fees paid up front go through the ledger, as in add_student()
+        today = today_iso()
+        conn.executemany('''
+            INSERT INTO payments (roll_no, amount, payment_date, method)
+            VALUES (?, ?, ?, ?)
+        ''', [(student[0], student[8], today, REGISTRATION_PAYMENT_METHOD)
+              for student in students if student[8]])
+        imported += len(students)
+
+    with transaction(conn):
+        for line, row in enumerate(rows, start=2):
+            if not any(cell.strip() for cell in row):
+                continue  # Blank line
+            read += 1
+            values = {field: row[index].strip() if index < len(row) else ""
+                      for field, index in columns.items()}
+            roll_no = values["roll_no"]
+            try:
+                student = validate_student_row(values)
+            except ValueError as e:
+                issues.append(ImportIssue(line, roll_no, str(e)))
+                continue
+            if roll_no in seen:
+                issues.append(ImportIssue(line, roll_no, "Roll number repeated in the file"))
+                continue
+            seen.add(roll_no)
+            pending.append((line, student))
+            if len(pending) >= IMPORT_CHUNK_SIZE:
+                flush()
+        if pending:
+            flush()
+
+    if imported and not dry_run:
+        # Reloaded on its next lookup, once the import is committed
+        after_commit(conn, roster_for(conn).clear)
+    issues.sort()
+    return ImportReport(read, imported, issues)
+
+
+def import_students_csv(conn, filename, dry_run=False):
+    """Import a roster CSV file; see ``import_students``."""
+    with open(filename, newline="", encoding="utf-8-sig") as f:
+        return import_students(conn, csv.reader(f), dry_run=dry_run)
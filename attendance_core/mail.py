@@ -0,0 +1,275 @@
+"""Email outbox and background sender.
+
+Nothing talks to the mail server from the UI thread. ``queue_email`` adds a
+row to the ``email_outbox`` table as part of the caller's transaction, and
+``OutboxSender`` delivers due messages from a thread of its own: one SMTP
+connection per batch, no faster than ``messages_per_minute``, with failed
+sends retried after a doubling delay until ``max_attempts`` is reached.
+A message queued with a ``dedupe_key`` that is already in the outbox is
+ignored, so a reminder queued again the same day (by this kiosk or
+another) is only sent once.
+"""
+import smtplib
+import ssl
+import threading
+import time
+from email.message import EmailMessage
+
+from .config import load_email_config
+from .db import DEFAULT_DB_PATH, ConnectionManager, connect, run_with_retry, transaction
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+OUTBOX_STATUSES = (PENDING, SENDING, SENT, FAILED)
+
+# Messages claimed by a sender that then died are picked up again after this
+CLAIM_TIMEOUT_SECONDS = 10 * 60
+# How often the sender looks for due retries when nobody has called wake()
+POLL_SECONDS = 60
+
+
+def queue_email(conn, recipient, subject, body, dedupe_key=None):
+    """Add a message to the outbox.
+
+    Returns False, queueing nothing, if a message with the same
+    ``dedupe_key`` has been queued before.
+    """
+    cursor = conn.execute('''
+        INSERT INTO email_outbox (recipient, subject, body, dedupe_key)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (dedupe_key) DO NOTHING
+    ''', (recipient, subject, body, dedupe_key))
+    return cursor.rowcount == 1
+
+
+def outbox_counts(conn):
+    """Return ``{status: number of messages}`` for every outbox status."""
+    counts = dict.fromkeys(OUTBOX_STATUSES, 0)
+    counts.update(conn.execute("SELECT status, COUNT(*) FROM email_outbox GROUP BY status"))
+    return counts
+
+
+def _claim_due(conn, limit):
+    # Claiming marks the rows 'sending' with next_attempt_at as the claim
+    # time, so two kiosks' senders never pick up the same message
+    with transaction(conn):
+        rows = conn.execute('''
+            SELECT id, recipient, subject, body, attempts
+            FROM email_outbox
+            WHERE (status = 'pending' AND next_attempt_at <= datetime('now'))
+               OR (status = 'sending' AND next_attempt_at <= datetime('now', ?))
+            ORDER BY next_attempt_at, id
+            LIMIT ?
+        ''', (f"-{CLAIM_TIMEOUT_SECONDS} seconds", limit)).fetchall()
+        if rows:
+            marks = ",".join("?" * len(rows))
+            conn.execute(f'''
+                UPDATE email_outbox SET status = 'sending', next_attempt_at = datetime('now')
+                WHERE id IN ({marks})
+            ''', [row[0] for row in rows])
+    return rows
+
+
+def _mark_sent(conn, message_id):
+    with transaction(conn):
+        conn.execute('''
+            UPDATE email_outbox
+            SET status = 'sent', attempts = attempts + 1, sent_at = datetime('now'),
+                last_error = NULL
+            WHERE id = ?
+        ''', (message_id,))
+
+
+def _mark_failed(conn, message_id, error, retry_after):
+    """Record a failed attempt; ``retry_after`` None gives up on the message."""
+    with transaction(conn):
+        if retry_after is None:
+            conn.execute('''
+                UPDATE email_outbox SET status = 'failed', attempts = attempts + 1, last_error = ?
+                WHERE id = ?
+            ''', (str(error), message_id))
+        else:
+            conn.execute('''
+                UPDATE email_outbox
+                SET status = 'pending', attempts = attempts + 1, last_error = ?,
+                    next_attempt_at = datetime('now', ?)
+                WHERE id = ?
+            ''', (str(error), f"+{int(retry_after)} seconds", message_id))
+
+
+def _release(conn, message_ids):
+    # Hand back claimed messages that were never attempted
+    if message_ids:
+        marks = ",".join("?" * len(message_ids))
+        with transaction(conn):
+            conn.execute(f'''
+                UPDATE email_outbox SET status = 'pending', next_attempt_at = datetime('now')
+                WHERE status = 'sending' AND id IN ({marks})
+            ''', list(message_ids))
+
+
+def retry_failed(conn):
+    """Queue every message that has given up for another round of attempts."""
+    return conn.execute('''
+        UPDATE email_outbox
+        SET status = 'pending', attempts = 0, next_attempt_at = datetime('now')
+        WHERE status = 'failed'
+    ''').rowcount
+
+
+class OutboxSender:
+    """Delivers the outbox over SMTP from a background thread.
+
+    ``config`` is a dict like ``load_email_config()`` returns. ``sent``,
+    ``failed`` (given up), ``retried`` and ``last_error`` count this
+    sender's work; ``counts`` is the whole outbox by status, refreshed
+    after every pass.
+    """
+
+    def __init__(self, db=DEFAULT_DB_PATH, config=None):
+        self.db = db
+        self.config = config or load_email_config()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._next_send = 0.0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.last_error = None
+        self.counts = dict.fromkeys(OUTBOX_STATUSES, 0)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="attendance-mail",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def wake(self):
+        """Look for due messages now, e.g. just after queueing one."""
+        self._wakeup.set()
+
+    def close(self, timeout=None):
+        """Stop after the message being sent; unsent messages stay queued."""
+        if self._thread is not None:
+            self._stop.set()
+            self._wakeup.set()
+            self._thread.join(timeout)
+            self._thread = None
+
+    def send_due(self, conn):
+        """Send every message that is due, a batch per connection.
+
+        Returns the number sent. Safe to call directly, without the thread.
+        """
+        sent = self.sent
+        try:
+            while not self._stop.is_set():
+                batch = run_with_retry(_claim_due, conn, self.config["batch_size"])
+                if not batch or not self._send_batch(conn, batch):
+                    break
+        finally:
+            self.counts = outbox_counts(conn)
+        return self.sent - sent
+
+    def _run(self):
+        if isinstance(self.db, ConnectionManager):
+            conn = self.db.connect()
+        else:
+            conn = connect(self.db)
+        try:
+            while not self._stop.is_set():
+                self._wakeup.clear()
+                try:
+                    self.send_due(conn)
+                except Exception as e:
+                    self.last_error = str(e)
+                self._wakeup.wait(POLL_SECONDS)
+        finally:
+            conn.close()
+
+    def _open_smtp(self):
+        config = self.config
+        smtp = smtplib.SMTP(config["smtp_server"], config["smtp_port"], timeout=config["timeout"])
+        try:
+            if config["use_tls"]:
+                smtp.starttls(context=ssl.create_default_context())
+            if config["password"]:
+                smtp.login(config["username"], config["password"])
+        except BaseException:
+            smtp.close()
+            raise
+        return smtp
+
+    def _message(self, recipient, subject, body):
+        message = EmailMessage()
+        message["From"] = self.config["sender_email"]
+        message["To"] = recipient
+        message["Subject"] = subject
+        message.set_content(body)
+        return message
+
+    def _throttle(self):
+        rate = self.config["messages_per_minute"]
+        if rate:
+            delay = self._next_send - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            self._next_send = time.monotonic() + 60 / rate
+
+    def _send_batch(self, conn, batch):
+        try:
+            smtp = self._open_smtp()
+        except Exception as e:
+            # Server unreachable, login refused or bad settings: the whole
+            # batch waits and this pass ends
+            for message in batch:
+                self._failed(conn, message, e, permanent=False)
+            return False
+        try:
+            for index, (message_id, recipient, subject, body, attempts) in enumerate(batch):
+                self._throttle()
+                if self._stop.is_set():
+                    run_with_retry(_release, conn, [row[0] for row in batch[index:]])
+                    return False
+                try:
+                    smtp.send_message(self._message(recipient, subject, body))
+                except smtplib.SMTPRecipientsRefused as e:
+                    codes = [code for code, _ in e.recipients.values()]
+                    self._failed(conn, batch[index], e, permanent=min(codes) >= 500)
+                except smtplib.SMTPResponseException as e:
+                    # 4xx replies are temporary, 5xx final
+                    self._failed(conn, batch[index], e, permanent=e.smtp_code >= 500)
+                except OSError as e:
+                    # Disconnected (SMTP errors are OSErrors too); retry this
+                    # message and put the rest of the batch back
+                    self._failed(conn, batch[index], e, permanent=False)
+                    run_with_retry(_release, conn, [row[0] for row in batch[index + 1:]])
+                    return True
+                except Exception as e:
+                    # Something wrong with this message alone, e.g. an address
+                    # EmailMessage rejects: back it off and carry on
+                    self._failed(conn, batch[index], e, permanent=False)
+                else:
+                    run_with_retry(_mark_sent, conn, message_id)
+                    self.sent += 1
+            return True
+        finally:
+            try:
+                smtp.quit()
+            except OSError:
+                smtp.close()
+
+    def _failed(self, conn, message, error, permanent):
+        message_id, attempts = message[0], message[4] + 1
+        self.last_error = str(error)
+        if permanent or attempts >= self.config["max_attempts"]:
+            retry_after = None
+            self.failed += 1
+        else:
+            retry_after = self.config["retry_seconds"] * 2 ** (attempts - 1)
+            self.retried += 1
+        run_with_retry(_mark_failed, conn, message_id, error, retry_after)
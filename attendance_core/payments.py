@@ -0,0 +1,65 @@
+"""Fee payments.
+
+The ``payments`` table is the ledger. ``students.fees_paid`` is its running
+total per student, kept in step by triggers (see ``db._payments_ledger``),
+so a balance is a single primary-key read and history is a range read on
+``idx_payments_roll_date``.
+"""
+from .db import OPENING_BALANCE_METHOD, transaction
+from .roster import roster_for
+
+# Allow for float rounding when checking a payment against the balance
+BALANCE_TOLERANCE = 0.005
+
+
+def record_payment(conn, roll_no, amount, payment_date, method):
+    """Record a payment of ``amount`` against the student's balance.
+
+    The balance check and the insert happen in one write transaction, so
+    two overlapping payments cannot both be accepted against the same
+    balance. Raises ``ValueError`` for an unknown student, a non-positive
+    amount or one larger than the balance. Returns
+    ``(total_fees, fees_paid_before, fees_paid_after)``.
+    """
+    if amount <= 0:
+        raise ValueError("Amount must be positive")
+    with transaction(conn):
+        row = conn.execute(
+            "SELECT IFNULL(total_fees, 0), IFNULL(fees_paid, 0) FROM students WHERE roll_no = ?",
+            (roll_no,)).fetchone()
+        if row is None:
+            raise ValueError(f"No student with roll number {roll_no}")
+        total_fees, fees_paid = row
+        remaining = total_fees - fees_paid
+        if amount > remaining + BALANCE_TOLERANCE:
+            raise ValueError(f"Amount cannot exceed remaining balance of ₹{remaining:,.2f}")
+
+        # The insert trigger adds the amount to students.fees_paid
+        conn.execute('''
+            INSERT INTO payments (roll_no, amount, payment_date, method)
+            VALUES (?, ?, ?, ?)
+        ''', (roll_no, amount, payment_date, method))
+    roster_for(conn).refresh(conn, roll_no)
+    return total_fees, fees_paid, fees_paid + amount
+
+
+def is_opening_balance(method):
+    """True for the entry standing in for fees paid before payments were
+    logged, which history and statements show as a balance brought forward."""
+    return method == OPENING_BALANCE_METHOD
+
+
+def payment_history(conn, roll_no, limit=None):
+    """Return ``(payment_date, amount, method)`` rows, newest first.
+
+    Rows include any opening-balance entry; see ``is_opening_balance``.
+    """
+    sql = '''
+        SELECT payment_date, amount, method
+        FROM payments
+        WHERE roll_no = ?
+        ORDER BY payment_date DESC, id DESC
+    '''
+    if limit is None:
+        return conn.execute(sql, (roll_no,)).fetchall()
+    return conn.execute(sql + " LIMIT ?", (roll_no, limit)).fetchall()
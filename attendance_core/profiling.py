@@ -0,0 +1,301 @@
+"""Opt-in query profiling.
+
+Give a ``QueryProfiler`` to ``connect`` or ``ConnectionManager`` and every
+statement run on those connections is timed, from ``execute`` until its
+last row is fetched, and counted with the rows it returned or changed.
+Each is tagged with the function that ran it and, when that is part of
+this package, the application function that called in (e.g.
+``update_student_view > student_page``). The profiler keeps totals per
+tag and statement, a rolling latency histogram, and appends statements
+slower than ``slow_ms`` to a log file. Connections opened without a
+profiler are plain ``Connection`` objects and pay nothing.
+"""
+import collections
+import functools
+import os
+import re
+import site
+import sqlite3
+import sys
+import sysconfig
+import threading
+import time
+from datetime import datetime
+
+from .db import Connection
+
+SLOW_QUERY_MS = 100
+SLOW_QUERY_LOG = "slow_queries.log"
+HISTORY_SIZE = 5000  # Latencies kept for the rolling histogram
+# Upper bounds (ms) of the histogram buckets; the last bucket is open
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+_STDLIB_DIR = os.path.dirname(os.path.abspath(os.__file__))
+# Third-party packages (ttkbootstrap and the like), wherever they are installed
+_INSTALLED_DIRS = tuple(sorted({
+    os.path.abspath(path)
+    for path in [sysconfig.get_paths().get("purelib"), sysconfig.get_paths().get("platlib"),
+                 *getattr(site, "getsitepackages", lambda: [])(),
+                 getattr(site, "getusersitepackages", lambda: None)()]
+    if path
+}))
+_INSTALLED_SEGMENTS = {"site-packages", "dist-packages"}
+_SKIPPED_FILES = {os.path.join(_PACKAGE_DIR, name) for name in ("profiling.py", "db.py")}
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_VALUES_LIST = re.compile(r"\((\?(?:, \.\.\.)?)\)(?:\s*,\s*\(\1\))+")
+
+# Set to turn profiling on in the GUI; ATTENDANCE_SLOW_QUERY_MS overrides
+# the slow-query threshold
+PROFILE_ENV = "ATTENDANCE_PROFILE"
+SLOW_QUERY_ENV = "ATTENDANCE_SLOW_QUERY_MS"
+
+
+def normalize_sql(sql):
+    """Collapse whitespace, ``IN (?, ?, ...)`` lists and multi-row
+    ``VALUES`` so one statement always gets one entry, whatever the number
+    of values bound."""
+    sql = _PLACEHOLDER_LIST.sub("?, ...", " ".join(sql.split()))
+    return _VALUES_LIST.sub(r"(\1), ...", sql)
+
+
+def profiler_from_environment():
+    """A ``QueryProfiler`` if ``ATTENDANCE_PROFILE`` is set, else None."""
+    if not os.environ.get(PROFILE_ENV):
+        return None
+    return QueryProfiler(slow_ms=float(os.environ.get(SLOW_QUERY_ENV, SLOW_QUERY_MS)))
+
+
+@functools.lru_cache(maxsize=None)
+def _frame_kind(filename):
+    # "core" for this package, "app" for the application calling it, and
+    # "skip" for plumbing: this module, db.py, the standard library
+    # (contextlib, threading, tkinter) and installed packages
+    path = os.path.abspath(filename)
+    if filename.startswith("<") or path in _SKIPPED_FILES:
+        return "skip"
+    if path.startswith(_PACKAGE_DIR):
+        return "core"
+    if path.startswith(_STDLIB_DIR) or path.startswith(_INSTALLED_DIRS):
+        return "skip"
+    return "skip" if _INSTALLED_SEGMENTS.intersection(path.split(os.sep)) else "app"
+
+
+def _caller_tag():
+    # The nearest package function that ran the statement, prefixed with the
+    # application function that called into it, if there is one
+    frame = sys._getframe(2)
+    inner = None
+    while frame is not None:
+        kind = _frame_kind(frame.f_code.co_filename)
+        if kind == "app":
+            name = frame.f_code.co_name
+            if inner is None:
+                return name
+            return inner if name == "<module>" else f"{name} > {inner}"
+        if kind == "core" and inner is None:
+            inner = frame.f_code.co_name
+        frame = frame.f_back
+    return inner or "?"
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor that reports each statement to its connection's profiler.
+
+    A query's time runs until its rows are used up (or the cursor is
+    reused or closed), so slow fetches count as well as slow starts.
+    """
+    _pending = None
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        tag = _caller_tag()
+        started = time.perf_counter()
+        super().execute(sql, parameters)
+        self._started(tag, sql, started)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        tag = _caller_tag()
+        started = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._started(tag, sql, started)
+        return self
+
+    def executescript(self, sql_script):
+        self._finish()
+        tag = _caller_tag()
+        started = time.perf_counter()
+        super().executescript(sql_script)
+        self._started(tag, sql_script, started)
+        return self
+
+    def _started(self, tag, sql, started):
+        elapsed = time.perf_counter() - started
+        if self.description is None:
+            # Nothing to fetch: record it now with the rows it changed
+            self.connection.profiler.record(tag, sql, elapsed * 1000, max(self.rowcount, 0))
+        else:
+            self._pending = [tag, sql, elapsed, 0]
+
+    def _fetched(self, started, rows, done):
+        pending = self._pending
+        if pending is not None:
+            pending[2] += time.perf_counter() - started
+            pending[3] += rows
+            if done:
+                self._finish()
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            tag, sql, elapsed, rows = pending
+            self.connection.profiler.record(tag, sql, elapsed * 1000, rows)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0, True)
+            raise
+        self._fetched(started, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # e.g. conn.execute(...).fetchone(), which never reads to the end
+        self._finish()
+
+
+class ProfiledConnection(Connection):
+    """``Connection`` whose statements all go through ``ProfiledCursor``."""
+    profiler = None
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+StatementStats = collections.namedtuple("StatementStats", "tag sql count total_ms max_ms rows")
+
+
+class QueryProfiler:
+    """Collects statement timings from any number of connections and threads.
+
+    ``log_path`` (None to disable) receives one line per statement that
+    takes ``slow_ms`` or longer.
+    """
+    connection_class = ProfiledConnection
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, log_path=SLOW_QUERY_LOG, history=HISTORY_SIZE):
+        self.slow_ms = slow_ms
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._history = collections.deque(maxlen=history)
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._history.clear()
+            self._statements = {}  # (tag, sql) -> [count, total_ms, max_ms, rows]
+            self.count = 0
+            self.slow = 0
+            self.total_ms = 0.0
+            self.max_ms = 0.0
+
+    def record(self, tag, sql, ms, rows):
+        sql = normalize_sql(sql)
+        with self._lock:
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+            self._history.append(ms)
+            stats = self._statements.get((tag, sql))
+            if stats is None:
+                stats = self._statements[(tag, sql)] = [0, 0.0, 0.0, 0]
+            stats[0] += 1
+            stats[1] += ms
+            stats[2] = max(stats[2], ms)
+            stats[3] += rows
+            slow = ms >= self.slow_ms
+            if slow:
+                self.slow += 1
+        if slow and self.log_path:
+            self._log_slow(tag, sql, ms, rows)
+
+    def _log_slow(self, tag, sql, ms, rows):
+        line = (f"{datetime.now():%Y-%m-%d %H:%M:%S} {ms:9.1f} ms {rows:8d} rows "
+                f"[{threading.current_thread().name}] {tag}: {sql}\n")
+        try:
+            with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError:
+            pass  # Profiling must never break the app
+
+    def percentile(self, fraction):
+        """Latency (ms) below which ``fraction`` of recent statements fell."""
+        with self._lock:
+            recent = sorted(self._history)
+        if not recent:
+            return 0.0
+        return recent[min(int(len(recent) * fraction), len(recent) - 1)]
+
+    def histogram(self):
+        """Return ``[(upper bound ms or None, statements)]`` over recent statements."""
+        with self._lock:
+            recent = list(self._history)
+        counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        for ms in recent:
+            for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+                if ms <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return list(zip(HISTOGRAM_BOUNDS_MS + (None,), counts))
+
+    def top(self, limit=20, key="total_ms"):
+        """The ``limit`` statements with the most ``key`` (a ``StatementStats``
+        field), as ``StatementStats``."""
+        with self._lock:
+            stats = [StatementStats(tag, sql, *values)
+                     for (tag, sql), values in self._statements.items()]
+        stats.sort(key=lambda s: getattr(s, key), reverse=True)
+        return stats[:limit]
+
+    def summary(self):
+        """One-line summary, e.g. for a status bar."""
+        return (f"SQL {self.count} · p50 {self.percentile(0.5):.2f} ms · "
+                f"p95 {self.percentile(0.95):.1f} ms · max {self.max_ms:.0f} ms · "
+                f"{self.slow} slow")
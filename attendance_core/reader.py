@@ -0,0 +1,138 @@
+"""Background reader thread for queries the GUI should not wait on.
+
+Search-as-you-type and other interactive lookups run here on a connection
+of their own. Jobs can carry a ``key``: submitting a new job with the same
+key drops the older one if it has not started, and interrupts it if it is
+running, so only the newest search's results ever reach the screen.
+Results are handed back through ``process_completions`` like
+``WriteQueue``'s.
+"""
+import collections
+import queue
+import threading
+
+from .db import DEFAULT_DB_PATH, ConnectionManager, connect
+from .writer import WriteJob
+
+
+class QueryWorker:
+    """Runs ``func(conn, *args, **kwargs)`` read jobs on a worker thread.
+
+    ``db`` is a database path or a ``ConnectionManager``; either way the
+    worker opens a connection of its own.
+    """
+
+    def __init__(self, db=DEFAULT_DB_PATH):
+        self.db = db
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._jobs = collections.deque()  # (job, key) pairs
+        self._latest = {}  # key -> newest job submitted with it
+        self._running = None
+        self._conn = None
+        self._stopping = False
+        self._completed = queue.Queue()
+        self._thread = None
+        self.jobs_done = 0
+        self.cancelled = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="attendance-reader",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, func, *args, key=None, on_done=None, **kwargs):
+        """Queue a read job, superseding any older job with the same ``key``.
+
+        ``on_done(result, error)`` is called from ``process_completions``.
+        Superseded jobs never call it.
+        """
+        job = WriteJob(func, args, kwargs, on_done)
+        with self._lock:
+            if key is not None:
+                self._cancel(key)
+                self._latest[key] = job
+            self._jobs.append((job, key))
+            self._wakeup.notify()
+        return job
+
+    def cancel(self, key):
+        """Drop or interrupt the job submitted with ``key``, if any."""
+        with self._lock:
+            self._cancel(key)
+            self._latest.pop(key, None)
+
+    def _cancel(self, key):
+        old = self._latest.get(key)
+        if old is None:
+            return
+        if (old, key) in self._jobs:
+            self._jobs.remove((old, key))
+            self.cancelled += 1
+        elif old is self._running and self._conn is not None:
+            # The query fails with "interrupted" and its result is dropped
+            self._conn.interrupt()
+
+    def pending(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def process_completions(self):
+        """Run callbacks for finished jobs. Call this on the UI thread."""
+        count = 0
+        while True:
+            try:
+                job = self._completed.get_nowait()
+            except queue.Empty:
+                return count
+            count += 1
+            if job.on_done is not None:
+                job.on_done(job.result, job.error)
+
+    def close(self, timeout=None):
+        """Stop the worker thread, abandoning jobs that have not started."""
+        if self._thread is not None:
+            with self._lock:
+                self._stopping = True
+                self._jobs.clear()
+                if self._conn is not None:
+                    self._conn.interrupt()
+                self._wakeup.notify()
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        if isinstance(self.db, ConnectionManager):
+            conn = self.db.connect()
+        else:
+            conn = connect(self.db)
+        with self._lock:
+            self._conn = conn
+        try:
+            while True:
+                with self._lock:
+                    while not self._jobs and not self._stopping:
+                        self._wakeup.wait()
+                    if self._stopping:
+                        return
+                    job, key = self._jobs.popleft()
+                    self._running = job
+                try:
+                    job.result = job.func(conn, *job.args, **job.kwargs)
+                except Exception as e:
+                    job.error = e
+                with self._lock:
+                    self._running = None
+                    self.jobs_done += 1
+                    if key is not None:
+                        if self._latest.get(key) is not job:
+                            self.cancelled += 1  # Superseded while running
+                            continue
+                        del self._latest[key]
+                self._completed.put(job)
+        finally:
+            with self._lock:
+                self._conn = None
+            conn.close()
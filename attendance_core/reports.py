@@ -0,0 +1,194 @@
+"""Aggregate queries behind the dashboard, reports and fees views."""
+import calendar
+from datetime import date
+
+from .dates import day_number, parse_iso_date, today_iso
+from .stats import stats_snapshot
+from .students import EXPIRY_WARNING_DAYS
+
+# Fees reminders go to students owing more than FEES_REMINDER_MIN_BALANCE
+# whose course ends within FEES_REMINDER_DAYS days (or has already ended)
+FEES_REMINDER_DAYS = 7
+FEES_REMINDER_MIN_BALANCE = 0
+
+# Whole days from the ? day number to the end of the course
+DAYS_LEFT_SQL = "course_end_day - ?"
+
+
+def dashboard_counts(conn):
+    """Return the numbers shown on the dashboard stat cards."""
+    stats = stats_snapshot(conn)
+    return {
+        "total_students": stats["total_students"],
+        "today_attendance": stats["today_attendance"],
+        "active_courses": stats["active_courses"],
+        "pending_fees": stats["outstanding"],
+    }
+
+
+def daily_attendance(conn, start, end):
+    """Return ``{date: students present}`` for days between two ISO dates."""
+    return dict(conn.execute(
+        "SELECT date, present FROM daily_attendance_summary WHERE date BETWEEN ? AND ?",
+        (start, end)).fetchall())
+
+
+def month_range(year, month):
+    """Return the first and last ISO dates of a month."""
+    last_day = calendar.monthrange(year, month)[1]
+    return date(year, month, 1).isoformat(), date(year, month, last_day).isoformat()
+
+
+def months_between(start, end):
+    """Return the ``YYYY-MM`` months touched by an ISO date range.
+
+    Raises ``ValueError`` if ``start`` is after ``end``.
+    """
+    if start > end:
+        raise ValueError(f"Start date {start} is after end date {end}")
+    year, month = int(start[:4]), int(start[5:7])
+    months = []
+    while f"{year}-{month:02d}" <= end[:7]:
+        months.append(f"{year}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def attendance_report(conn, start, end):
+    """Attendance per student between two ISO dates (inclusive).
+
+    Returns ``(months, rows)``: the ``YYYY-MM`` months in the range and one
+    ``(roll_no, name, month_counts, present_days, percent)`` row for every
+    student whose course overlaps it, including those never marked present.
+    ``month_counts`` lines up with ``months``; ``percent`` is present days
+    over days in the range. Raises ``ValueError`` if ``start`` is after
+    ``end``.
+
+    All of it comes from one query over students joined to the months of
+    the range. Whole months are read from ``student_month_attendance``;
+    months cut by the range are counted with a seek on the (roll_no, date)
+    index. Either way the cost grows with students and months, not the
+    attendance table.
+    """
+    months = months_between(start, end)
+    month_index = {month: i for i, month in enumerate(months)}
+    total_days = (parse_iso_date(end) - parse_iso_date(start)).days + 1
+
+    # One (month, first day, last day, whole month?) per month, clipped to the range
+    bounds = []
+    for month in months:
+        first, last = month_range(int(month[:4]), int(month[5:]))
+        bounds += [month, max(first, start), min(last, end), start <= first and last <= end]
+    values = ", ".join(["(?, ?, ?, ?)"] * len(months))
+
+    rows = []
+    current = None
+    for roll_no, name, month, present in conn.execute(f"""
+        WITH months(month, first_day, last_day, whole) AS (VALUES {values})
+        SELECT s.roll_no, s.name, m.month,
+               CASE WHEN m.whole THEN
+                   IFNULL((SELECT present FROM student_month_attendance sm
+                           WHERE sm.roll_no = s.roll_no AND sm.month = m.month), 0)
+               ELSE
+                   (SELECT COUNT(*) FROM attendance a
+                    WHERE a.roll_no = s.roll_no AND a.date BETWEEN m.first_day AND m.last_day)
+               END
+        FROM students s CROSS JOIN months m
+        WHERE (s.course_start_date IS NULL OR s.course_start_date <= ?)
+          AND (s.course_end_date IS NULL OR s.course_end_date >= ?)
+        ORDER BY CAST(s.roll_no AS INTEGER), s.roll_no
+    """, bounds + [end, start]):
+        if current is None or current[0] != roll_no:
+            current = [roll_no, name, [0] * len(months)]
+            rows.append(current)
+        current[2][month_index[month]] = present
+
+    return months, [
+        (roll_no, name, tuple(counts), sum(counts), sum(counts) / total_days * 100)
+        for roll_no, name, counts in rows
+    ]
+
+
+def monthly_attendance(conn, year, month):
+    """Return ``(roll_no, name, present_days, percent)`` rows for a month."""
+    _, rows = attendance_report(conn, *month_range(year, month))
+    return [(roll_no, name, present, percent) for roll_no, name, _, present, percent in rows]
+
+
+def expiring_courses(conn, within_days=None, today=None):
+    """Return ``(roll_no, name, course_end_date, days_left)`` for courses
+    ending within ``within_days`` days (default ``EXPIRY_WARNING_DAYS``),
+    soonest first. A range scan of the course_end_date index."""
+    today = today or today_iso()
+    if within_days is None:
+        within_days = EXPIRY_WARNING_DAYS
+    return conn.execute(f"""
+        SELECT roll_no, name, course_end_date, {DAYS_LEFT_SQL}
+        FROM students
+        WHERE course_end_date BETWEEN ? AND date(?, ?)
+        ORDER BY course_end_date, roll_no
+    """, (day_number(today), today, today, f"+{int(within_days)} days")).fetchall()
+
+
+def financial_summary(conn):
+    """Return ``(total, paid, pending)`` fee sums over all students."""
+    return conn.execute(
+        "SELECT SUM(total_fees), SUM(fees_paid), SUM(total_fees - fees_paid) FROM students"
+    ).fetchone()
+
+
+def student_fees_rows(conn):
+    """Return ``(roll_no, name, total_fees, fees_paid)`` for every student."""
+    return conn.execute("SELECT roll_no, name, total_fees, fees_paid FROM students").fetchall()
+
+
+def pending_fees_summary(conn):
+    """Return ``(total_fees, fees_paid, count)`` over students who still owe fees."""
+    return conn.execute(
+        "SELECT SUM(total_fees), SUM(fees_paid), COUNT(*) FROM students WHERE total_fees > fees_paid"
+    ).fetchone()
+
+
+def pending_fees_students(conn):
+    """Return ``(roll_no, name, total_fees, fees_paid)``, largest balance first."""
+    return conn.execute("""
+        SELECT roll_no, name, total_fees, fees_paid
+        FROM students
+        WHERE (total_fees - fees_paid) > 0
+        ORDER BY (total_fees - fees_paid) DESC
+    """).fetchall()
+
+
+def pending_fee_reminders(conn, within_days=None, min_balance=None, today=None):
+    """Return ``(roll_no, name, email, remaining, days_left)`` for students who
+    owe more than ``min_balance`` and whose course ends within ``within_days``
+    days, soonest first. Defaults are ``FEES_REMINDER_MIN_BALANCE`` and
+    ``FEES_REMINDER_DAYS``; only the index of owing students is read."""
+    today = today or today_iso()
+    if within_days is None:
+        within_days = FEES_REMINDER_DAYS
+    if min_balance is None:
+        min_balance = FEES_REMINDER_MIN_BALANCE
+    return conn.execute(f"""
+        SELECT roll_no, name, email, total_fees - fees_paid, {DAYS_LEFT_SQL}
+        FROM students
+        WHERE total_fees > fees_paid
+          AND course_end_date <= date(?, ?)
+          AND total_fees - fees_paid > ?
+        ORDER BY course_end_date, roll_no
+    """, (day_number(today), today, f"+{int(within_days)} days", min_balance)).fetchall()
+
+
+def student_profile(conn, roll_no):
+    """Return the student row followed by ``total_present`` and ``total_days``.
+
+    ``total_days`` counts the days on which anyone attended.
+    """
+    return conn.execute("""
+        SELECT s.*,
+               (SELECT IFNULL(SUM(present), 0) FROM student_month_attendance
+                WHERE roll_no = s.roll_no) as total_present,
+               (SELECT COUNT(*) FROM daily_attendance_summary) as total_days
+        FROM students s
+        WHERE s.roll_no = ?
+    """, (roll_no,)).fetchone()
@@ -0,0 +1,136 @@
+"""Process-wide in-memory roster for the attendance scan hot path.
+
+Marking attendance only needs a student's name and course end date. The
+roster keeps those, pre-parsed, for every student so a scan resolves a
+roll number with a dict lookup instead of a SQL read and a date parse.
+Service functions that write students or payments refresh the affected
+entry; ``rebuild`` reloads everything, e.g. after edits from another kiosk.
+Changes read inside a transaction only reach the cache once it commits.
+"""
+import threading
+import time
+from datetime import date
+
+from .db import after_commit, database_key
+
+# Stands in for a missing course end date so the entry never expires
+NO_END_DATE = date.max.toordinal()
+
+
+class RosterEntry:
+    """Compact, pre-parsed view of one ``students`` row."""
+    __slots__ = ("roll_no", "name", "end_ordinal", "total_fees", "fees_paid")
+
+    def __init__(self, roll_no, name, course_end_day, total_fees, fees_paid):
+        self.roll_no = roll_no
+        self.name = name
+        self.end_ordinal = course_end_day if course_end_day is not None else NO_END_DATE
+        self.total_fees = float(total_fees or 0)
+        self.fees_paid = float(fees_paid or 0)
+
+    def expired_on(self, day_ordinal):
+        return day_ordinal > self.end_ordinal
+
+    def __repr__(self):
+        return f"RosterEntry({self.roll_no!r}, {self.name!r})"
+
+
+ROSTER_COLUMNS = "roll_no, name, course_end_day, total_fees, fees_paid"
+
+
+class RosterCache:
+    """Roll number -> ``RosterEntry`` map for one database."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.rebuild_seconds = 0.0
+
+    def rebuild(self, conn):
+        """Reload every student from the database."""
+        started = time.perf_counter()
+        entries = {
+            row[0]: RosterEntry(*row)
+            for row in conn.execute(f"SELECT {ROSTER_COLUMNS} FROM students")
+        }
+        with self._lock:
+            self._entries = entries
+            self.loaded = True
+            self.rebuilds += 1
+            self.rebuild_seconds = time.perf_counter() - started
+
+    def lookup(self, conn, roll_no):
+        """Return the entry for ``roll_no`` or None if no such student.
+
+        Loads the roster on first use. A roll number that is not cached is
+        looked up once in the database, in case another kiosk added it.
+        """
+        if not self.loaded:
+            self.rebuild(conn)
+        entry = self._entries.get(roll_no)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return self.refresh(conn, roll_no)
+
+    def refresh(self, conn, roll_no):
+        """Re-read one student after it was added or changed.
+
+        Inside a transaction the entry is returned straight away but only
+        cached once the transaction commits, so a rolled-back write never
+        reaches the roster.
+        """
+        row = conn.execute(f"SELECT {ROSTER_COLUMNS} FROM students WHERE roll_no = ?",
+                           (roll_no,)).fetchone()
+        entry = RosterEntry(*row) if row is not None else None
+        after_commit(conn, lambda: self._store(roll_no, entry))
+        return entry
+
+    def _store(self, roll_no, entry):
+        with self._lock:
+            if entry is None:
+                self._entries.pop(roll_no, None)
+            else:
+                self._entries[roll_no] = entry
+
+    def discard(self, roll_no):
+        with self._lock:
+            self._entries.pop(roll_no, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self.loaded = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "rebuilds": self.rebuilds,
+            "rebuild_ms": self.rebuild_seconds * 1000,
+        }
+
+
+_rosters = {}
+_rosters_lock = threading.Lock()
+
+
+def roster_for(conn):
+    """Return the shared ``RosterCache`` for the database behind ``conn``."""
+    key = database_key(conn)
+    roster = _rosters.get(key)
+    if roster is None:
+        with _rosters_lock:
+            roster = _rosters.setdefault(key, RosterCache())
+    return roster
@@ -0,0 +1,113 @@
+"""Keyboard-wedge scanner input.
+
+Barcode and RFID readers that act as keyboards "type" a badge's roll
+number far faster than a person can, usually followed by Enter.
+``BurstDetector`` is fed each keystroke with its timestamp and reports a
+scan when a burst of at least ``min_length`` characters, each within
+``max_gap_ms`` of the last, is ended by Enter or by a pause; slower typing
+is left to the normal entry path. ``ScanQueue`` holds scans until they are
+marked, in order, and drops a badge read again within ``repeat_seconds``
+(a card left on the reader, or tapped twice).
+
+Neither class is thread-safe: use them from the UI thread.
+"""
+import collections
+import os
+import time
+
+SCAN_MAX_GAP_MS = 50  # Keystrokes closer together than this come from a scanner
+SCAN_MIN_LENGTH = 3
+SCAN_IDLE_MS = 150  # A burst with no Enter ends after this pause
+SCAN_REPEAT_SECONDS = 10.0
+# Set to change the repeat window in the GUI
+SCAN_REPEAT_ENV = "ATTENDANCE_SCAN_REPEAT_SECONDS"
+
+
+def scan_repeat_seconds():
+    """The repeat window: ``ATTENDANCE_SCAN_REPEAT_SECONDS`` or the default."""
+    return float(os.environ.get(SCAN_REPEAT_ENV, SCAN_REPEAT_SECONDS))
+
+
+class BurstDetector:
+    """Tells scanner bursts from typing, one keystroke at a time.
+
+    Times are in milliseconds from any fixed point, e.g. Tk's
+    ``event.time``.
+    """
+
+    def __init__(self, max_gap_ms=SCAN_MAX_GAP_MS, min_length=SCAN_MIN_LENGTH):
+        self.max_gap_ms = max_gap_ms
+        self.min_length = min_length
+        self._chars = []
+        self._last = None
+
+    def key(self, char, time_ms):
+        """Add a printable character typed at ``time_ms``."""
+        if self._last is not None and time_ms - self._last > self.max_gap_ms:
+            # A pause: whatever came before it was typed by hand
+            self._chars = []
+        self._chars.append(char)
+        self._last = time_ms
+
+    def end(self, time_ms=None):
+        """Enter was pressed at ``time_ms`` (None: the input went idle).
+
+        Returns the scanned text if the keys since the last pause were a
+        burst, otherwise None. Either way the detector starts afresh.
+        """
+        text = "".join(self._chars).strip()
+        late = time_ms is not None and self._last is not None and time_ms - self._last > self.max_gap_ms
+        self._chars = []
+        self._last = None
+        if late or len(text) < self.min_length:
+            return None
+        return text
+
+    def pending(self):
+        """True while a possible burst is being typed."""
+        return bool(self._chars)
+
+
+class ScanQueue:
+    """Scans waiting to be marked, first in first out.
+
+    ``accepted`` and ``repeats`` count the scans queued and the repeat reads
+    dropped.
+    """
+
+    def __init__(self, repeat_seconds=SCAN_REPEAT_SECONDS, clock=time.monotonic):
+        self.repeat_seconds = repeat_seconds
+        self._clock = clock
+        self._pending = collections.deque()
+        self._accepted_at = collections.OrderedDict()  # code -> time, oldest first
+        self.accepted = 0
+        self.repeats = 0
+
+    def put(self, code):
+        """Queue ``code``. Returns False, queueing nothing, if the same code
+        was accepted less than ``repeat_seconds`` ago."""
+        now = self._clock()
+        recent = self._accepted_at
+        while recent:
+            oldest, accepted_at = next(iter(recent.items()))
+            if now - accepted_at < self.repeat_seconds:
+                break
+            del recent[oldest]
+        if code in recent:
+            self.repeats += 1
+            return False
+        recent[code] = now
+        self._pending.append(code)
+        self.accepted += 1
+        return True
+
+    def get(self):
+        """Return the oldest waiting scan, or None if there are none."""
+        return self._pending.popleft() if self._pending else None
+
+    def clear(self):
+        self._pending.clear()
+        self._accepted_at.clear()
+
+    def __len__(self):
+        return len(self._pending)
@@ -0,0 +1,195 @@
+"""Scan feedback tones that never block the caller.
+
+``SoundPlayer.play`` returns at once: the tone is a WAV file rendered the
+first time it is needed and handed to whichever backend this machine has,
+chosen on first use rather than at import so nothing here stops the app
+starting on a machine without sound. Windows plays files asynchronously
+through ``winsound``; macOS and Linux start ``afplay``, ``paplay`` or
+``aplay`` as a child process. Without any of those, or if the backend
+fails, scans are silent. ``ATTENDANCE_SOUND`` forces a backend by name
+(``none`` turns sound off).
+"""
+import array
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import wave
+
+SOUND_ENV = "ATTENDANCE_SOUND"
+SAMPLE_RATE = 22050
+VOLUME = 0.5  # Fraction of full scale
+FADE_MS = 5  # Ramp at each end so tones start and stop without a click
+
+SUCCESS = "success"
+ERROR = "error"
+# name -> (frequency in Hz, duration in ms)
+TONES = {
+    SUCCESS: (750, 300),
+    ERROR: (1000, 500),
+}
+
+
+def tone_wav(path, frequency, duration_ms, volume=VOLUME, rate=SAMPLE_RATE):
+    """Write a 16-bit mono sine tone to ``path``."""
+    count = rate * duration_ms // 1000
+    fade = max(1, rate * FADE_MS // 1000)
+    peak = 32767 * volume
+    step = 2 * math.pi * frequency / rate
+    samples = array.array("h", (
+        int(peak * math.sin(step * i) * min(1.0, i / fade, (count - i) / fade))
+        for i in range(count)
+    ))
+    if sys.byteorder == "big":
+        samples.byteswap()  # WAV data is little-endian
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.tobytes())
+
+
+class NullBackend:
+    name = "none"
+
+    def play(self, path):
+        pass
+
+    def close(self):
+        pass
+
+
+class WinsoundBackend:
+    """``winsound.PlaySound`` with ``SND_ASYNC``; a new tone cuts off the last."""
+    name = "winsound"
+
+    def __init__(self):
+        import winsound
+        self._winsound = winsound
+        self._flags = winsound.SND_FILENAME | winsound.SND_ASYNC | winsound.SND_NODEFAULT
+
+    def play(self, path):
+        self._winsound.PlaySound(path, self._flags)
+
+    def close(self):
+        self._winsound.PlaySound(None, 0)
+
+
+class CommandBackend:
+    """Plays each tone with an external player such as ``aplay``."""
+
+    def __init__(self, command):
+        self.name = os.path.basename(command[0])
+        self.command = list(command)
+        self._process = None
+
+    def play(self, path):
+        # A tone still playing is cut short, so a burst of scans never
+        # leaves a queue of players behind
+        self._stop()
+        self._process = subprocess.Popen(self.command + [path], stdin=subprocess.DEVNULL,
+                                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def _stop(self):
+        process, self._process = self._process, None
+        if process is not None and process.poll() is None:
+            process.terminate()
+            process.wait()
+
+    def close(self):
+        self._stop()
+
+
+# Players tried in order on macOS and Linux, with their arguments
+PLAYER_COMMANDS = {
+    "afplay": ["afplay"],
+    "paplay": ["paplay"],
+    "aplay": ["aplay", "-q"],
+}
+
+
+def load_backend(name=None):
+    """Return the backend called ``name`` (default: ``ATTENDANCE_SOUND``, or
+    the best one available), or a ``NullBackend`` if it can't be used."""
+    name = (name or os.environ.get(SOUND_ENV) or "").strip().lower()
+    if name == "none":
+        return NullBackend()
+    if name in ("", "winsound") and sys.platform == "win32":
+        try:
+            return WinsoundBackend()
+        except ImportError:
+            return NullBackend()
+    candidates = [name] if name else list(PLAYER_COMMANDS)
+    for candidate in candidates:
+        command = PLAYER_COMMANDS.get(candidate)
+        if command and shutil.which(command[0]):
+            return CommandBackend(command)
+    return NullBackend()
+
+
+class SoundPlayer:
+    """Plays the named ``TONES``.
+
+    Safe to call from any thread. The backend is loaded and each tone
+    rendered on first use; ``close`` stops playback and removes the
+    rendered files.
+    """
+
+    def __init__(self, backend=None):
+        self._backend_name = backend
+        self._backend = None
+        self._directory = None
+        self._paths = {}
+        self._lock = threading.Lock()
+        self.last_error = None
+
+    @property
+    def backend(self):
+        with self._lock:
+            if self._backend is None:
+                self._backend = load_backend(self._backend_name)
+            return self._backend
+
+    def play(self, tone=SUCCESS):
+        """Start ``tone`` playing and return straight away."""
+        backend = self.backend
+        if isinstance(backend, NullBackend):
+            return
+        try:
+            backend.play(self._tone_path(tone))
+        except (OSError, RuntimeError) as e:
+            # A broken sound setup must never get in the way of a scan
+            self.last_error = str(e)
+            with self._lock:
+                self._backend = NullBackend()
+
+    def warm_up(self):
+        """Load the backend and render every tone now, e.g. from a thread at
+        start-up, so the first scan doesn't pay for it."""
+        if not isinstance(self.backend, NullBackend):
+            for tone in TONES:
+                self._tone_path(tone)
+
+    def _tone_path(self, tone):
+        with self._lock:
+            path = self._paths.get(tone)
+            if path is None:
+                if self._directory is None:
+                    self._directory = tempfile.mkdtemp(prefix="attendance-sounds-")
+                path = os.path.join(self._directory, f"{tone}.wav")
+                tone_wav(path, *TONES[tone])
+                self._paths[tone] = path
+            return path
+
+    def close(self):
+        with self._lock:
+            backend, self._backend = self._backend, None
+            directory, self._directory = self._directory, None
+            self._paths = {}
+        if backend is not None:
+            backend.close()
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,134 @@
+"""Live counters for the dashboard and fees cards.
+
+``stats_snapshot`` computes every counter from the database in one pass
+over students plus a summary-table lookup. ``LiveStats`` starts from a
+snapshot and is then told about each write as it is committed (a student
+added, attendance marked, a payment recorded), adjusting its counters in
+O(1) and notifying listeners. A fresh snapshot is only needed at start-up,
+when the day changes, and now and then to pick up other kiosks' writes.
+``LiveStats()`` with no snapshot starts at zero with ``loaded`` False, so a
+UI can show itself first and fetch the real numbers in the background.
+"""
+from .dates import today_iso
+
+
+def stats_snapshot(conn, today=None):
+    """Compute all live counters from scratch. Returns a plain dict."""
+    today = today or today_iso()
+    (total_students, active_courses, billed, collected,
+     outstanding, students_owing) = conn.execute("""
+        SELECT COUNT(*),
+               IFNULL(SUM(IFNULL(course_end_date >= ?, 1)), 0),
+               IFNULL(SUM(IFNULL(total_fees, 0)), 0),
+               IFNULL(SUM(MIN(IFNULL(fees_paid, 0), IFNULL(total_fees, 0))), 0),
+               IFNULL(SUM(MAX(IFNULL(total_fees, 0) - IFNULL(fees_paid, 0), 0)), 0),
+               IFNULL(SUM(IFNULL(total_fees, 0) > IFNULL(fees_paid, 0)), 0)
+        FROM students
+    """, (today,)).fetchone()
+    row = conn.execute("SELECT present FROM daily_attendance_summary WHERE date = ?",
+                       (today,)).fetchone()
+    return {
+        "date": today,
+        "total_students": total_students,
+        "today_attendance": row[0] if row else 0,
+        "active_courses": active_courses,
+        "billed": float(billed),
+        "collected": float(collected),
+        "outstanding": float(outstanding),
+        "students_owing": students_owing,
+    }
+
+
+def empty_snapshot(today=None):
+    """A snapshot with every counter at zero."""
+    return {
+        "date": today or today_iso(),
+        "total_students": 0,
+        "today_attendance": 0,
+        "active_courses": 0,
+        "billed": 0.0,
+        "collected": 0.0,
+        "outstanding": 0.0,
+        "students_owing": 0,
+    }
+
+
+def _fee_position(total_fees, fees_paid):
+    """One student's contribution to (billed, collected, outstanding, owing).
+
+    Overpayments count as collected only up to the fees due, so one
+    student's credit never hides another's balance.
+    """
+    total_fees = float(total_fees or 0)
+    fees_paid = float(fees_paid or 0)
+    balance = total_fees - fees_paid
+    return total_fees, min(fees_paid, total_fees), max(balance, 0), 1 if balance > 0 else 0
+
+
+class LiveStats:
+    """Dashboard counters kept current from write notifications.
+
+    Not thread-safe: create it and call it from the UI thread, feeding it
+    the results of background writes from their completion callbacks.
+    """
+
+    def __init__(self, snapshot=None):
+        self._listeners = []
+        if snapshot is None:
+            self.reset(empty_snapshot())
+            self.loaded = False
+        else:
+            self.reset(snapshot)
+
+    def subscribe(self, listener):
+        """Call ``listener(stats)`` now and after every change."""
+        self._listeners.append(listener)
+        listener(self)
+
+    def reset(self, snapshot):
+        """Replace every counter with a fresh ``stats_snapshot``."""
+        self.date = snapshot["date"]
+        self.total_students = snapshot["total_students"]
+        self.today_attendance = snapshot["today_attendance"]
+        self.active_courses = snapshot["active_courses"]
+        self.billed = snapshot["billed"]
+        self.collected = snapshot["collected"]
+        self.outstanding = snapshot["outstanding"]
+        self.students_owing = snapshot["students_owing"]
+        self.loaded = True
+        self._notify()
+
+    @property
+    def collection_rate(self):
+        """Percentage of all fees billed that has been collected."""
+        return self.collected / self.billed * 100 if self.billed else 100.0
+
+    def student_added(self, course_end_date, total_fees=0, fees_paid=0):
+        self.total_students += 1
+        # No end date means the course never ends
+        if course_end_date is None or course_end_date >= self.date:
+            self.active_courses += 1
+        self._apply_fees(None, (total_fees, fees_paid))
+
+    def attendance_marked(self, date, count=1):
+        """Record ``count`` newly marked students for ``date``."""
+        if date == self.date and count:
+            self.today_attendance += count
+            self._notify()
+
+    def fees_changed(self, total_fees, old_paid, new_paid):
+        """Record a change to one student's paid total (e.g. a payment)."""
+        self._apply_fees((total_fees, old_paid), (total_fees, new_paid))
+
+    def _apply_fees(self, before, after):
+        old = _fee_position(*before) if before else (0, 0, 0, 0)
+        new = _fee_position(*after)
+        self.billed += new[0] - old[0]
+        self.collected += new[1] - old[1]
+        self.outstanding += new[2] - old[2]
+        self.students_owing += new[3] - old[3]
+        self._notify()
+
+    def _notify(self):
+        for listener in self._listeners:
+            listener(self)
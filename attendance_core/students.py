@@ -0,0 +1,295 @@
+"""Student records: validation, lookup and registration."""
+import difflib
+import re
+from datetime import datetime, timedelta
+
+from .dates import today_day, today_iso
+from .db import has_search_index, transaction
+from .roster import roster_for
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+REGISTRATION_PAYMENT_METHOD = "Registration"
+
+# Columns shown in the student list, in display order, then the course end
+# day number for working out each student's status
+STUDENT_LIST_COLUMNS = ("roll_no, name, phone, dob, course_start_date, course_end_date, "
+                        "course_end_day")
+STUDENT_SORT_COLUMNS = ("roll_no", "name", "phone", "dob", "course_start_date", "course_end_date")
+
+# Typed ORDER BY expression for each sortable column. Roll numbers sort
+# numerically (non-numeric ones first), names case-insensitively and dates
+# as ISO text. Columns that may be NULL sort it as '' (first), so keyset
+# seeks always have a key to compare. Each has a matching (expression,
+# roll_no) index.
+STUDENT_SORTS = {
+    "roll_no": "CAST(roll_no AS INTEGER)",
+    "name": "name COLLATE NOCASE",
+    "phone": "IFNULL(phone, '')",
+    "dob": "IFNULL(dob, '')",
+    "course_start_date": "IFNULL(course_start_date, '')",
+    "course_end_date": "IFNULL(course_end_date, '')",
+}
+
+# Status filters for the student list, as shown in its Status column
+STUDENT_STATUSES = ("expired", "warning", "active")
+EXPIRY_WARNING_DAYS = 7
+EXPIRY_URGENT_DAYS = 3  # Highlighted in red in the Expiring Courses view
+
+# Search tuning. The trigram index needs at least three characters; shorter
+# terms are matched as prefixes. When a term finds fewer than FUZZY_BELOW
+# students, names sharing a trigram with it are tried too and kept if they
+# are at least FUZZY_MIN_SCORE similar (difflib ratio) to the term.
+SEARCH_LIMIT = 500
+FUZZY_BELOW = 5
+FUZZY_MIN_SCORE = 0.75
+FUZZY_CANDIDATES = 200
+
+
+# Validation functions
+def validate_phone(P):
+    return len(P) <= 10 and (P.isdigit() or P == "")
+
+
+def validate_email(email):
+    return EMAIL_PATTERN.match(email) is not None
+
+
+def validate_fees(P):
+    try:
+        if P == "": return True
+        float(P)
+        return True
+    except ValueError:
+        return False
+
+
+def add_student(conn, roll_no, name, phone, email, dob, course_start_date,
+                course_end_date, total_fees=0, fees_paid=0):
+    """Insert a new student. Dates must already be in ISO format.
+
+    Fees paid up front are recorded as a registration payment, which
+    brings ``fees_paid`` up to the amount. Raises
+    ``sqlite3.IntegrityError`` if the roll number already exists.
+    """
+    with transaction(conn):
+        conn.execute('''
+            INSERT INTO students
+            (roll_no, name, phone, email, dob, course_start_date, course_end_date, total_fees, fees_paid)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+        ''', (roll_no, name, phone, email, dob, course_start_date, course_end_date, total_fees))
+        if fees_paid:
+            conn.execute('''
+                INSERT INTO payments (roll_no, amount, payment_date, method)
+                VALUES (?, ?, ?, ?)
+            ''', (roll_no, fees_paid, today_iso(), REGISTRATION_PAYMENT_METHOD))
+    roster_for(conn).refresh(conn, roll_no)
+
+
+def get_student(conn, roll_no):
+    """Return the full ``students`` row for ``roll_no`` or None."""
+    return conn.execute("SELECT * FROM students WHERE roll_no = ?", (roll_no,)).fetchone()
+
+
+def list_students(conn):
+    return conn.execute("SELECT * FROM students").fetchall()
+
+
+def status_filter(status, today=None):
+    """Return a ``(where_sql, params)`` pair selecting students by status.
+
+    ``status`` is one of ``STUDENT_STATUSES`` or None for everyone. The
+    conditions are ranges on course_end_date so they can use its index.
+    A student with no end date never expires, so counts as active.
+    """
+    if status is None:
+        return "1", []
+    today = today or datetime.now().date()
+    soon = (today + timedelta(days=EXPIRY_WARNING_DAYS)).isoformat()
+    if status == "expired":
+        return "course_end_date < ?", [today.isoformat()]
+    if status == "warning":
+        return "course_end_date BETWEEN ? AND ?", [today.isoformat(), soon]
+    if status == "active":
+        return "(course_end_date > ? OR course_end_date IS NULL)", [soon]
+    raise ValueError(f"Unknown student status {status!r}")
+
+
+def count_students(conn, status=None):
+    where, params = status_filter(status)
+    return conn.execute(f"SELECT COUNT(*) FROM students WHERE {where}", params).fetchone()[0]
+
+
+def student_page(conn, offset=0, limit=50, sort="roll_no", descending=False,
+                 status=None, after=None, before=None, from_end=False):
+    """Return one page of the student list, sorted and filtered in SQL.
+
+    Each row is the ``STUDENT_LIST_COLUMNS`` followed by its sort key. Pass
+    the key of the last row shown as ``after`` (``(row[-1], row[0])``) to
+    get the next page, or the key of the first row as ``before`` to get the
+    previous one; both seek straight to the position through the sort
+    index. ``from_end`` returns the last page. Otherwise ``offset`` is used,
+    which has to walk the skipped rows and is only meant for jumps.
+    """
+    if sort not in STUDENT_SORTS:
+        raise ValueError(f"Cannot sort students by {sort!r}")
+    expression = STUDENT_SORTS[sort]
+    where, params = status_filter(status)
+
+    # Pages before a key (or at the end) are read backwards and flipped
+    backwards = before is not None or from_end
+    reverse = descending != backwards
+    direction = "DESC" if reverse else "ASC"
+    if after is not None or before is not None:
+        sort_value, roll_no = after if after is not None else before
+        op = "<" if reverse else ">"
+        # Spelled out rather than as a row value: SQLite will not seek an
+        # expression index (roll_no, name) with a row-value comparison
+        where += f" AND {expression} {op}= ? AND ({expression} {op} ? OR roll_no {op} ?)"
+        params += [sort_value, sort_value, roll_no]
+        offset = 0
+    elif from_end:
+        offset = 0
+
+    rows = conn.execute(f"""
+        SELECT {STUDENT_LIST_COLUMNS}, {expression} AS sort_key
+        FROM students
+        WHERE {where}
+        ORDER BY {expression} {direction}, roll_no {direction}
+        LIMIT ? OFFSET ?
+    """, params + [limit, offset]).fetchall()
+    if backwards:
+        rows.reverse()
+    return rows
+
+
+def search_students(conn, search_term, limit=SEARCH_LIMIT):
+    """Find students by roll number, name or phone, best matches first.
+
+    Rows are ``STUDENT_LIST_COLUMNS``. Terms of three or more characters
+    match anywhere in those columns through the trigram index, followed by
+    names that are close to the term (typos); an exact roll number or a
+    name starting with the term ranks first. Shorter terms match the start
+    of a roll number, name or phone.
+    """
+    term = search_term.strip()
+    if not term:
+        return []
+    if len(term) < 3:
+        return _search_prefix(conn, term, limit)
+    if not has_search_index(conn):
+        return _search_like(conn, term, limit)
+
+    rows = conn.execute(f"""
+        SELECT {_prefixed('s.', STUDENT_LIST_COLUMNS)}
+        FROM students_fts f JOIN students s ON s.rowid = f.rowid
+        WHERE students_fts MATCH ?
+        ORDER BY s.roll_no = ? DESC, s.name LIKE ? DESC, f.rank
+        LIMIT ?
+    """, (_fts_phrase(term), term, f"{_escape_like(term)}%", limit)).fetchall()
+    if len(rows) < min(limit, FUZZY_BELOW) and len(term) > 3:
+        seen = {row[0] for row in rows}
+        fuzzy = [row for row in _search_fuzzy(conn, term) if row[0] not in seen]
+        rows += fuzzy[:limit - len(rows)]
+    return rows
+
+
+def _prefixed(alias, columns):
+    return ", ".join(alias + column.strip() for column in columns.split(","))
+
+
+def _fts_phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _escape_like(text):
+    # Only used for ranking, where a stray wildcard does no harm
+    return text.replace("%", "").replace("_", "")
+
+
+def _trigrams(text):
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _search_fuzzy(conn, term):
+    # Names sharing any trigram with the term, scored by spelling similarity
+    grams = _trigrams(term)
+    query = "name : (" + " OR ".join(_fts_phrase(gram) for gram in sorted(grams)) + ")"
+    candidates = conn.execute(f"""
+        SELECT {_prefixed('s.', STUDENT_LIST_COLUMNS)}
+        FROM students_fts f JOIN students s ON s.rowid = f.rowid
+        WHERE students_fts MATCH ?
+        ORDER BY f.rank
+        LIMIT ?
+    """, (query, FUZZY_CANDIDATES)).fetchall()
+    term = term.lower()
+    scored = []
+    for row in candidates:
+        name = (row[1] or "").lower()
+        score = max(difflib.SequenceMatcher(None, term, word).ratio()
+                    for word in [name] + name.split())
+        if score >= FUZZY_MIN_SCORE:
+            scored.append((score, row))
+    scored.sort(key=lambda item: -item[0])
+    return [row for _, row in scored]
+
+
+def _search_prefix(conn, term, limit):
+    # Index range scans on roll_no, name (case-insensitive) and phone
+    upper = term + "\U0010ffff"
+    return conn.execute(f"""
+        SELECT * FROM (
+            SELECT {STUDENT_LIST_COLUMNS} FROM students WHERE roll_no >= ? AND roll_no < ?
+            UNION
+            SELECT {STUDENT_LIST_COLUMNS} FROM students
+            WHERE name COLLATE NOCASE >= ? AND name COLLATE NOCASE < ?
+            UNION
+            SELECT {STUDENT_LIST_COLUMNS} FROM students WHERE phone >= ? AND phone < ?
+        )
+        ORDER BY roll_no = ? DESC, name COLLATE NOCASE
+        LIMIT ?
+    """, (term, upper, term, upper, term, upper, term, limit)).fetchall()
+
+
+def _search_like(conn, term, limit):
+    # Full scans; only used when SQLite was built without FTS5
+    pattern = f"%{term}%"
+    return conn.execute(f"""
+        SELECT {STUDENT_LIST_COLUMNS} FROM students
+        WHERE roll_no LIKE ? OR name LIKE ? OR phone LIKE ?
+        ORDER BY roll_no = ? DESC, name LIKE ? DESC, name COLLATE NOCASE
+        LIMIT ?
+    """, (pattern, pattern, pattern, term, f"{term}%", limit)).fetchall()
+
+
+def fees_status(conn, roll_no):
+    """Summarise the fees position of one student, or None if unknown."""
+    result = conn.execute("""
+        SELECT total_fees, fees_paid, course_end_day
+        FROM students
+        WHERE roll_no = ?
+    """, (roll_no,)).fetchone()
+
+    if result:
+        total_fees, fees_paid, end_day = result
+        remaining = float(total_fees) - float(fees_paid)
+        days_left = end_day - today_day() if end_day is not None else None
+
+        return {
+            "total": total_fees,
+            "paid": fees_paid,
+            "remaining": remaining,
+            "days_left": days_left,
+            "status": "Completed" if remaining <= 0 else "Pending"
+        }
+    return None
+
+
+def get_student_fees(conn, roll_no):
+    """Return ``(name, email, total_fees, fees_paid, course_end_date)`` or None."""
+    return conn.execute("""
+        SELECT name, email, total_fees, fees_paid, course_end_date
+        FROM students
+        WHERE roll_no = ?
+    """, (roll_no,)).fetchone()
@@ -0,0 +1,151 @@
+"""Background writer thread with group commit.
+
+The GUI must never wait on a SQLite commit: on a slow disk or network
+share a single fsync can take hundreds of milliseconds. ``WriteQueue`` owns
+a dedicated thread and connection. It takes write jobs, runs every job
+that is waiting as one batch (each in its own savepoint), and commits the
+batch once. Finished jobs are handed back through ``process_completions``,
+which the GUI calls from ``root.after`` so callbacks run on the Tk thread.
+"""
+import queue
+import threading
+import time
+
+from .db import DEFAULT_DB_PATH, ConnectionManager, connect, run_with_retry, transaction
+
+
+class WriteJob:
+    """A unit of work submitted to a ``WriteQueue``."""
+    __slots__ = ("func", "args", "kwargs", "on_done", "result", "error")
+
+    def __init__(self, func, args, kwargs, on_done):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.on_done = on_done
+        self.result = None
+        self.error = None
+
+
+_STOP = object()
+
+
+class WriteQueue:
+    """Runs ``func(conn, *args, **kwargs)`` jobs on a writer thread.
+
+    ``db`` is a database path or a ``ConnectionManager``; either way the
+    writer opens a connection of its own.
+    """
+
+    def __init__(self, db=DEFAULT_DB_PATH, max_batch=64):
+        self.db = db
+        self.max_batch = max_batch
+        self._jobs = queue.Queue()
+        self._completed = queue.Queue()
+        self._thread = None
+        self.jobs_done = 0
+        self.batches = 0
+        self.last_commit_ms = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="attendance-writer",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, func, *args, on_done=None, **kwargs):
+        """Queue a write job.
+
+        ``on_done(result, error)`` is called from ``process_completions``
+        once the job's batch has been committed (``error`` is None) or has
+        failed (``result`` is None).
+        """
+        job = WriteJob(func, args, kwargs, on_done)
+        self._jobs.put(job)
+        return job
+
+    def pending(self):
+        return self._jobs.qsize()
+
+    def process_completions(self):
+        """Run callbacks for finished jobs. Call this on the UI thread."""
+        count = 0
+        while True:
+            try:
+                job = self._completed.get_nowait()
+            except queue.Empty:
+                return count
+            count += 1
+            if job.on_done is not None:
+                job.on_done(job.result, job.error)
+
+    def close(self, timeout=None):
+        """Finish the queued jobs and stop the writer thread."""
+        if self._thread is not None:
+            self._jobs.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _next_batch(self):
+        batch = [self._jobs.get()]
+        while len(batch) < self.max_batch and batch[-1] is not _STOP:
+            try:
+                batch.append(self._jobs.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        if isinstance(self.db, ConnectionManager):
+            conn = self.db.connect()
+        else:
+            conn = connect(self.db)
+        try:
+            while True:
+                batch = self._next_batch()
+                stop = batch[-1] is _STOP
+                if stop:
+                    batch.pop()
+                if batch:
+                    self._run_batch(conn, batch)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _run_batch(self, conn, batch):
+        started = time.perf_counter()
+        try:
+            # If another kiosk holds the write lock past the busy timeout the
+            # whole batch is rolled back and retried
+            run_with_retry(self._commit_batch, conn, batch)
+        except Exception as e:
+            # The commit itself failed, so nothing in the batch was saved
+            for job in batch:
+                job.result, job.error = None, job.error or e
+        self.last_commit_ms = (time.perf_counter() - started) * 1000
+        self.batches += 1
+        self.jobs_done += len(batch)
+        for job in batch:
+            self._completed.put(job)
+
+    def _commit_batch(self, conn, batch):
+        with transaction(conn):
+            for job in batch:
+                job.result = job.error = None
+                try:
+                    # A nested transaction() is a savepoint, so a failing
+                    # job rolls back alone and the rest still commit.
+                    with transaction(conn):
+                        job.result = job.func(conn, *job.args, **job.kwargs)
+                except Exception as e:
+                    job.error = e
+
+    def stats(self):
+        return {
+            "pending": self.pending(),
+            "jobs": self.jobs_done,
+            "batches": self.batches,
+            "last_commit_ms": self.last_commit_ms,
+        }
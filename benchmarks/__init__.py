@@ -0,0 +1,6 @@
+"""Synthetic data and timings for the attendance service layer.
+
+``python -m benchmarks.generate`` builds a database of any size and
+``python -m benchmarks.run`` times the operations the front desk uses
+most against one, headless. See the README's Benchmarks section.
+"""
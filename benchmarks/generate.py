@@ -0,0 +1,133 @@
+"""Build a synthetic database: N students, M days of attendance, P payments.
+
+The same arguments, seed and ``--today`` always give the same data.
+Everything is written through the real schema (triggers included) in one
+transaction, so summaries, balances and the search index come out as the
+app would leave them.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import attendance_core as core
+
+FIRST_NAMES = ["Aarav", "Aditi", "Ananya", "Arjun", "Diya", "Ishaan", "Kabir", "Kavya",
+               "Meera", "Neha", "Nikhil", "Priya", "Rahul", "Riya", "Rohan", "Saanvi",
+               "Sahil", "Sneha", "Tanvi", "Vihaan", "Yash", "Zoya", "Karan", "Pooja"]
+LAST_NAMES = ["Sharma", "Verma", "Patel", "Iyer", "Nair", "Gupta", "Reddy", "Das",
+              "Mehta", "Joshi", "Kapoor", "Khan", "Singh", "Rao", "Bose", "Pillai"]
+PAYMENT_METHODS = ["Cash", "UPI", "Card", "Bank Transfer"]
+COURSE_FEES = [15000, 25000, 40000, 60000]
+ATTENDANCE_RATE = 0.6  # Share of enrolled students present on a given day
+CHUNK_SIZE = 10000
+
+
+def student_rows(rng, count, today, days):
+    """Yield student tuples in insert order, with courses spread around the
+    attendance window so some have ended and some end soon."""
+    for roll_no in range(1, count + 1):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        start = today - timedelta(days=rng.randint(0, days + 180))
+        end = start + timedelta(days=rng.choice([90, 180, 365]))
+        dob = date(rng.randint(1970, 2015), rng.randint(1, 12), rng.randint(1, 28))
+        yield (str(roll_no), name, f"9{rng.randint(0, 999999999):09d}",
+               f"student{roll_no}@example.com", dob.isoformat(), start.isoformat(),
+               end.isoformat(), float(rng.choice(COURSE_FEES)))
+
+
+def attendance_rows(rng, students, today, days):
+    """Yield ``(roll_no, name, date, status)`` for the ``days`` up to ``today``."""
+    for offset in range(days, 0, -1):
+        day = (today - timedelta(days=offset - 1)).isoformat()
+        for roll_no, name, start, end in students:
+            if start <= day <= end and rng.random() < ATTENDANCE_RATE:
+                yield (roll_no, name, day, "Present")
+
+
+def payment_rows(rng, students, count, today):
+    """Yield ``(roll_no, amount, payment_date, method)``, never paying more
+    than a student's fees."""
+    paid = {}
+    for _ in range(count):
+        roll_no, total_fees, start = rng.choice(students)
+        balance = total_fees - paid.get(roll_no, 0)
+        if balance <= 0:
+            continue
+        amount = min(balance, float(rng.choice([1000, 2500, 5000, 10000])))
+        paid[roll_no] = paid.get(roll_no, 0) + amount
+        day = date.fromisoformat(start) + timedelta(days=rng.randint(0, 120))
+        yield (roll_no, amount, min(day, today).isoformat(), rng.choice(PAYMENT_METHODS))
+
+
+def _insert(conn, sql, rows):
+    count = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            conn.executemany(sql, chunk)
+            count += len(chunk)
+            chunk = []
+    conn.executemany(sql, chunk)
+    return count + len(chunk)
+
+
+def generate(path, students=1000, days=90, payments=2000, seed=1, today=None):
+    """Create a database at ``path`` (replacing any file there).
+
+    Returns ``{"students": n, "attendance": n, "payments": n}``, the rows
+    actually written.
+    """
+    today = today or date.today()
+    rng = random.Random(seed)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    conn = core.connect(path)
+    try:
+        with core.transaction(conn):
+            counts = {"students": _insert(conn, '''
+                INSERT INTO students
+                (roll_no, name, phone, email, dob, course_start_date, course_end_date, total_fees, fees_paid)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+            ''', student_rows(rng, students, today, days))}
+            enrolled = conn.execute(
+                "SELECT roll_no, name, course_start_date, course_end_date, total_fees FROM students"
+            ).fetchall()
+            counts["attendance"] = _insert(conn, '''
+                INSERT INTO attendance (roll_no, name, date, status) VALUES (?, ?, ?, ?)
+            ''', attendance_rows(rng, [row[:4] for row in enrolled], today, days))
+            counts["payments"] = _insert(conn, '''
+                INSERT INTO payments (roll_no, amount, payment_date, method) VALUES (?, ?, ?, ?)
+            ''', payment_rows(rng, [(row[0], row[4], row[2]) for row in enrolled], payments, today))
+    finally:
+        conn.close()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.generate",
+                                     description="Build a synthetic attendance database")
+    parser.add_argument("path", help="database file to create (replaced if it exists)")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=90, help="days of attendance up to today")
+    parser.add_argument("--payments", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--today", type=date.fromisoformat, default=None,
+                        help="last day of attendance, YYYY-MM-DD (default: today)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    counts = generate(args.path, args.students, args.days, args.payments, args.seed, args.today)
+    print(f"Wrote {counts['students']} students, {counts['attendance']} attendance rows and "
+          f"{counts['payments']} payments to {args.path} "
+          f"in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""Time the front desk's hot operations against a synthetic or copied database.
+
+Without ``--db`` a database is generated (see ``benchmarks.generate``);
+with it, the file is copied first, so benchmarks that write never touch
+the original. Each benchmark runs once to warm up and then ``--repeat``
+times. ``--output`` saves the timings as JSON; ``--compare`` checks them
+against a saved baseline and exits with status 1 if any benchmark's
+median is more than ``--tolerance`` slower.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import attendance_core as core
+
+from .generate import generate
+
+DEFAULT_TOLERANCE = 0.25
+# Differences smaller than this are timer noise, whatever the ratio
+NOISE_FLOOR_MS = 1.0
+
+SEARCH_TERMS = ["12", "Pr", "arma", "Priya Sh", "Sneha Iyer", "Kavia", "student42"]
+MARK_COUNT = 100
+BATCH_MARK_COUNT = 500
+
+# name -> (function(context), description), in running order
+BENCHMARKS = {}
+
+
+def benchmark(name, description):
+    def register(func):
+        BENCHMARKS[name] = (func, description)
+        return func
+    return register
+
+
+class Context:
+    """What a benchmark gets: the connection, a scratch directory and the
+    day each marking run should use (a new one every time, so no run
+    finds its students already marked)."""
+
+    def __init__(self, conn, workdir):
+        self.conn = conn
+        self.workdir = workdir
+        self.today = date.today()
+        self._next_day = self.today
+
+    def fresh_day(self):
+        self._next_day += timedelta(days=1)
+        return self._next_day.isoformat()
+
+    def active_rolls(self, count, day):
+        return [roll_no for (roll_no,) in self.conn.execute(
+            "SELECT roll_no FROM students WHERE course_end_date >= ? ORDER BY rowid LIMIT ?",
+            (day, count))]
+
+
+@benchmark("roster_rebuild", "reload the in-memory roster used for marking")
+def _roster_rebuild(ctx):
+    core.roster_for(ctx.conn).rebuild(ctx.conn)
+
+
+@benchmark("student_list_open", "count and first page of the student list")
+def _student_list_open(ctx):
+    core.count_students(ctx.conn)
+    core.student_page(ctx.conn, limit=50)
+
+
+@benchmark("student_list_scroll", "20 pages of the list sorted by name, by keyset")
+def _student_list_scroll(ctx):
+    rows = core.student_page(ctx.conn, limit=50, sort="name")
+    for _ in range(19):
+        if not rows:
+            break
+        rows = core.student_page(ctx.conn, limit=50, sort="name", after=(rows[-1][-1], rows[-1][0]))
+
+
+@benchmark("student_list_filter", "count and first page of students whose course ends soon")
+def _student_list_filter(ctx):
+    core.count_students(ctx.conn, status="warning")
+    core.student_page(ctx.conn, limit=50, status="warning")
+
+
+@benchmark("search", f"{len(SEARCH_TERMS)} searches: prefixes, substrings and a typo")
+def _search(ctx):
+    for term in SEARCH_TERMS:
+        core.search_students(ctx.conn, term)
+
+
+@benchmark("monthly_report", "attendance report for last month")
+def _monthly_report(ctx):
+    last_month = ctx.today.replace(day=1) - timedelta(days=1)
+    core.attendance_report(ctx.conn, *core.month_range(last_month.year, last_month.month))
+
+
+@benchmark("quarter_report", "attendance report for the last 90 days")
+def _quarter_report(ctx):
+    core.attendance_report(ctx.conn, (ctx.today - timedelta(days=89)).isoformat(),
+                           ctx.today.isoformat())
+
+
+@benchmark("financial_report", "fee totals, pending list and dashboard counters")
+def _financial_report(ctx):
+    core.financial_summary(ctx.conn)
+    core.pending_fees_summary(ctx.conn)
+    core.pending_fees_students(ctx.conn)
+    core.stats_snapshot(ctx.conn)
+
+
+@benchmark("fees_check", "fee reminders due and courses expiring this week")
+def _fees_check(ctx):
+    core.pending_fee_reminders(ctx.conn)
+    core.expiring_courses(ctx.conn)
+
+
+@benchmark("export_students", "CSV of every student")
+def _export_students(ctx):
+    core.export_students(ctx.conn, os.path.join(ctx.workdir, "students.csv"))
+
+
+@benchmark("export_attendance", "CSV of all attendance")
+def _export_attendance(ctx):
+    core.export_attendance(ctx.conn, os.path.join(ctx.workdir, "attendance.csv"))
+
+
+@benchmark("export_attendance_gz", "gzipped CSV of all attendance")
+def _export_attendance_gz(ctx):
+    core.export_attendance(ctx.conn, os.path.join(ctx.workdir, "attendance.csv.gz"))
+
+
+@benchmark("mark_single", f"scan {MARK_COUNT} students in one at a time, a commit each")
+def _mark_single(ctx):
+    day = ctx.fresh_day()
+    for roll_no in ctx.active_rolls(MARK_COUNT, day):
+        core.mark_attendance(ctx.conn, roll_no, day)
+
+
+@benchmark("mark_batch", f"mark a register of {BATCH_MARK_COUNT} students in one commit")
+def _mark_batch(ctx):
+    day = ctx.fresh_day()
+    core.mark_attendance_batch(ctx.conn, ctx.active_rolls(BATCH_MARK_COUNT, day), day)
+
+
+def database_sizes(conn):
+    return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("students", "attendance", "payments")}
+
+
+def run_benchmarks(path, repeat=5, names=None, progress=None):
+    """Time each benchmark against ``path`` (used as is; pass a copy).
+
+    Returns the results document saved by ``--output``.
+    """
+    names = names or list(BENCHMARKS)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        conn = core.connect(path)
+        try:
+            ctx = Context(conn, workdir)
+            sizes = database_sizes(conn)
+            for name in names:
+                func = BENCHMARKS[name][0]
+                func(ctx)  # Warm up caches and the page cache
+                runs = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    func(ctx)
+                    runs.append((time.perf_counter() - started) * 1000)
+                results[name] = {
+                    "median_ms": round(statistics.median(runs), 3),
+                    "min_ms": round(min(runs), 3),
+                    "mean_ms": round(statistics.mean(runs), 3),
+                    "runs_ms": [round(ms, 3) for ms in runs],
+                }
+                if progress is not None:
+                    progress(name, results[name])
+        finally:
+            conn.close()
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "database": sizes,
+        },
+        "results": results,
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return ``(name, baseline_ms, median_ms, ratio, verdict)`` rows.
+
+    The verdict is "regression" for a median more than ``tolerance``
+    slower than the baseline (and above the noise floor), "faster" for the
+    reverse, "new" if the baseline lacks the benchmark, and "" otherwise.
+    """
+    rows = []
+    for name, result in results["results"].items():
+        median = result["median_ms"]
+        base = baseline["results"].get(name)
+        if base is None:
+            rows.append((name, None, median, None, "new"))
+            continue
+        base_median = base["median_ms"]
+        ratio = median / base_median if base_median else float("inf")
+        verdict = ""
+        if abs(median - base_median) > NOISE_FLOOR_MS:
+            if ratio > 1 + tolerance:
+                verdict = "regression"
+            elif ratio < 1 / (1 + tolerance):
+                verdict = "faster"
+        rows.append((name, base_median, median, ratio, verdict))
+    return rows
+
+
+def _copy_database(source, target):
+    # The backup API copies a consistent snapshot, WAL contents included,
+    # without opening the source for writing
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run",
+                                     description="Benchmark the attendance service layer")
+    parser.add_argument("--db", help="benchmark a copy of this database instead of generating one")
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--payments", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", action="append", choices=list(BENCHMARKS), metavar="NAME",
+                        help="run just this benchmark (may be repeated)")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare with a saved results file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="slowdown counted as a regression (default: %(default)s = 25%%)")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (_, description) in BENCHMARKS.items():
+            print(f"{name:22} {description}")
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "benchmark.db")
+        if args.db:
+            print(f"Copying {args.db}...")
+            _copy_database(args.db, path)
+        else:
+            print(f"Generating {args.students} students, {args.days} days, "
+                  f"{args.payments} payments...")
+            generate(path, args.students, args.days, args.payments, args.seed)
+        results = run_benchmarks(
+            path, args.repeat, args.only,
+            progress=lambda name, r: print(f"  {name:22} {r['median_ms']:10.2f} ms "
+                                           f"(min {r['min_ms']:.2f})"))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"]["database"] != results["meta"]["database"]:
+            print("Warning: the baseline was measured on a database of a different size: "
+                  f"{baseline['meta']['database']}")
+        rows = compare(results, baseline, args.tolerance)
+        print(f"\n{'benchmark':22} {'baseline':>10} {'now':>10} {'ratio':>7}")
+        for name, base, median, ratio, verdict in rows:
+            base_text = f"{base:10.2f}" if base is not None else f"{'-':>10}"
+            ratio_text = f"{ratio:7.2f}" if ratio is not None else f"{'-':>7}"
+            print(f"{name:22} {base_text} {median:10.2f} {ratio_text}  {verdict.upper()}")
+        regressions = [row[0] for row in rows if row[4] == "regression"]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
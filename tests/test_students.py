@@ -0,0 +1,61 @@
+import unittest
+
+import attendance_core as core
+
+
+class StudentPageTest(unittest.TestCase):
+    def setUp(self):
+        self.conn = core.connect(":memory:")
+        for roll_no, phone, end in [
+            ("1", None, "2030-01-01"),
+            ("2", "9000000002", None),
+            ("3", None, None),
+            ("4", "9000000001", "2029-06-30"),
+            ("5", None, "2031-12-31"),
+        ]:
+            self.conn.execute("""
+                INSERT INTO students (roll_no, name, phone, course_end_date)
+                VALUES (?, ?, ?, ?)
+            """, (roll_no, f"Student {roll_no}", phone, end))
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def page_through(self, sort, descending):
+        # One row at a time by keyset, forwards and then back again
+        rows = core.student_page(self.conn, limit=1, sort=sort, descending=descending)
+        while True:
+            last = rows[-1]
+            page = core.student_page(self.conn, limit=1, sort=sort, descending=descending,
+                                     after=(last[-1], last[0]))
+            if not page:
+                break
+            rows += page
+        backwards = [rows[-1]]
+        while True:
+            first = backwards[0]
+            page = core.student_page(self.conn, limit=1, sort=sort, descending=descending,
+                                     before=(first[-1], first[0]))
+            if not page:
+                break
+            backwards = page + backwards
+        return [row[0] for row in rows], [row[0] for row in backwards]
+
+    def test_seek_through_null_sort_keys(self):
+        for sort in ("phone", "course_end_date"):
+            for descending in (False, True):
+                expected = [row[0] for row in core.student_page(
+                    self.conn, limit=10, sort=sort, descending=descending)]
+                forwards, backwards = self.page_through(sort, descending)
+                self.assertEqual(len(expected), 5)
+                self.assertEqual(forwards, expected, (sort, descending))
+                self.assertEqual(backwards, expected, (sort, descending))
+
+    def test_null_sort_keys_sort_first(self):
+        rows = core.student_page(self.conn, limit=10, sort="phone")
+        self.assertEqual([row[0] for row in rows], ["1", "3", "5", "4", "2"])
+
+
+if __name__ == "__main__":
+    unittest.main()